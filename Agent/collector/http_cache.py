@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+CACHE_PATH = os.getenv("COLLECTOR_CACHE_PATH", ".cache/serpapi_responses.sqlite")
+# Seconds before a cached response is fetched again; 0 keeps responses forever
+CACHE_TTL = float(os.getenv("COLLECTOR_CACHE_TTL", "0"))
+
+_SECRET_PARAMS = {"api_key"}
+
+
+def cache_key(url: str) -> str:
+    """
+    Canonical cache key for a URL: credentials removed and query parameters
+    sorted, so the same request with another key or ordering shares an entry.
+    """
+    parts = urlsplit(url)
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in _SECRET_PARAMS
+    )
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ""))
+
+
+class HTTPCache:
+    """
+    Disk-backed cache of successful HTTP response bodies keyed by URL.
+
+    Only 200 responses are stored, so failed requests are retried on the
+    next crawl. API keys never reach the cache (see ``cache_key``).
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, url: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, fetched_at FROM responses WHERE url = ?", (cache_key(url),)
+            ).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return row[0]
+
+    def put(self, url: str, body: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, body, fetched_at) VALUES (?, ?, ?)",
+                (cache_key(url), body, time.time()),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
@@ -1,75 +1,312 @@
+import asyncio
 import json
 import os
+import random
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-import requests
 from dotenv import load_dotenv
 
-from Agent.access.helper import get_data_from_serpapi, get_serpapi_url
+from Agent.collector.http_cache import HTTPCache
+from Agent.collector.patent_store import PatentStore, patent_id_of
 
 load_dotenv()
 
+SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com")
+COLLECTOR_CONCURRENCY = int(os.getenv("COLLECTOR_CONCURRENCY", "4"))
+# Sustained requests per second and burst size of the token bucket
+COLLECTOR_RATE = float(os.getenv("COLLECTOR_RATE", "5"))
+COLLECTOR_BURST = int(os.getenv("COLLECTOR_BURST", "5"))
+COLLECTOR_MAX_RETRIES = int(os.getenv("COLLECTOR_MAX_RETRIES", "3"))
+COLLECTOR_TIMEOUT = float(os.getenv("COLLECTOR_TIMEOUT", "30"))
+# "jsonl": one gzip JSONL file per directory; "json": a pretty-printed file per patent
+COLLECTOR_OUTPUT = os.getenv("COLLECTOR_OUTPUT", "jsonl")
+PATENTS_FILE = "patents.jsonl.gz"
 
-def fetch_patent_data(query, dir_path):
+# Statuses worth retrying; any other error response is final
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def with_api_key(url: str, api_key: str) -> str:
     """
-    Fetch patent data from SerpAPI and save it to the specified directory.
+    Add the SerpAPI key to a URL (``serpapi_link`` values come without it).
+    """
+    parts = urlsplit(url)
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "api_key"]
+    params.append(("api_key", api_key))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), parts.fragment))
+
+
+def search_url(query: str, api_key: str, base_url: str = SERPAPI_BASE_URL) -> str:
+    params = urlencode({"engine": "google_patents", "q": query, "api_key": api_key})
+    return f"{base_url.rstrip('/')}/search?{params}"
+
+
+def _decode(body: str):
+    # SerpAPI answers with a JSON object; anything else (e.g. a proxy's HTML
+    # error page served with 200) is a failed fetch
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate`` tokens per second, at most ``capacity`` saved up.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PatentCrawler:
+    """
+    Async SerpAPI crawler for a patent search, its results and their citations.
+
+    Requests share one aiohttp session, run at most ``concurrency`` at a
+    time and are paced by a token bucket. Failures on 429/5xx or network
+    errors are retried with exponential backoff (honouring Retry-After).
+    Successful responses that decode as JSON objects are stored in the
+    on-disk HTTP cache and are never requested again; a URL reached twice
+    in one crawl is fetched once, and a patent cited along several paths
+    is saved and expanded once. Cache reads and writes and record writes
+    run in the default executor, off the event loop.
 
     Args:
-        query (str): Search query for patents.
-        dir_path (str): Directory to save the results.
+        api_key (str): SerpAPI key.
+        dir_path (str): Output directory for the JSON files.
+        store (PatentStore): Write records here instead of one JSON file
+            per patent.
+        depth (int): Citation levels to follow: 0 = search results only,
+            1 = their citations, 2 = citations of citations, ...
+        max_citations (int): Citations followed per patent; None for all.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        dir_path: str,
+        depth: int = 1,
+        max_citations: int = None,
+        concurrency: int = COLLECTOR_CONCURRENCY,
+        rate: float = COLLECTOR_RATE,
+        burst: int = COLLECTOR_BURST,
+        max_retries: int = COLLECTOR_MAX_RETRIES,
+        cache: HTTPCache = None,
+        base_url: str = SERPAPI_BASE_URL,
+        store: PatentStore = None,
+    ):
+        self.api_key = api_key
+        self.dir_path = dir_path
+        self.depth = depth
+        self.max_citations = max_citations
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.cache = cache if cache is not None else HTTPCache()
+        self.base_url = base_url
+        self.store = store
+        self.query = None
+        self.stats = {"requests": 0, "cache_hits": 0, "retries": 0, "failures": 0, "saved": 0}
+        self._inflight = {}
+        self._visited = set()
+
+    async def fetch_json(self, session, url: str):
+        """
+        Return the decoded JSON for a URL, or None if it could not be fetched.
+        """
+        key = with_api_key(url, self.api_key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(session, key))
+        return await task
+
+    async def _fetch(self, session, url):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(None, self.cache.get, url)
+        data = _decode(body) if body is not None else None
+        if data is not None:
+            self.stats["cache_hits"] += 1
+            return data
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with self._semaphore:
+                await self._bucket.acquire()
+                self.stats["requests"] += 1
+                try:
+                    async with session.get(url) as response:
+                        body = await response.text()
+                        status = response.status
+                        retry_after = response.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status, body = None, str(e)
+
+            if status == 200:
+                data = _decode(body)
+                if data is not None:
+                    await loop.run_in_executor(None, self.cache.put, url, body)
+                    return data
+                status = "200 with an invalid JSON body"
+                break
+            if status is not None and status not in RETRY_STATUSES:
+                break
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                delay = 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+
+        self.stats["failures"] += 1
+        print(f"Error fetching {url.split('api_key=')[0]}...: {status}, {body[:200]}")
+        return None
+
+    def _write(self, name, data, url, level, parent):
+        if self.store is not None:
+            kind = "result" if level == 0 else "citation"
+            if self.store.add(data, kind, url=url, parent=parent, query=self.query):
+                self.stats["saved"] += 1
+            return
+        with open(os.path.join(self.dir_path, name), "w") as f:
+            json.dump(data, f, indent=2)
+        self.stats["saved"] += 1
+
+    async def _crawl_patent(self, session, url, indices, level, parent=None):
+        # Citation graphs have shared and mutual citations; claim the URL before awaiting
+        if url in self._visited:
+            return
+        self._visited.add(url)
+
+        data = await self.fetch_json(session, url)
+        if not data:
+            label = "patent" if level == 0 else "citation"
+            print(f"Error fetching data for {label} {'_'.join(map(str, indices))}: No data returned.")
+            return
+        patent_id = patent_id_of(data, url)
+        if patent_id is not None:
+            if patent_id in self._visited:
+                return
+            self._visited.add(patent_id)
+
+        suffix = "_".join(map(str, indices))
+        name = f"patent_data_{suffix}.json" if level == 0 else f"citation_{suffix}.json"
+        await asyncio.get_running_loop().run_in_executor(None, self._write, name, data, url, level, parent)
+
+        if level >= self.depth:
+            return
+        citations = data.get("patent_citations", {}).get("original", [])
+        if self.max_citations is not None:
+            citations = citations[: self.max_citations]
+
+        tasks = []
+        for idx, citation in enumerate(citations):
+            link = citation.get("serpapi_link")
+            if link:
+                tasks.append(
+                    self._crawl_patent(session, link, indices + [idx], level + 1, patent_id)
+                )
+            else:
+                print(f"No SERPAPI link found for citation {'_'.join(map(str, indices + [idx]))}.")
+        await asyncio.gather(*tasks)
+
+    async def crawl(self, query: str) -> dict:
+        """
+        Run the search and crawl its results down to ``depth`` citation levels.
+
+        Returns:
+            dict: Request, cache and failure counters for the crawl.
+        """
+        import aiohttp
+
+        os.makedirs(self.dir_path, exist_ok=True)
+        # Created here so they bind to the running event loop
+        self._semaphore = asyncio.Semaphore(max(self.concurrency, 1))
+        self._bucket = TokenBucket(self.rate, self.burst)
+        self._inflight = {}
+        self._visited = set()
+        self.query = query
+
+        start = time.perf_counter()
+        connector = aiohttp.TCPConnector(limit=max(self.concurrency, 1))
+        timeout = aiohttp.ClientTimeout(total=COLLECTOR_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            results = await self.fetch_json(session, search_url(query, self.api_key, self.base_url))
+            if results is None:
+                raise RuntimeError(f"Patent search for '{query}' failed.")
+
+            await asyncio.gather(
+                *(
+                    self._crawl_patent(session, patent["serpapi_link"], [idx], 0)
+                    for idx, patent in enumerate(results.get("organic_results", []))
+                    if patent.get("serpapi_link")
+                )
+            )
+
+        self.stats["seconds"] = round(time.perf_counter() - start, 2)
+        return dict(self.stats)
+
+
+async def async_fetch_patent_data(query, dir_path, depth=1, output=COLLECTOR_OUTPUT, **crawler_kwargs):
+    """
+    Async ``fetch_patent_data`` for callers already running an event loop.
     """
     api_key = os.getenv("SERPAPI_API_KEY")
     if not api_key:
         raise ValueError("SERPAPI_API_KEY environment variable is not set.")
+    if output == "json":
+        return await PatentCrawler(api_key, dir_path, depth=depth, **crawler_kwargs).crawl(query)
+    with PatentStore(os.path.join(dir_path, PATENTS_FILE)) as store:
+        return await PatentCrawler(api_key, dir_path, depth=depth, store=store, **crawler_kwargs).crawl(query)
 
-    # Ensure the output directory exists
-    os.makedirs(dir_path, exist_ok=True)
-
-    url = (
-        f"https://serpapi.com/search?engine=google_patents&q={query}&api_key={api_key}"
-    )
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Error fetching data: {response.status_code}, {response.text}")
-        exit(1)
-
-    if response.status_code == 200:
-        data = response.json()
-        for idx, patent in enumerate(data.get("organic_results", [])):
-            serpapi_url = get_serpapi_url(patent)
-            response_data = get_data_from_serpapi(serpapi_url)
-            if not response_data:
-                print(f"Error fetching data for patent {idx}: No data returned.")
-                continue
-
-            with open(f"{dir_path}/patent_data_{idx}.json", "w") as f:
-                json.dump(response_data, f, indent=2)
-
-            patent_citations = response_data.get("patent_citations", {}).get(
-                "original", {}
-            )
 
-            for idx2, citation in enumerate(patent_citations):
-                serpapi_url2 = citation.get("serpapi_link", None)
-                if serpapi_url2:
-                    citation_data = get_data_from_serpapi(serpapi_url2)
-                    if citation_data:
-                        with open(f"{dir_path}/citation_{idx}_{idx2}.json", "w") as f:
-                            json.dump(citation_data, f, indent=2)
-                    else:
-                        print(
-                            f"Error fetching data for citation {idx2}: No data returned."
-                        )
-                else:
-                    print(f"No SERPAPI link found for citation {idx2}.")
-    else:
-        print(f"Error: {response.status_code}, {response.text}")
+def fetch_patent_data(query, dir_path, depth=1, output=COLLECTOR_OUTPUT, **crawler_kwargs):
+    """
+    Fetch patent data from SerpAPI and save it to the specified directory.
+
+    Args:
+        query (str): Search query for patents.
+        dir_path (str): Directory to save the results.
+        depth (int): Citation levels to follow (see ``PatentCrawler``).
+        output (str): "jsonl" appends new patents to ``patents.jsonl.gz`` in
+            ``dir_path``; "json" writes a file per patent and citation.
+        **crawler_kwargs: Concurrency, rate limit, retry and cache settings
+            passed to ``PatentCrawler``.
+
+    Returns:
+        dict: Crawl statistics.
+    """
+    return asyncio.run(async_fetch_patent_data(query, dir_path, depth, output, **crawler_kwargs))
 
 
 if __name__ == "__main__":
     query = input("Enter the search query for patents: ")
     dir_path = input("Enter the directory path to save results: ")
+    depth = int(input("Citation depth (0-3) [1]: ") or 1)
     try:
-        fetch_patent_data(query, dir_path)
-        print(f"Patent data fetched and saved to '{dir_path}'")
+        stats = fetch_patent_data(query, dir_path, depth=depth)
+        print(f"Patent data fetched and saved to '{dir_path}' ({stats})")
     except Exception as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        print(f"Error: {e}")
@@ -0,0 +1,164 @@
+import gzip
+import json
+import os
+import threading
+import zlib
+from urllib.parse import parse_qsl, urlsplit
+
+
+def patent_id_of(data: dict, url: str = None) -> str:
+    """
+    Publication number of a SerpAPI patent record ("US1234567B2").
+
+    Taken from the response itself when present, else from the
+    ``patent_id`` parameter ("patent/US1234567B2/en") of the URL it came from.
+    """
+    for key in ("publication_number", "patent_id"):
+        value = data.get(key)
+        if value:
+            return value.split("/")[1] if value.startswith("patent/") else value
+    if url:
+        value = dict(parse_qsl(urlsplit(url).query)).get("patent_id", "")
+        parts = value.split("/")
+        if len(parts) > 1:
+            return parts[1]
+    return None
+
+
+def _gzip_lines(path, status):
+    # Decompress member by member instead of through gzip.open, which raises
+    # EOFError on a truncated last member (a crawl killed mid-write) and
+    # loses the complete lines buffered before it
+    with open(path, "rb") as f:
+        decompressor = zlib.decompressobj(wbits=31)
+        started = False
+        pending = b""
+        while True:
+            block = f.read(1 << 16)
+            if not block:
+                break
+            while block:
+                started = True
+                pending += decompressor.decompress(block)
+                block = decompressor.unused_data
+                if decompressor.eof:
+                    decompressor = zlib.decompressobj(wbits=31)
+                    started = False
+            *lines, pending = pending.split(b"\n")
+            yield from lines
+    # Records end with a newline, so an unterminated tail of a cut member is incomplete
+    status["truncated"] = started
+    if not started:
+        yield pending
+
+
+def _iter_records(path, status):
+    if path.endswith(".gz"):
+        lines = (line.decode("utf-8") for line in _gzip_lines(path, status))
+    else:
+        lines = open(path, "r", encoding="utf-8")
+    try:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        lines.close()
+
+
+def iter_records(path: str):
+    """
+    Yield the records of a JSONL file, gzip-compressed or not, one at a time.
+
+    A gzip file whose last member was cut off mid-write yields every
+    complete record before the cut.
+    """
+    status = {}
+    yield from _iter_records(path, status)
+    if status.get("truncated"):
+        print(f" '{path}' ends in a truncated gzip member; skipped its incomplete last record.")
+
+
+class PatentStore:
+    """
+    Appendable gzip JSONL file of collected patents, one record per line.
+
+    Each record is ``{"patent_id", "kind", "parent", "query", "data"}``, with
+    ``kind`` "result" for search results and "citation" for cited patents.
+    Patents already in the file are skipped, so repeated crawls and patents
+    cited from several places are stored once. Every open appends a new
+    gzip member, which readers see as one continuous stream; a truncated
+    last member left by a crash is rewritten first, keeping its complete
+    records.
+
+    Args:
+        path (str): Output file, e.g. "data/patents.jsonl.gz".
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.added = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._ids = set()
+        self._file = None
+
+        if os.path.exists(path):
+            status = {}
+            for record in _iter_records(path, status):
+                self._ids.add(record.get("patent_id"))
+            if status.get("truncated"):
+                self._rewrite_intact()
+
+    def _rewrite_intact(self):
+        # Appending after a cut member would make the rest of the file unreadable
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for record in _iter_records(self.path, {}):
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+        print(f" Repaired truncated '{self.path}' ({len(self._ids)} complete records kept).")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, patent_id):
+        return patent_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, data: dict, kind: str, url: str = None, parent: str = None, query: str = None) -> bool:
+        """
+        Append a patent unless its id is already stored.
+
+        Returns:
+            bool: True if the record was written.
+        """
+        patent_id = patent_id_of(data, url)
+        line = json.dumps(
+            {"patent_id": patent_id, "kind": kind, "parent": parent, "query": query, "data": data},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        with self._lock:
+            if patent_id is not None and patent_id in self._ids:
+                self.skipped += 1
+                return False
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._ids.add(patent_id)
+            self.added += 1
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+
+from crewai import LLM
+from langchain_core.outputs import Generation
+
+from Agent.metrics.instrumentation import bind_trace, increment, record_span, span
+
+_subscribed = False
+_subscribe_lock = threading.Lock()
+
+
+def _on_stream_chunk(source, event):
+    if isinstance(source, CrewLLM):
+        source._on_chunk(event.chunk)
+
+
+def _subscribe_stream_chunks():
+    # One bus handler for the process; chunks go to the LLM that emitted them,
+    # so concurrent runs do not see each other's tokens
+    global _subscribed
+    with _subscribe_lock:
+        if _subscribed:
+            return
+        try:
+            from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+        except ImportError:  # crewAI < 0.186
+            from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+        crewai_event_bus.on(LLMStreamChunkEvent)(_on_stream_chunk)
+        _subscribed = True
+
+
+class CrewLLM(LLM):
+    """
+    crewAI LLM that serves repeated prompts from an ``LLMResponseCache``,
+    forwards streamed tokens and records call metrics.
+
+    crewAI sends every call through litellm and never consults LangChain
+    caches or callbacks, so the cache is applied here, around ``LLM.call``,
+    and tokens come from the ``LLMStreamChunkEvent``s crewAI publishes on
+    its event bus when streaming. Calls that pass tools are not cached:
+    with native function calling the response runs them.
+
+    Each model call is an ``llm.generate`` span, with ``llm.first_token``
+    when streaming; token counts come from ``LLMMetricsLogger`` in the
+    litellm callbacks.
+
+    Args:
+        response_cache (LLMResponseCache): Cache to use; None to disable.
+        on_token (callable): Called with each streamed chunk of text (a
+            cached response arrives as one chunk); enables streaming.
+        Other arguments go to ``crewai.LLM``.
+    """
+
+    def __init__(self, *args, response_cache=None, on_token=None, **kwargs):
+        if on_token is not None:
+            kwargs["stream"] = True
+            _subscribe_stream_chunks()
+        super().__init__(*args, **kwargs)
+        self.response_cache = response_cache
+        self.on_token = on_token
+        self._first_token = None
+
+    def _llm_string(self):
+        # Agents set their own stop words on the shared LLM, so they are part of the key
+        return json.dumps(
+            {"model": self.model, "temperature": self.temperature, "stop": self.stop},
+            sort_keys=True,
+            default=str,
+        )
+
+    def _on_chunk(self, chunk):
+        increment("llm.streamed_tokens")
+        first_token, self._first_token = self._first_token, None
+        if first_token is not None:
+            first_token()
+        if self.on_token is not None:
+            self.on_token(chunk)
+
+    def _generate(self, messages, **kwargs):
+        increment("llm.calls")
+        if isinstance(messages, str):
+            increment("llm.prompt_chars", len(messages))
+        else:
+            increment("llm.prompt_chars", sum(len(str(message.get("content") or "")) for message in messages))
+
+        start = time.perf_counter()
+        # Bus handlers may run on another thread; bind the span to this call's trace
+        self._first_token = bind_trace(
+            lambda: record_span("llm.first_token", start, time.perf_counter() - start)
+        )
+        try:
+            with span("llm.generate", model=self.model):
+                return super().call(messages, **kwargs)
+        finally:
+            self._first_token = None
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        cache = self.response_cache
+        if cache is None or tools or available_functions:
+            return self._generate(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs
+            )
+
+        prompt = messages if isinstance(messages, str) else json.dumps(messages, sort_keys=True, default=str)
+        llm_string = self._llm_string()
+        cached = cache.lookup(prompt, llm_string)
+        if cached:
+            increment("llm.cache_hits")
+            if self.on_token is not None:
+                self.on_token(cached[0].text)
+            return cached[0].text
+
+        response = self._generate(messages, callbacks=callbacks, **kwargs)
+        if isinstance(response, str) and response:
+            cache.update(prompt, llm_string, [Generation(text=response)])
+        return response
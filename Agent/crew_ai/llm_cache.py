@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.outputs import Generation
+
+from Agent.search_client.generation import get_index_generation
+from Agent.search_client.opensearch_client import OPENSEARCH_INDEX
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+# Cosine similarity above which a cached answer is reused for a different
+# prompt; 0 disables similarity matching (exact match only)
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0"))
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Disk-backed cache for LLM responses, used by ``CrewLLM`` (and usable
+    as a LangChain cache).
+
+    Entries are keyed by the sha256 of the prompt and of the
+    ``llm_string`` (model name plus generation parameters). Every entry
+    remembers the index generation it was produced under, since prompts
+    embed retrieved chunks, and is dropped once ingestion bumps it. The
+    least recently used entries are evicted past ``max_entries``.
+
+    With ``similarity`` > 0, an exact-match miss falls back to the cached
+    prompt for the same model whose embedding is closest to the new one,
+    if its cosine similarity reaches ``similarity``.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        similarity: float = LLM_CACHE_SIMILARITY,
+        index_name: str = OPENSEARCH_INDEX,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.index_name = index_name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._generation = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                llm_hash TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                generation INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                embedding BLOB,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (llm_hash, prompt_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access "
+            "ON llm_responses (last_access)"
+        )
+        self._conn.commit()
+
+    def _embed(self, prompt):
+        from Agent.vectors.embedding import embed_many
+
+        # Prompts are one-off texts; keep them out of the chunk embedding cache
+        return embed_many([prompt], verbose=False, use_cache=False)[0]
+
+    def lookup(self, prompt: str, llm_string: str):
+        llm_hash, prompt_hash = _sha256(llm_string), _sha256(prompt)
+        generation = get_index_generation(self.index_name)
+
+        with self._lock:
+            self._purge_stale(generation)
+            row = self._conn.execute(
+                "SELECT response FROM llm_responses WHERE llm_hash = ? AND prompt_hash = ?",
+                (llm_hash, prompt_hash),
+            ).fetchone()
+            if row is not None:
+                self._touch(llm_hash, prompt_hash)
+                self.hits += 1
+                return self._decode(row[0])
+
+        if self.similarity > 0:
+            match = self._lookup_similar(llm_hash, prompt)
+            if match is not None:
+                return match
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _lookup_similar(self, llm_hash, prompt):
+        try:
+            query = np.asarray(self._embed(prompt), dtype="float32")
+        except Exception as e:
+            print(f" LLM cache similarity lookup skipped: {e}")
+            return None
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT prompt_hash, response, embedding FROM llm_responses "
+                "WHERE llm_hash = ? AND embedding IS NOT NULL",
+                (llm_hash,),
+            ).fetchall()
+            if not rows:
+                return None
+
+            vectors = np.asarray([array("f", row[2]).tolist() for row in rows], dtype="float32")
+            norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+            norms[norms == 0] = 1.0
+            scores = vectors @ query / norms
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity:
+                return None
+
+            self._touch(llm_hash, rows[best][0])
+            self.similar_hits += 1
+            return self._decode(rows[best][1])
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        embedding = None
+        if self.similarity > 0:
+            try:
+                embedding = array("f", self._embed(prompt)).tobytes()
+            except Exception as e:
+                print(f" LLM cache prompt embedding skipped: {e}")
+
+        response = json.dumps(
+            [{"text": g.text, "generation_info": g.generation_info} for g in return_val]
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(llm_hash, prompt_hash, generation, response, embedding, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    _sha256(llm_string),
+                    _sha256(prompt),
+                    get_index_generation(self.index_name),
+                    response,
+                    embedding,
+                    time.time(),
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _purge_stale(self, generation):
+        if generation != self._generation:
+            self._conn.execute("DELETE FROM llm_responses WHERE generation != ?", (generation,))
+            self._conn.commit()
+            self._generation = generation
+
+    def _touch(self, llm_hash, prompt_hash):
+        self._conn.execute(
+            "UPDATE llm_responses SET last_access = ? WHERE llm_hash = ? AND prompt_hash = ?",
+            (time.time(), llm_hash, prompt_hash),
+        )
+        self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE rowid IN ("
+                "SELECT rowid FROM llm_responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    @staticmethod
+    def _decode(response):
+        return [
+            Generation(text=item["text"], generation_info=item.get("generation_info"))
+            for item in json.loads(response)
+        ]
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache(use_cache: bool = True):
+    """
+    Return the process-wide LLM response cache, or None when bypassed with
+    ``use_cache=False`` or disabled with ``LLM_CACHE=0``.
+    """
+    global _cache
+    if not (LLM_CACHE_ENABLED and use_cache):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+from Agent.metrics.instrumentation import bind_trace
+from Agent.vectors.embedding import OLLAMA_URL, get_session
+
+
+def _keep_alive(value):
+    # Ollama takes either a duration string ("30m") or a number of seconds
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+OLLAMA_HEALTH_TTL = float(os.getenv("OLLAMA_HEALTH_TTL", "60"))
+# How long Ollama keeps the model loaded after a request ("30m", -1 = forever)
+OLLAMA_KEEP_ALIVE = _keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "1") != "0"
+
+_lock = threading.Lock()
+_models = {"checked_at": 0.0, "names": []}
+_probed = {}
+_warming = set()
+
+
+def list_ollama_models(force: bool = False) -> list:
+    """
+    Return the names of the installed Ollama models.
+
+    A successful answer is reused for OLLAMA_HEALTH_TTL seconds; failures
+    are not cached, so a freshly started Ollama is seen on the next call.
+    """
+    with _lock:
+        if not force and time.monotonic() - _models["checked_at"] < OLLAMA_HEALTH_TTL:
+            return list(_models["names"])
+
+    try:
+        response = get_session().get(f"{OLLAMA_URL}/api/tags", timeout=5)
+        response.raise_for_status()
+        names = [model.get("name") for model in response.json().get("models", []) if model.get("name")]
+    except Exception as e:
+        print(f"Error connecting to Ollama: {e}")
+        return []
+
+    with _lock:
+        _models.update(checked_at=time.monotonic(), names=names)
+    return names
+
+
+def probe_model(model_name: str, force: bool = False) -> bool:
+    """
+    Check that a model is installed with a metadata request (``/api/show``),
+    which does not load the model or generate anything.
+    """
+    with _lock:
+        checked_at = _probed.get(model_name)
+        if not force and checked_at and time.monotonic() - checked_at < OLLAMA_HEALTH_TTL:
+            return True
+
+    try:
+        response = get_session().post(f"{OLLAMA_URL}/api/show", json={"model": model_name}, timeout=5)
+    except Exception as e:
+        print(f"Error probing model {model_name}: {e}")
+        return False
+    if response.status_code != 200:
+        print(f"Model {model_name} not available: {response.status_code}, {response.text}")
+        return False
+
+    with _lock:
+        _probed[model_name] = time.monotonic()
+    return True
+
+
+def warm_model(model_name: str, keep_alive: str = OLLAMA_KEEP_ALIVE, background: bool = True):
+    """
+    Load a model into memory ahead of the first real prompt.
+
+    A generate request without a prompt only loads the model and sets its
+    keep-alive. With ``background`` the request runs in a daemon thread so
+    crew construction continues meanwhile.
+    """
+
+    def run():
+        start = time.perf_counter()
+        try:
+            response = get_session().post(
+                f"{OLLAMA_URL}/api/generate",
+                json={"model": model_name, "keep_alive": keep_alive},
+                timeout=300,
+            )
+            response.raise_for_status()
+            print(f" Warmed up {model_name} in {time.perf_counter() - start:.1f}s (keep_alive={keep_alive})")
+        except Exception as e:
+            print(f"Warm-up of {model_name} failed: {e}")
+        finally:
+            with _lock:
+                _warming.discard(model_name)
+
+    with _lock:
+        if model_name in _warming:
+            return
+        _warming.add(model_name)
+
+    if background:
+        threading.Thread(target=bind_trace(run), name=f"warm-{model_name}", daemon=True).start()
+    else:
+        run()
@@ -1,33 +1,58 @@
 import os
+import queue
+import threading
 from datetime import datetime
-import requests
+from typing import Callable
 
 from crewai import Agent, Crew, Process, Task
 from crewai.tools import BaseTool
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import OllamaLLM
-
-from Agent.search_client.opensearch_client import get_opensearch_client
-
-
-def check_ollama_availability():
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        response.raise_for_status()
-        models = response.json().get("models", [])
-        return [model.get("name") for model in models if model.get("name")]
-    except Exception as e:
-        print(f"Error connecting to Ollama: {e}")
-        return []
+from pydantic import PrivateAttr
+
+from Agent.crew_ai.crew_llm import CrewLLM
+from Agent.crew_ai.llm_cache import get_llm_cache
+from Agent.metrics.instrumentation import METRICS_ENABLED, span, trace_run
+from Agent.metrics.llm_callbacks import LLMMetricsLogger
+from Agent.crew_ai.ollama_status import (
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_WARMUP,
+    list_ollama_models,
+    probe_model,
+    warm_model,
+)
+from Agent.crew_ai.retrieval import RETRIEVAL_MODE, RetrievalSession
+from Agent.vectors.embedding import OLLAMA_URL
+from Agent.crew_ai.streaming import (
+    ReportWriter,
+    print_event,
+    step_event,
+    task_event,
+    token_event,
+)
+
+
+def check_ollama_availability(force=False):
+    return list_ollama_models(force=force)
+
+
+def _ollama_llm(model_name, use_llm_cache=True, on_event=None):
+    if not model_name.startswith("ollama/"):
+        model_name = f"ollama/{model_name}"
+    # A crewAI LLM: crewAI converts any other LLM object through litellm,
+    # dropping its cache and callbacks
+    return CrewLLM(
+        model=model_name,
+        base_url=OLLAMA_URL,
+        temperature=0.2,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        response_cache=get_llm_cache(use_llm_cache),
+        callbacks=[LLMMetricsLogger()] if METRICS_ENABLED else [],
+        on_token=(lambda chunk: on_event(token_event(chunk))) if on_event else None,
+    )
 
 
-def test_model(model_name):
+def test_model(model_name, use_llm_cache=True):
     try:
-        llm = OllamaLLM(model=model_name, temperature=0.2)
-        prompt = ChatPromptTemplate.from_template("Say hello!")
-        chain = prompt | llm | StrOutputParser()
-        result = chain.invoke({})
+        result = _ollama_llm(model_name, use_llm_cache).call("Say hello!")
         return bool(result)
     except Exception as e:
         print(f"Error testing model {model_name}: {e}")
@@ -36,30 +61,27 @@ def test_model(model_name):
 
 class SearchPatentChunksTool(BaseTool):
     name: str = "search_patent_chunks"
-    description: str = "Search for relevant chatbot/healthcare patent PDF chunks"
+    description: str = (
+        "Search for relevant chatbot/healthcare patent PDF chunks. "
+        "Chunks you already retrieved earlier in this task are listed by [id] only."
+    )
 
-    def _run(self, query: str, top_k: int = 20) -> str:
-        client = get_opensearch_client("localhost", 9200)
-        index_name = "patent_chunks"
+    # The crew's tool cache is shared by all agents; RetrievalSession caches per scope instead
+    cache_function: Callable = lambda _args, _result: False
 
-        search_query = {
-            "size": top_k,
-            "query": {"match": {"text": query}},
-            "_source": ["source_file", "chunk_index", "text"],
-        }
+    _session: RetrievalSession = PrivateAttr(default_factory=RetrievalSession)
+    _scope: str = PrivateAttr(default=None)
 
+    def __init__(self, session: RetrievalSession = None, scope: str = None, **kwargs):
+        super().__init__(**kwargs)
+        if session is not None:
+            self._session = session
+        self._scope = scope
+
+    def _run(self, query: str, top_k: int = 20) -> str:
         try:
-            response = client.search(index=index_name, body=search_query)
-            results = response["hits"]["hits"]
-
-            formatted = []
-            for i, hit in enumerate(results):
-                source = hit["_source"]
-                formatted.append(
-                    f"{i+1}. File: {source.get('source_file')} | Chunk: {source.get('chunk_index')}\n"
-                    f"   Text: {source.get('text', '')[:300]}...\n"
-                )
-            return "\n".join(formatted)
+            with span("crew.tool.search_patent_chunks"):
+                return self._session.search(query, top_k, scope=self._scope)
         except Exception as e:
             return f"Error searching chunks: {str(e)}"
 
@@ -69,23 +91,41 @@ class SummarizeChunkTrendsTool(BaseTool):
     description: str = "Summarize patterns and innovations in chatbot/healthcare patent chunks"
 
     def _run(self, data: str) -> str:
-        return f"Chunk-based insight summary:\n\n{data[:1000]}..."
+        with span("crew.tool.summarize_patent_chunks"):
+            return f"Chunk-based insight summary:\n\n{data[:1000]}..."
+
 
+def create_patent_analysis_crew(
+    model_name="llama3",
+    retrieval_mode=RETRIEVAL_MODE,
+    session=None,
+    use_llm_cache=True,
+    on_event=None,
+):
+    emit = on_event or (lambda event: None)
 
-def create_patent_analysis_crew(model_name="llama3"):
+    emit({"type": "status", "text": "Checking Ollama..."})
     available_models = check_ollama_availability()
     if not available_models:
         raise RuntimeError("Ollama is not running or no models found.")
 
-    if not test_model(model_name):
-        raise RuntimeError(f"Model {model_name} failed basic test.")
+    # Metadata probe instead of a test generation, which could cold-load the model
+    if not probe_model(model_name):
+        raise RuntimeError(f"Model {model_name} is not available in Ollama (try: ollama pull {model_name}).")
 
-    if not model_name.startswith("ollama/"):
-        model_name = f"ollama/{model_name}"
+    if OLLAMA_WARMUP:
+        emit({"type": "status", "text": f"Loading {model_name}..."})
+        warm_model(model_name)
+
+    llm = _ollama_llm(model_name, use_llm_cache, on_event)
 
-    llm = OllamaLLM(model=model_name, temperature=0.2)
+    # One retrieval session per crew run, shared by all agents and tasks; each
+    # agent (for delegated work) and task gets its own tools, so chunk
+    # dedup only elides text that is already in that prompt
+    session = session or RetrievalSession(retrieval_mode)
 
-    tools = [SearchPatentChunksTool(), SummarizeChunkTrendsTool()]
+    def tools(scope):
+        return [SearchPatentChunksTool(session=session, scope=scope), SummarizeChunkTrendsTool()]
 
     # Updated agent roles for chatbot and virtual assistant patents
     lead_analyst = Agent(
@@ -95,7 +135,7 @@ def create_patent_analysis_crew(model_name="llama3"):
         verbose=True,
         allow_delegation=True,
         llm=llm,
-        tools=tools,
+        tools=tools("lead_analyst"),
     )
 
     document_reviewer = Agent(
@@ -105,7 +145,7 @@ def create_patent_analysis_crew(model_name="llama3"):
         verbose=True,
         allow_delegation=False,
         llm=llm,
-        tools=tools,
+        tools=tools("document_reviewer"),
     )
 
     trend_analyst = Agent(
@@ -115,7 +155,7 @@ def create_patent_analysis_crew(model_name="llama3"):
         verbose=True,
         allow_delegation=False,
         llm=llm,
-        tools=tools,
+        tools=tools("trend_analyst"),
     )
 
     task1 = Task(
@@ -126,6 +166,7 @@ def create_patent_analysis_crew(model_name="llama3"):
         """,
         expected_output="A research plan with analysis goals and chunk grouping strategy.",
         agent=lead_analyst,
+        tools=tools("plan"),
     )
 
     task2 = Task(
@@ -136,6 +177,7 @@ def create_patent_analysis_crew(model_name="llama3"):
         """,
         expected_output="List of grouped chunks with brief taglines and source file info.",
         agent=document_reviewer,
+        tools=tools("gather"),
         dependencies=[task1],
     )
 
@@ -149,6 +191,7 @@ def create_patent_analysis_crew(model_name="llama3"):
         """,
         expected_output="Innovation pattern summary with 3–5 bullet point trends.",
         agent=trend_analyst,
+        tools=tools("trends"),
         dependencies=[task2],
     )
 
@@ -157,35 +200,105 @@ def create_patent_analysis_crew(model_name="llama3"):
         tasks=[task1, task2, task3],
         verbose=True,
         process=Process.sequential,
-        cache=False,
+        cache=True,
+        step_callback=(lambda step: on_event(step_event(step))) if on_event else None,
+        task_callback=(lambda output: on_event(task_event(output))) if on_event else None,
     )
 
 
-def run_patent_analysis(research_area="Chatbots", model_name="llama3"):
-    try:
-        crew = create_patent_analysis_crew(model_name)
-        result = crew.kickoff(inputs={"research_area": research_area})
+def run_patent_analysis(
+    research_area="Chatbots",
+    model_name="llama3",
+    retrieval_mode=RETRIEVAL_MODE,
+    use_llm_cache=True,
+    on_event=None,
+    report_path=None,
+):
+    """
+    Run the crew and return the final analysis text.
+
+    Args:
+        on_event (callable): Called from the crew's thread with each
+            progress event (see ``Agent.crew_ai.streaming``) as it happens.
+        report_path (str): If set, the report is written to this file
+            incrementally while the crew runs.
+    """
+    writer = ReportWriter(report_path, research_area, model_name) if report_path else None
+    sinks = [sink for sink in (on_event, writer) if sink]
+
+    def emit(event):
+        for sink in sinks:
+            sink(event)
+
+    # Spans from every component during the run go to one trace file
+    with trace_run("crew_analysis"):
+        try:
+            session = RetrievalSession(retrieval_mode)
+            with span("crew.startup"):
+                crew = create_patent_analysis_crew(
+                    model_name,
+                    session=session,
+                    use_llm_cache=use_llm_cache,
+                    on_event=emit if sinks else None,
+                )
+            emit({"type": "status", "text": "Running crew..."})
+            with span("crew.kickoff"):
+                result = crew.kickoff(inputs={"research_area": research_area})
+            print(f" Retrieval stats: {session.stats()}")
+            llm_cache = get_llm_cache(use_llm_cache)
+            if llm_cache is not None:
+                print(f" LLM cache stats: {llm_cache.stats()}")
+
+            if hasattr(result, "output"):
+                result = result.output
+            elif hasattr(result, "result"):
+                result = result.result
+            result = str(result)
+            emit({"type": "result", "text": result})
+            return result
 
-        if hasattr(result, "output"):
-            return result.output
-        elif hasattr(result, "result"):
-            return result.result
-        return str(result)
+        except Exception as e:
+            message = f"❌ Analysis failed: {str(e)}\nMake sure Ollama is running and PDFs were ingested."
+            emit({"type": "error", "text": message})
+            return message
 
-    except Exception as e:
-        return f"❌ Analysis failed: {str(e)}\nMake sure Ollama is running and PDFs were ingested."
+        finally:
+            if writer:
+                writer.close()
+
+
+def stream_patent_analysis(research_area="Chatbots", model_name="llama3", **kwargs):
+    """
+    Iterator over the progress events of ``run_patent_analysis``.
+
+    The crew runs in a background thread; events are yielded on the
+    caller's thread (as Streamlit requires), ending with a ``result`` or
+    ``error`` event. Extra keyword arguments go to ``run_patent_analysis``.
+    """
+    events = queue.Queue()
+    done = object()
+
+    def run():
+        try:
+            run_patent_analysis(research_area, model_name, on_event=events.put, **kwargs)
+        finally:
+            events.put(done)
+
+    threading.Thread(target=run, name="patent-crew", daemon=True).start()
+    while True:
+        event = events.get()
+        if event is done:
+            return
+        yield event
 
 
 if __name__ == "__main__":
     research_area = input("Enter research area (default: Chatbots): ") or "Chatbots"
     model_name = input("Enter Ollama model to use(defaults: llama3) : ") or "llama3"
 
-    result = run_patent_analysis(research_area, model_name)
-
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"chatbot_patent_analysis_{timestamp}.txt"
 
-    with open(filename, "w") as f:
-        f.write(result)
+    run_patent_analysis(research_area, model_name, on_event=print_event, report_path=filename)
 
     print(f"\n📄 Analysis complete! Results saved to {filename}")
@@ -0,0 +1,122 @@
+import os
+import re
+import threading
+
+from Agent.tools.result_cache import PartialResults
+from Agent.tools.search_tools import diverse_search, hybrid_search, keyword_search, semantic_search
+
+RETRIEVAL_MODE = os.getenv("CREW_RETRIEVAL_MODE", "keyword")
+SNIPPET_CHARS = 300
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = {
+    "a", "an", "and", "any", "are", "about", "by", "find", "for", "from", "in",
+    "is", "look", "of", "on", "or", "patent", "patents", "related", "search",
+    "show", "that", "the", "to", "using", "with",
+}
+
+SEARCH_FUNCTIONS = {
+    "keyword": keyword_search,
+    "semantic": semantic_search,
+    "hybrid": hybrid_search,
+    "diverse": diverse_search,
+}
+
+
+def _stem(token):
+    # Just enough to fold plurals ("chatbots" / "chatbot"); no stemmer dependency
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def normalize_agent_query(query: str) -> str:
+    """
+    Reduce an agent's query to a canonical key so repeats and near-identical
+    rewordings (case, punctuation, word order, plurals, filler words) match.
+    """
+    tokens = {_stem(token) for token in _TOKEN_RE.findall(query.casefold())}
+    key = " ".join(sorted(tokens - _STOPWORDS))
+    return key or " ".join(query.casefold().split())
+
+
+def hit_id(hit) -> str:
+    source = hit.get("_source", {})
+    return hit.get("_id") or f"{source.get('source_file')}::{source.get('chunk_index')}"
+
+
+class RetrievalSession:
+    """
+    Retrieval state shared by every agent and task of one crew run.
+
+    Results are cached per normalized query for the whole run, except empty
+    ones (the search functions also return [] when a request fails) and
+    ``PartialResults``, so a retry can recover. Chunks are deduplicated per
+    ``scope`` (an agent or task): only text that is already in that scope's
+    own prompt is referenced by id instead of being sent again, since agents
+    do not see each other's tool output.
+    """
+
+    def __init__(self, mode: str = RETRIEVAL_MODE):
+        if mode not in SEARCH_FUNCTIONS:
+            raise ValueError(f"mode must be one of {sorted(SEARCH_FUNCTIONS)}, got '{mode}'")
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._results = {}
+        self._shown = {}
+        self.searches = 0
+        self.cache_hits = 0
+        self.chunks_deduplicated = 0
+
+    def search(self, query: str, top_k: int = 20, scope: str = None) -> str:
+        """
+        Return search results for ``query`` formatted for the prompt of ``scope``.
+        """
+        key = (normalize_agent_query(query), top_k)
+        with self._lock:
+            hits = self._results.get(key)
+            if hits is not None:
+                self.cache_hits += 1
+                shown = self._shown.get(scope, set())
+                if all(hit_id(hit) in shown for hit in hits):
+                    ids = ", ".join(hit_id(hit) for hit in hits)
+                    return f"This search was already run in this session; see chunks {ids} above."
+                # Run by another agent or task: its prompt does not have the text
+                return self._format(hits, scope)
+
+        hits = SEARCH_FUNCTIONS[self.mode](query, top_k)
+
+        with self._lock:
+            self.searches += 1
+            if hits and not isinstance(hits, PartialResults):
+                self._results[key] = hits
+            return self._format(hits, scope)
+
+    def _format(self, hits, scope):
+        shown = self._shown.setdefault(scope, set())
+        formatted = []
+        for i, hit in enumerate(hits):
+            source = hit["_source"]
+            chunk = hit_id(hit)
+            if chunk in shown:
+                self.chunks_deduplicated += 1
+                formatted.append(f"{i+1}. [{chunk}] (already shown above)\n")
+                continue
+            shown.add(chunk)
+            formatted.append(
+                f"{i+1}. [{chunk}] File: {source.get('source_file')} | Chunk: {source.get('chunk_index')}\n"
+                f"   Text: {source.get('text', '')[:SNIPPET_CHARS]}...\n"
+            )
+        return "\n".join(formatted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "searches": self.searches,
+                "cache_hits": self.cache_hits,
+                "chunks_shown": len(set().union(*self._shown.values())),
+                "chunks_deduplicated": self.chunks_deduplicated,
+            }
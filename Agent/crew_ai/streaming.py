@@ -0,0 +1,80 @@
+import os
+import threading
+from datetime import datetime
+
+# Events are plain dicts with a "type" and a "text":
+#   status  - startup progress ("Checking Ollama...")
+#   token   - one LLM token as it is generated
+#   step    - an agent step (thought, tool call or tool result)
+#   task    - a finished task's output, with its "agent"
+#   result  - the final analysis, always the last event
+#   error   - the run failed; "text" is the message shown to the user
+
+
+def token_event(chunk: str) -> dict:
+    return {"type": "token", "text": chunk}
+
+
+def step_event(step) -> dict:
+    # CrewAI passes AgentAction/AgentFinish objects or (action, observation) lists
+    text = getattr(step, "log", None) or getattr(step, "output", None) or str(step)
+    return {"type": "step", "text": str(text)}
+
+
+def task_event(output) -> dict:
+    text = getattr(output, "raw", None) or getattr(output, "exported_output", None) or str(output)
+    return {"type": "task", "agent": str(getattr(output, "agent", "") or ""), "text": str(text)}
+
+
+class ReportWriter:
+    """
+    Event sink that writes the report to disk while the analysis runs.
+
+    Each finished task is appended and flushed as soon as its event arrives,
+    so a partial report survives a long or interrupted run; the final
+    result is appended last.
+    """
+
+    def __init__(self, path: str, research_area: str, model_name: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+        self._tasks = 0
+        self._write(
+            f"Patent analysis: {research_area} (model: {model_name})\n"
+            f"Started: {datetime.now().isoformat(timespec='seconds')}\n\n"
+        )
+
+    def _write(self, text):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(text)
+                self._file.flush()
+
+    def __call__(self, event: dict):
+        if event["type"] == "task":
+            self._tasks += 1
+            header = f"## Task {self._tasks}" + (f" ({event['agent']})" if event.get("agent") else "")
+            self._write(f"{header}\n\n{event['text']}\n\n")
+        elif event["type"] in ("result", "error"):
+            self._write(f"## Final result\n\n{event['text']}\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def print_event(event: dict):
+    """
+    Render an event in the terminal, printing tokens inline as they arrive.
+    """
+    if event["type"] == "token":
+        print(event["text"], end="", flush=True)
+    elif event["type"] == "status":
+        print(f"\n⏳ {event['text']}", flush=True)
+    elif event["type"] == "task":
+        agent = f" ({event['agent']})" if event.get("agent") else ""
+        print(f"\n\n✅ Task finished{agent}\n", flush=True)
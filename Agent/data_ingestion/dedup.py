@@ -0,0 +1,195 @@
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+
+DEDUP_ENABLED = os.getenv("DEDUP", "1") != "0"
+# Estimated Jaccard similarity of word shingles above which chunks are duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_SHINGLE = int(os.getenv("DEDUP_SHINGLE", "5"))
+# "file": duplicates only within a file; "corpus": across all files of a run
+DEDUP_SCOPE = os.getenv("DEDUP_SCOPE", "file")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def shingle_hashes(text: str, k: int = DEDUP_SHINGLE) -> np.ndarray:
+    """
+    32-bit hashes of the word k-grams of ``text`` (lower-cased, punctuation dropped).
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) <= k:
+        grams = [" ".join(tokens)]
+    else:
+        grams = {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+    digests = (hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest() for gram in grams)
+    return np.array([int.from_bytes(d, "little") for d in digests], dtype="uint64")
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple:
+    """
+    (bands, rows) with bands * rows <= num_perm whose S-curve midpoint
+    (1 / bands) ** (1 / rows) is closest to ``threshold``.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """
+    MinHash signatures from ``num_perm`` universal hash functions
+    ``(a * x + b) mod (2**61 - 1)``, evaluated for all shingles at once.
+    """
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        # a, b < 2**32 and x < 2**32 keep a * x + b inside uint64
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype="uint64")
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype="uint64")
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        values = (np.outer(hashes, self.a) + self.b) % _PRIME & _MAX_HASH
+        return values.min(axis=0).astype("uint32")
+
+
+def _key(chunk: dict) -> tuple:
+    return chunk["source_file"], chunk["chunk_index"]
+
+
+def normalized_hash(text: str) -> str:
+    return hashlib.sha1(" ".join(_TOKEN_RE.findall(text.lower())).encode("utf-8")).hexdigest()
+
+
+class ChunkDeduplicator:
+    """
+    Exact and near-duplicate detection for chunks ahead of embedding.
+
+    Chunks are first matched on a hash of their normalized text, then by
+    MinHash/LSH: candidates sharing an LSH band are confirmed when their
+    estimated Jaccard similarity reaches ``threshold``. The first chunk of
+    a group is kept and indexed; later ones are dropped, and the kept chunk
+    gets a ``locations`` list of every {"source_file", "chunk_index"} it
+    stands for, its own first.
+
+    A canonical chunk can gain locations after it has been indexed; see
+    ``mark_indexed`` and ``pending_updates``.
+
+    Args:
+        threshold (float): Minimum estimated Jaccard similarity.
+        num_perm (int): MinHash permutations.
+        scope (str): "file" resets the tables at each ``end_file``;
+            "corpus" matches across every file of the run.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = DEDUP_NUM_PERM,
+        scope: str = DEDUP_SCOPE,
+    ):
+        if scope not in ("file", "corpus"):
+            raise ValueError(f"Unknown dedup scope '{scope}'. Use 'file' or 'corpus'.")
+        self.threshold = threshold
+        self.scope = scope
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._lock = threading.Lock()
+        self._grown = {}
+        self._indexed = {}
+        self.stats = {"chunks": 0, "exact": 0, "near": 0, "bytes_saved": 0}
+        self._reset_tables()
+
+    def _reset_tables(self):
+        self._exact = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = []
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    def check(self, chunk: dict) -> bool:
+        """
+        Register a chunk; return True if it duplicates one already seen.
+        """
+        text = chunk["text"]
+        location = {"source_file": chunk["source_file"], "chunk_index": chunk["chunk_index"]}
+        self.stats["chunks"] += 1
+
+        digest = normalized_hash(text)
+        canonical = self._exact.get(digest)
+        kind = "exact"
+
+        if canonical is None:
+            signature = self.hasher.signature(shingle_hashes(text))
+            keys = self._band_keys(signature)
+            candidates = {idx for band, key in zip(self._buckets, keys) for idx in band.get(key, ())}
+            for idx in sorted(candidates):
+                other_signature, other = self._signatures[idx]
+                if np.mean(other_signature == signature) >= self.threshold:
+                    canonical, kind = other, "near"
+                    break
+
+        if canonical is None:
+            idx = len(self._signatures)
+            self._signatures.append((signature, chunk))
+            for band, key in zip(self._buckets, keys):
+                band.setdefault(key, []).append(idx)
+            self._exact[digest] = chunk
+            return False
+
+        with self._lock:
+            # Rebind rather than append: the indexer may be serializing the old list
+            own = {"source_file": canonical["source_file"], "chunk_index": canonical["chunk_index"]}
+            canonical["locations"] = canonical.get("locations", [own]) + [location]
+            self._grown[_key(canonical)] = canonical
+        self.stats[kind] += 1
+        self.stats["bytes_saved"] += len(text.encode("utf-8"))
+        return True
+
+    def end_file(self):
+        if self.scope == "file":
+            self._reset_tables()
+
+    def mark_indexed(self, chunks):
+        """
+        Record how many locations each chunk had when it was sent to the index.
+        """
+        with self._lock:
+            for chunk in chunks:
+                self._indexed[_key(chunk)] = len(chunk.get("locations") or ())
+
+    def pending_updates(self) -> list:
+        """
+        Indexed canonical chunks that have gained locations since.
+        """
+        with self._lock:
+            return [
+                chunk
+                for key, chunk in self._grown.items()
+                if key in self._indexed and len(chunk["locations"]) > self._indexed[key]
+            ]
+
+    def forget(self, source_file):
+        """
+        Drop the bookkeeping for a file whose chunks can gain no more
+        locations (its ``end_file`` has passed in "file" scope).
+        """
+        with self._lock:
+            self._grown = {key: chunk for key, chunk in self._grown.items() if key[0] != source_file}
+            self._indexed = {key: count for key, count in self._indexed.items() if key[0] != source_file}
+
+    @property
+    def duplicates(self) -> int:
+        return self.stats["exact"] + self.stats["near"]
@@ -1,9 +1,13 @@
 import os
+import sys
+from contextlib import contextmanager
+from opensearchpy.helpers import streaming_bulk
 from langchain.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-from Agent.vectors.embedding import get_embedding
-from Agent.search_client.opensearch_client import create_index_if_not_exists, get_opensearch_client
+from Agent.metrics.instrumentation import increment, timed, trace_run
+from Agent.vectors.embedding import embed_many
+from Agent.search_client.generation import bump_index_generation
 
 
 def load_chunks_from_pdfs(pdf_dir):
@@ -29,54 +33,178 @@ def load_chunks_from_pdfs(pdf_dir):
             docs = loader.load()
             split_docs = text_splitter.split_documents(docs)
 
+            file_chunks = []
             for idx, chunk in enumerate(split_docs):
                 text = chunk.page_content.strip()
                 if not text:
                     continue
-
-                try:
-                    embedding = get_embedding(text)
-                except Exception as e:
-                    print(f" Skipping chunk due to embedding error: {e}")
-                    continue
-
-                chunks.append({
+                file_chunks.append({
                     "source_file": filename,
                     "chunk_index": idx,
                     "text": text,
-                    "embedding": embedding
                 })
 
+            try:
+                embeddings = embed_many([chunk["text"] for chunk in file_chunks])
+            except Exception as e:
+                print(f" Skipping '{filename}' due to embedding error: {e}")
+                continue
+
+            for chunk, embedding in zip(file_chunks, embeddings):
+                chunk["embedding"] = embedding
+            chunks.extend(file_chunks)
+
     return chunks
 
 
-def index_chunks(client, index_name, chunks):
+def chunk_id(chunk):
+    """
+    Stable document id for a chunk, so re-indexing overwrites instead of duplicating.
+    """
+    return f"{chunk['source_file']}::{chunk['chunk_index']}"
+
+
+def _bulk_actions(index_name, chunks):
+    for chunk in chunks:
+        yield {"_index": index_name, "_id": chunk_id(chunk), "_source": chunk}
+
+
+@contextmanager
+def refresh_disabled(client, index_name):
+    """
+    Disable index refresh for the duration of a bulk load, then restore
+    the previous refresh_interval and refresh once.
+    """
+    settings = client.indices.get_settings(index=index_name, name="index.refresh_interval")
+    refresh_interval = (
+        settings.get(index_name, {}).get("settings", {}).get("index", {}).get("refresh_interval")
+    )
+    client.indices.put_settings(index=index_name, body={"index": {"refresh_interval": "-1"}})
+    try:
+        yield
+    finally:
+        # None resets the setting to the index default
+        client.indices.put_settings(
+            index=index_name, body={"index": {"refresh_interval": refresh_interval}}
+        )
+        client.indices.refresh(index=index_name)
+        bump_index_generation(index_name)
+
+
+@timed("index.opensearch_bulk")
+def bulk_index_chunks(
+    client,
+    index_name,
+    chunks,
+    chunk_size=500,
+    max_chunk_bytes=10 * 1024 * 1024,
+    max_retries=3,
+):
+    """
+    Stream chunks to OpenSearch with the bulk API.
+
+    Returns:
+        tuple: (number of indexed chunks, list of per-item errors)
+    """
+    indexed = 0
+    errors = []
+    for ok, item in streaming_bulk(
+        client,
+        _bulk_actions(index_name, chunks),
+        chunk_size=chunk_size,
+        max_chunk_bytes=max_chunk_bytes,
+        max_retries=max_retries,
+        raise_on_error=False,
+        raise_on_exception=False,
+    ):
+        if ok:
+            indexed += 1
+        else:
+            errors.append(item)
+    increment("index.chunks", indexed)
+    increment("index.errors", len(errors))
+    return indexed, errors
+
+
+@timed("index.index_chunks")
+def index_chunks(
+    client,
+    index_name,
+    chunks,
+    chunk_size=500,
+    max_chunk_bytes=10 * 1024 * 1024,
+    max_retries=3,
+):
     """
-    Index the PDF chunks into OpenSearch.
+    Bulk index the PDF chunks into OpenSearch.
+
+    Refresh is disabled while loading and restored afterwards. Items rejected
+    by OpenSearch (HTTP 429) are retried with backoff; any other per-item
+    failures are collected and returned.
 
     Args:
         client: OpenSearch client.
         index_name (str): Name of the OpenSearch index.
-        chunks (list): List of chunk dictionaries.
+        chunks (iterable): Chunk dictionaries.
+        chunk_size (int): Maximum number of documents per bulk request.
+        max_chunk_bytes (int): Maximum size in bytes of a bulk request.
+        max_retries (int): Retries for rejected items.
+
+    Returns:
+        tuple: (number of indexed chunks, list of per-item errors)
     """
-    for chunk in chunks:
-        client.index(index=index_name, body=chunk)
-    print(f" Indexed {len(chunks)} chunks into '{index_name}' index.")
+    with refresh_disabled(client, index_name):
+        indexed, errors = bulk_index_chunks(
+            client, index_name, chunks, chunk_size, max_chunk_bytes, max_retries
+        )
+
+    print(f" Indexed {indexed} chunks into '{index_name}' index.")
+    if errors:
+        print(f" {len(errors)} chunks failed to index. First error: {errors[0]}")
+    return indexed, errors
 
 
 if __name__ == "__main__":
     pdf_dir = "D:/LangGraph/GenAI-2/AI-RESEARCH-AGENT/data/patent_pdfs"  
-    index_name = "patent_chunks"
-    host = "localhost"
-    port = 9200
 
-    try:
-        client = get_opensearch_client(host, port)
-        create_index_if_not_exists(client, index_name)
+    # Pass --full to drop the index and re-ingest everything
+    full_rebuild = "--full" in sys.argv
+    # Pass --patents <file.jsonl.gz> to index patents gathered by the collector
+    patents_path = sys.argv[sys.argv.index("--patents") + 1] if "--patents" in sys.argv else None
 
-        chunks = load_chunks_from_pdfs(pdf_dir)
-        print(f" Loaded and embedded {len(chunks)} chunks from PDFs in '{pdf_dir}'")
+    from Agent.data_ingestion.manifest import Manifest
+    from Agent.data_ingestion.pipeline import (
+        Checkpoint,
+        run_incremental,
+        run_patent_pipeline,
+        run_pipeline,
+    )
+    from Agent.search_backends.base import get_search_backend
 
-        index_chunks(client, index_name, chunks)
+    try:
+        with trace_run("ingestion"):
+            backend = get_search_backend()
+            if patents_path:
+                backend.ensure_index()
+                checkpoint = Checkpoint.for_backend(backend, source=os.path.basename(patents_path))
+                run_patent_pipeline(backend, [patents_path], checkpoint=checkpoint)
+            elif full_rebuild:
+                checkpoint = Checkpoint.for_backend(backend)
+                manifest = Manifest.for_backend(backend)
+                if not checkpoint.completed:
+                    backend.ensure_index(recreate=True)
+                    manifest.files = {}
+                    manifest.save()
+
+                run_pipeline(
+                    backend,
+                    pdf_dir,
+                    checkpoint=checkpoint,
+                    on_file_done=lambda filename: manifest.record(pdf_dir, filename),
+                )
+                checkpoint.clear()
+            else:
+                backend.ensure_index()
+                run_incremental(backend, pdf_dir)
     except Exception as e:
         print(f" Error: {e}")
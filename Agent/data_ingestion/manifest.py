@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """
+    Return the sha256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Record of the PDFs currently represented in an index.
+
+    Each entry stores (path, size, mtime, sha256) for one source file, which is
+    enough to tell new, changed and removed files apart without re-reading
+    unchanged ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)
+
+    @staticmethod
+    def for_backend(backend, directory=".cache"):
+        return Manifest(
+            os.path.join(directory, f"manifest_{backend.name}_{backend.index_name}.json")
+        )
+
+    def diff(self, pdf_dir):
+        """
+        Compare the manifest with the PDFs currently in ``pdf_dir``.
+
+        Files whose size and mtime are unchanged are assumed unchanged. Otherwise
+        the content hash decides, so a touched-but-identical file is not reindexed.
+
+        Returns:
+            tuple: (new files, changed files, removed files, unchanged entries
+            whose stat changed but content did not)
+        """
+        new, changed, touched = [], [], {}
+        seen = set()
+
+        for filename in sorted(os.listdir(pdf_dir)):
+            if not filename.endswith(".pdf"):
+                continue
+            seen.add(filename)
+            path = os.path.join(pdf_dir, filename)
+            stat = os.stat(path)
+            entry = self.files.get(filename)
+
+            if entry is None:
+                new.append(filename)
+            elif entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                entry_hash = file_sha256(path)
+                if entry_hash != entry["sha256"]:
+                    changed.append(filename)
+                else:
+                    touched[filename] = self._entry(path, stat, entry_hash)
+
+        removed = [filename for filename in self.files if filename not in seen]
+        return new, changed, removed, touched
+
+    @staticmethod
+    def _entry(path, stat, sha256):
+        return {
+            "path": path,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha256,
+        }
+
+    def record(self, pdf_dir, filename):
+        path = os.path.join(pdf_dir, filename)
+        self.files[filename] = self._entry(path, os.stat(path), file_sha256(path))
+        self.save()
+
+    def remove(self, filenames):
+        for filename in filenames:
+            self.files.pop(filename, None)
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.files, f, indent=2)
+        os.replace(tmp_path, self.path)
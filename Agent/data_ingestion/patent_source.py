@@ -0,0 +1,47 @@
+from langchain.schema import Document
+
+from Agent.collector.patent_store import iter_records
+
+# Record fields indexed, in chunk order
+PATENT_FIELDS = ("abstract", "claims", "description")
+
+
+def _field_text(value) -> str:
+    # SerpAPI gives claims as a list of strings; other fields are plain text
+    if isinstance(value, list):
+        return "\n".join(str(item).strip() for item in value if item)
+    if isinstance(value, dict):
+        return "\n".join(str(item).strip() for item in value.values() if item)
+    return str(value or "").strip()
+
+
+def patent_documents(paths, is_done=None):
+    """
+    Stream collected patents as (source_file, documents) pairs for the
+    ingestion pipeline.
+
+    Records are read one line at a time from the JSONL files written by
+    ``PatentStore``, so memory use does not grow with the file. Each
+    patent becomes one "file" named after its patent id, with a document
+    per non-empty field in PATENT_FIELDS. Ids seen earlier in the stream,
+    or for which ``is_done`` returns True, are skipped.
+
+    Args:
+        paths (list): JSONL files, gzip-compressed or not.
+        is_done (callable): Predicate for patent ids already indexed.
+    """
+    seen = set()
+    for path in paths:
+        for record in iter_records(path):
+            patent_id = record.get("patent_id")
+            if not patent_id or patent_id in seen or (is_done and is_done(patent_id)):
+                continue
+            seen.add(patent_id)
+
+            data = record.get("data") or {}
+            documents = [
+                Document(page_content=text, metadata={"source_file": patent_id})
+                for text in (_field_text(data.get(field)) for field in PATENT_FIELDS)
+                if text
+            ]
+            yield patent_id, documents
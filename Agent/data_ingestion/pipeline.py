@@ -0,0 +1,566 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from langchain.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from Agent.data_ingestion.dedup import DEDUP_ENABLED, DEDUP_SCOPE, ChunkDeduplicator
+from Agent.data_ingestion.manifest import Manifest
+from Agent.data_ingestion.patent_source import patent_documents
+from Agent.metrics.instrumentation import bind_trace, increment
+from Agent.vectors.embedding import embed_many
+from Agent.vectors.reduction import get_embedding_transform
+
+# Seconds between backend flushes; finished files are checkpointed at each flush
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "30"))
+
+_DONE = object()
+
+
+class FileDone:
+    """
+    Marker passed down the pipeline after the last chunk of a file.
+    """
+
+    def __init__(self, source_file, chunk_count):
+        self.source_file = source_file
+        self.chunk_count = chunk_count
+
+
+class Checkpoint:
+    """
+    JSON record of files that have been fully indexed, so an interrupted
+    run can resume without re-processing them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.completed = json.load(f)
+
+    @staticmethod
+    def for_backend(backend, source=None, directory=".cache"):
+        """
+        Checkpoint of one backend and index, like ``Manifest.for_backend``,
+        so runs against another index do not skip files it lacks. ``source``
+        tells apart inputs other than the PDF directory (e.g. a patents file).
+        """
+        name = f"ingestion_checkpoint_{backend.name}_{backend.index_name}"
+        if source:
+            name += f"_{source}"
+        return Checkpoint(os.path.join(directory, f"{name}.json"))
+
+    def is_done(self, source_file):
+        return source_file in self.completed
+
+    def mark_done(self, source_file, chunk_count):
+        self.mark_many([(source_file, chunk_count)])
+
+    def mark_many(self, files):
+        """
+        Record (source_file, chunk_count) pairs with a single rewrite of the
+        file, so checkpointing n small files is not O(n^2).
+        """
+        now = time.time()
+        for source_file, chunk_count in files:
+            self.completed[source_file] = {"chunks": chunk_count, "indexed_at": now}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.completed, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.completed = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _put(q, item, stop):
+    # Block on a full queue, but give up if another stage has failed
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def pdf_documents(pdf_paths):
+    """
+    Yield (source_file, lazily loaded pages) for each PDF.
+    """
+    for path in pdf_paths:
+        yield os.path.basename(path), PyPDFLoader(path).lazy_load()
+
+
+def _parse_stage(documents, out_q, stop):
+    for source_file, pages in documents:
+        for page in pages:
+            if not _put(out_q, (source_file, page), stop):
+                return
+        if not _put(out_q, FileDone(source_file, None), stop):
+            return
+    _put(out_q, _DONE, stop)
+
+
+def _split_stage(in_q, out_q, stop, batch_size, chunk_size, chunk_overlap, dedup=None):
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+    batch = []
+    chunk_index = 0
+
+    while True:
+        item = _get(in_q, stop)
+        if item is _DONE:
+            break
+
+        if isinstance(item, FileDone):
+            if batch and not _put(out_q, batch, stop):
+                return
+            batch = []
+            if not _put(out_q, FileDone(item.source_file, chunk_index), stop):
+                return
+            if dedup is not None:
+                dedup.end_file()
+            chunk_index = 0
+            continue
+
+        source_file, page = item
+        for chunk in text_splitter.split_documents([page]):
+            text = chunk.page_content.strip()
+            idx = chunk_index
+            chunk_index += 1
+            if not text:
+                continue
+            chunk = {"source_file": source_file, "chunk_index": idx, "text": text}
+            if dedup is not None and dedup.check(chunk):
+                continue
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                if not _put(out_q, batch, stop):
+                    return
+                batch = []
+
+    _put(out_q, _DONE, stop)
+
+
+def _embed_stage(in_q, out_q, stop, embed):
+    while True:
+        item = _get(in_q, stop)
+        if item is _DONE:
+            break
+        if isinstance(item, FileDone):
+            if not _put(out_q, item, stop):
+                return
+            continue
+
+        embeddings = embed([chunk["text"] for chunk in item])
+        for chunk, embedding in zip(item, embeddings):
+            chunk["embedding"] = embedding
+        if not _put(out_q, item, stop):
+            return
+
+    _put(out_q, _DONE, stop)
+
+
+def _embedded_items(in_q, stop, backend):
+    """
+    Yield the embed stage's output in order. While the backend's index
+    still needs training, items are held back until ``training_size``
+    vectors have arrived (or the input ends), and the index is trained on
+    them first, so an IVF index learns its lists from many files rather
+    than the first batch.
+    """
+    needed = backend.training_size()
+    held = []
+    sample = 0
+    while True:
+        item = _get(in_q, stop)
+        if item is _DONE:
+            break
+        if not needed:
+            yield item
+            continue
+        held.append(item)
+        if not isinstance(item, FileDone):
+            sample += len(item)
+        if sample >= needed:
+            needed = 0
+            yield from _train(backend, held)
+            held = []
+
+    if held and not stop.is_set():
+        yield from _train(backend, held)
+
+
+def _train(backend, items):
+    batches = [item for item in items if not isinstance(item, FileDone)]
+    if batches:
+        backend.train([chunk["embedding"] for batch in batches for chunk in batch])
+    return items
+
+
+def _failed_sources(chunks, batch_errors):
+    """
+    Source files with at least one chunk among ``batch_errors``.
+
+    Bulk errors carry the document id (``chunk_id``: "<source_file>::<index>");
+    an error without one is charged to every file in the batch.
+    """
+    failed = set()
+    for error in batch_errors:
+        info = next(iter(error.values()), None) if isinstance(error, dict) else None
+        doc_id = info.get("_id") if isinstance(info, dict) else None
+        if not doc_id:
+            return {chunk["source_file"] for chunk in chunks}
+        failed.add(doc_id.rsplit("::", 1)[0])
+    return failed
+
+
+def _run_stage(target, errors, stop, *args):
+    try:
+        target(*args, stop)
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+
+
+def run_documents(
+    backend,
+    documents,
+    checkpoint=None,
+    on_file_done=None,
+    batch_size=64,
+    queue_size=4,
+    chunk_size=500,
+    chunk_overlap=50,
+    dedup=None,
+):
+    """
+    Stream documents through parse -> split -> embed -> index stages.
+
+    Embeddings pass through the fitted EmbeddingTransform, if any, before
+    indexing. Each stage runs in its own thread and hands work to the next through a
+    bounded queue, so at most ``queue_size`` items are buffered between any
+    two stages regardless of corpus size. Files are recorded in the
+    checkpoint once all their chunks are indexed and the backend has
+    flushed them (every INGEST_FLUSH_INTERVAL seconds and at the end); a
+    file with any chunk that failed to index is not, so a resumed run
+    retries it. An index that must be trained first (local "ivfpq") is
+    trained on the first ``training_size`` vectors of the run, across
+    files, before any of them are indexed.
+
+    Unless disabled, exact and near-duplicate chunks are dropped before
+    embedding (see ``ChunkDeduplicator``); the kept chunk lists every
+    location. If it gains locations after being indexed, it is indexed
+    again with the full list before the files they come from are
+    checkpointed: in "file" scope when its file ends, while its vector is
+    still at hand; in "corpus" scope at each flush, re-embedding it (from
+    the embedding cache, normally) if its file has already passed.
+
+    Args:
+        backend (SearchBackend): Backend the chunks are indexed into.
+        documents (iterable): (source_file, iterable of Documents) pairs,
+            consumed lazily by the parse stage.
+        checkpoint (Checkpoint): Resume state; nothing is checkpointed if None.
+        on_file_done (callable): Called with each file name once all its
+            chunks are indexed without errors and flushed.
+        batch_size (int): Chunks per embedding/indexing batch.
+        queue_size (int): Capacity of each inter-stage queue.
+        chunk_size (int): Text splitter chunk size.
+        chunk_overlap (int): Text splitter chunk overlap.
+        dedup (ChunkDeduplicator): Duplicate detector; a default one if
+            DEDUP is on and None is given, False to disable.
+
+    Returns:
+        tuple: (number of indexed chunks, list of per-item errors)
+    """
+    if dedup is None and DEDUP_ENABLED:
+        dedup = ChunkDeduplicator()
+    dedup = dedup or None
+
+    transform = get_embedding_transform()
+
+    def embed(texts):
+        embeddings = embed_many(texts, verbose=False)
+        if transform is not None:
+            embeddings = transform.encode(embeddings, quantize=backend.quantized_vectors)
+        return embeddings
+
+    stop = threading.Event()
+    stage_errors = []
+    parsed_q = queue.Queue(maxsize=queue_size)
+    split_q = queue.Queue(maxsize=queue_size)
+    embedded_q = queue.Queue(maxsize=queue_size)
+
+    threads = [
+        threading.Thread(
+            target=bind_trace(_run_stage),
+            args=(_parse_stage, stage_errors, stop, documents, parsed_q),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=bind_trace(_run_stage),
+            args=(
+                lambda i, o, s: _split_stage(i, o, s, batch_size, chunk_size, chunk_overlap, dedup),
+                stage_errors, stop, parsed_q, split_q,
+            ),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=bind_trace(_run_stage),
+            args=(
+                lambda i, o, s: _embed_stage(i, o, s, embed),
+                stage_errors, stop, split_q, embedded_q,
+            ),
+            daemon=True,
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    indexed = 0
+    files = 0
+    dim = 0
+    errors = []
+    failed_files = set()
+    finished = []
+    # Chunks of the current file; with dedup they keep their vectors until the file ends
+    held = []
+    last_flush = time.monotonic()
+    try:
+        with backend.bulk_load():
+            for item in _embedded_items(embedded_q, stop, backend):
+                if isinstance(item, FileDone):
+                    if dedup is not None:
+                        if dedup.scope == "file":
+                            # Every duplicate of the file has been seen, so its locations are final
+                            _update_locations(backend, dedup, embed)
+                            dedup.forget(item.source_file)
+                        for chunk in held:
+                            chunk.pop("embedding", None)
+                        held.clear()
+                    if item.source_file in failed_files:
+                        # Left out of the checkpoint and the manifest so the next run retries it
+                        print(f" '{item.source_file}' had chunks that failed to index; will retry next run.")
+                        continue
+                    # Checkpointed after the next flush, never ahead of what the backend has persisted
+                    finished.append(item)
+                    print(f" Indexed '{item.source_file}' ({item.chunk_count} chunks)")
+                    files += 1
+                    if time.monotonic() - last_flush >= INGEST_FLUSH_INTERVAL:
+                        if dedup is not None:
+                            _update_locations(backend, dedup, embed)
+                        backend.flush()
+                        _mark_finished(finished, checkpoint, on_file_done)
+                        last_flush = time.monotonic()
+                    continue
+
+                dim = dim or len(item[0]["embedding"])
+                if dedup is not None:
+                    dedup.mark_indexed(item)
+                count, batch_errors = backend.index_chunks(item)
+                indexed += count
+                errors.extend(batch_errors)
+                if batch_errors:
+                    failed_files |= _failed_sources(item, batch_errors)
+                if dedup is not None:
+                    held.extend(item)
+
+            if dedup is not None and not stage_errors:
+                _update_locations(backend, dedup, embed)
+        # bulk_load has flushed on exit
+        _mark_finished(finished, checkpoint, on_file_done)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if stage_errors:
+        raise stage_errors[0]
+
+    elapsed = time.perf_counter() - start
+    print(
+        f" Pipeline indexed {indexed} chunks from {files} files "
+        f"in {elapsed:.1f}s into '{backend.index_name}' ({backend.name})."
+    )
+    if errors:
+        print(f" {len(errors)} chunks failed to index. First error: {errors[0]}")
+    if dedup is not None:
+        _report_dedup(dedup, dim)
+    return indexed, errors
+
+
+def _mark_finished(finished, checkpoint, on_file_done):
+    if checkpoint is not None and finished:
+        checkpoint.mark_many([(item.source_file, item.chunk_count) for item in finished])
+    if on_file_done is not None:
+        for item in finished:
+            on_file_done(item.source_file)
+    finished.clear()
+
+
+def _update_locations(backend, dedup, embed):
+    # Canonical chunks whose duplicates arrived after they were indexed. The split
+    # stage may still add locations, so send (and mark) a snapshot of each list.
+    pending = [dict(chunk) for chunk in dedup.pending_updates()]
+    if not pending:
+        return
+    missing = [chunk for chunk in pending if "embedding" not in chunk]
+    if missing and backend.location_updates_need_vectors:
+        for chunk, embedding in zip(missing, embed([chunk["text"] for chunk in missing])):
+            chunk["embedding"] = embedding
+    updated, errors = backend.update_locations(pending)
+    failed = _failed_sources(pending, errors) if errors else set()
+    # Failed updates stay pending and are retried at the next flush
+    dedup.mark_indexed([chunk for chunk in pending if chunk["source_file"] not in failed])
+    print(f" Updated source locations of {updated} deduplicated chunks.")
+    if errors:
+        print(f" {len(errors)} location updates failed. First error: {errors[0]}")
+
+
+def _report_dedup(dedup, dim):
+    stats = dedup.stats
+    vector_bytes = dedup.duplicates * dim * 4
+    increment("dedup.exact", stats["exact"])
+    increment("dedup.near", stats["near"])
+    increment("dedup.bytes_saved", stats["bytes_saved"] + vector_bytes)
+    if stats["chunks"]:
+        print(
+            f" Dedup ({dedup.scope}, threshold {dedup.threshold}): {dedup.duplicates} of "
+            f"{stats['chunks']} chunks dropped ({stats['exact']} exact, {stats['near']} near); "
+            f"saved {dedup.duplicates} embeddings, {stats['bytes_saved'] / 1e6:.2f} MB of text "
+            f"and {vector_bytes / 1e6:.2f} MB of float32 vectors."
+        )
+
+
+def run_pipeline(backend, pdf_dir, files=None, checkpoint=None, **pipeline_kwargs):
+    """
+    Ingest the PDFs in ``pdf_dir`` with ``run_documents``.
+
+    Files already recorded in the checkpoint are skipped, so an interrupted
+    run resumes where it stopped.
+
+    Args:
+        backend (SearchBackend): Backend the chunks are indexed into.
+        pdf_dir (str): Path to directory containing PDF files.
+        files (list): File names in ``pdf_dir`` to ingest; all PDFs if None.
+        checkpoint (Checkpoint): Resume state; nothing is checkpointed if None.
+        **pipeline_kwargs: Callback, batch, queue and splitter settings
+            passed to ``run_documents``.
+
+    Returns:
+        tuple: (number of indexed chunks, list of per-item errors)
+    """
+    if not os.path.exists(pdf_dir):
+        raise FileNotFoundError(f"'{pdf_dir}' does not exist.")
+
+    if files is None:
+        files = [filename for filename in sorted(os.listdir(pdf_dir)) if filename.endswith(".pdf")]
+    if checkpoint is not None:
+        skipped = sum(1 for filename in files if checkpoint.is_done(filename))
+        files = [filename for filename in files if not checkpoint.is_done(filename)]
+        if skipped:
+            print(f" Resuming from checkpoint: {skipped} files already indexed.")
+    pdf_paths = [os.path.join(pdf_dir, filename) for filename in files]
+
+    return run_documents(backend, pdf_documents(pdf_paths), checkpoint=checkpoint, **pipeline_kwargs)
+
+
+def run_patent_pipeline(backend, paths, checkpoint=None, **pipeline_kwargs):
+    """
+    Ingest collected patents (``PatentStore`` JSONL files) with ``run_documents``.
+
+    Abstract, claims and description are split and indexed like PDF pages,
+    with the patent id as ``source_file``. Records are streamed from disk;
+    patents already in the checkpoint are skipped.
+
+    Returns:
+        tuple: (number of indexed chunks, list of per-item errors)
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"'{path}' does not exist.")
+
+    is_done = checkpoint.is_done if checkpoint is not None else None
+    return run_documents(
+        backend, patent_documents(paths, is_done=is_done), checkpoint=checkpoint, **pipeline_kwargs
+    )
+
+
+def run_incremental(backend, pdf_dir, manifest=None, **pipeline_kwargs):
+    """
+    Bring the index in line with ``pdf_dir`` by processing only the delta.
+
+    New files are indexed, chunks of removed files are deleted, and changed
+    files have their old chunks deleted before being re-indexed. The existing
+    index stays online throughout. The manifest is updated as each file
+    completes without indexing errors, so an interrupted run, or one where
+    some chunks were rejected, picks up the remaining delta next time.
+
+    Duplicates are only dropped within a file: with "corpus" scope a chunk
+    of one file can live on only as a location of another file's chunk,
+    and would vanish when that file is deleted or changed.
+
+    Returns:
+        tuple: (number of indexed chunks, list of per-item errors)
+    """
+    if not os.path.exists(pdf_dir):
+        raise FileNotFoundError(f"'{pdf_dir}' does not exist.")
+
+    dedup = pipeline_kwargs.get("dedup")
+    if dedup and dedup.scope != "file":
+        raise ValueError("Incremental ingestion only supports file-scope dedup.")
+    if dedup is None and DEDUP_ENABLED:
+        if DEDUP_SCOPE != "file":
+            print(f" DEDUP_SCOPE={DEDUP_SCOPE} ignored: incremental ingestion dedups within files only.")
+        pipeline_kwargs["dedup"] = ChunkDeduplicator(scope="file")
+
+    manifest = manifest or Manifest.for_backend(backend)
+    new, changed, removed, touched = manifest.diff(pdf_dir)
+    print(
+        f" Manifest diff: {len(new)} new, {len(changed)} changed, "
+        f"{len(removed)} removed, {len(touched)} touched but unchanged."
+    )
+
+    if touched:
+        manifest.files.update(touched)
+        manifest.save()
+
+    stale = changed + removed
+    if stale:
+        backend.delete_by_source(stale)
+        manifest.remove(removed)
+
+    pending = new + changed
+    if not pending:
+        print(" Index is up to date.")
+        return 0, []
+
+    return run_pipeline(
+        backend,
+        pdf_dir,
+        files=pending,
+        on_file_done=lambda filename: manifest.record(pdf_dir, filename),
+        **pipeline_kwargs,
+    )
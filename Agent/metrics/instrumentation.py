@@ -0,0 +1,313 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+METRICS_ENABLED = os.getenv("METRICS", "1") != "0"
+TRACE_DIR = os.getenv("TRACE_DIR", ".cache/traces")
+
+# Histogram bucket upper bounds in seconds, from cache hits to LLM generations
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+# The Trace of the run in progress; per context, so concurrent runs stay apart
+_trace = contextvars.ContextVar("trace", default=None)
+_last_trace_path = None
+
+
+class _SpanStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class Trace:
+    """
+    Timeline of the spans recorded during one run (a crew analysis or an
+    ingestion), written to a JSON file when the run ends.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self.path = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.events = []
+
+    def add(self, name, start, duration, attrs):
+        event = {
+            "name": name,
+            "start_ms": round(1000 * (start - self._start), 3),
+            "duration_ms": round(1000 * duration, 3),
+            "thread": threading.current_thread().name,
+        }
+        if attrs:
+            event["attrs"] = attrs
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self) -> dict:
+        totals = {}
+        with self._lock:
+            for event in self.events:
+                stats = totals.setdefault(event["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                stats["count"] += 1
+                stats["total_ms"] += event["duration_ms"]
+                stats["max_ms"] = max(stats["max_ms"], event["duration_ms"])
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["total_ms"]))
+
+    def save(self, path: str = None) -> str:
+        if path is None:
+            timestamp = datetime.fromtimestamp(self.started_at).strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(TRACE_DIR, f"{self.name}_{timestamp}.json")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "name": self.name,
+                    "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                    "duration_ms": round(1000 * (time.perf_counter() - self._start), 3),
+                    "summary": self.summary(),
+                    "events": events,
+                },
+                f,
+                indent=2,
+            )
+        self.path = path
+        return path
+
+
+def record_span(name: str, start: float, duration: float, attrs: dict = None):
+    """
+    Record a finished span; ``start`` is a ``time.perf_counter()`` value.
+    """
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = _SpanStats()
+        stats.add(duration)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(name, start, duration, attrs)
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+            increment(f"{self.name}.errors")
+        record_span(self.name, self.start, time.perf_counter() - self.start, self.attrs)
+        return False
+
+
+class _NoopSpan:
+    attrs = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """
+    Context manager timing a block; exceptions are counted and re-raised.
+    Returns a shared no-op object when metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, attrs)
+
+
+def timed(name: str):
+    """
+    Decorator recording every call of a function (sync or async) as a span.
+    Functions are returned unwrapped when metrics are disabled.
+    """
+
+    def decorator(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _Span(name, {}):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def increment(name: str, value: float = 1):
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def bind_trace(fn):
+    """
+    Wrap ``fn`` to record its spans into the caller's trace when it runs on
+    another thread (pipeline stages, thread pools, ``run_in_executor``),
+    which do not inherit the caller's context.
+    """
+    trace = _trace.get()
+    if trace is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _trace.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _trace.reset(token)
+
+    return wrapper
+
+
+class trace_run:
+    """
+    Context manager collecting a Trace for the duration of a run and saving
+    it on exit. Spans recorded in the same context (including asyncio tasks
+    it starts) and in work handed to other threads through ``bind_trace``
+    are included, so concurrent runs get separate traces.
+    """
+
+    def __init__(self, name: str, path: str = None):
+        self.trace = Trace(name) if METRICS_ENABLED else None
+        self.path = path
+        self._token = None
+
+    def __enter__(self):
+        if self.trace is not None:
+            self._token = _trace.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        global _last_trace_path
+        if self.trace is None:
+            return False
+        _trace.reset(self._token)
+        try:
+            path = _last_trace_path = self.trace.save(self.path)
+            print(f" Trace written to {path}")
+        except OSError as e:
+            print(f" Could not write trace: {e}")
+        return False
+
+
+def last_trace_path():
+    """
+    Path of the most recently written trace file in this process, if any.
+    """
+    return _last_trace_path
+
+
+def snapshot() -> dict:
+    """
+    Aggregated span timings and counters since process start (or ``reset``).
+    """
+    with _lock:
+        spans = {
+            name: {
+                "count": stats.count,
+                "total_ms": 1000 * stats.total,
+                "mean_ms": 1000 * stats.total / stats.count,
+                "max_ms": 1000 * stats.max,
+            }
+            for name, stats in _spans.items()
+        }
+        counters = dict(_counters)
+    return {"enabled": METRICS_ENABLED, "spans": spans, "counters": counters}
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """
+    Render spans as a histogram and counters as a counter family in the
+    Prometheus text exposition format.
+    """
+    with _lock:
+        spans = {name: (stats.count, stats.total, list(stats.buckets)) for name, stats in _spans.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP agent_span_duration_seconds Duration of instrumented operations.",
+        "# TYPE agent_span_duration_seconds histogram",
+    ]
+    for name in sorted(spans):
+        count, total, buckets = spans[name]
+        label = _label(name)
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            lines.append(f'agent_span_duration_seconds_bucket{{span="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'agent_span_duration_seconds_bucket{{span="{label}",le="+Inf"}} {count}')
+        lines.append(f'agent_span_duration_seconds_sum{{span="{label}"}} {total}')
+        lines.append(f'agent_span_duration_seconds_count{{span="{label}"}} {count}')
+
+    lines.append("# HELP agent_events_total Instrumented event counters.")
+    lines.append("# TYPE agent_events_total counter")
+    for name in sorted(counters):
+        lines.append(f'agent_events_total{{name="{_label(name)}"}} {counters[name]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,27 @@
+from litellm.integrations.custom_logger import CustomLogger
+
+from Agent.metrics.instrumentation import increment
+
+
+def _usage_value(usage, name):
+    if isinstance(usage, dict):
+        return usage.get(name) or 0
+    return getattr(usage, name, None) or 0
+
+
+class LLMMetricsLogger(CustomLogger):
+    """
+    litellm callback counting the prompt and completion tokens of every
+    completion crewAI makes, and failed completions. Call timing and time
+    to first token are recorded by ``CrewLLM``.
+    """
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        usage = response_obj.get("usage") if isinstance(response_obj, dict) else getattr(response_obj, "usage", None)
+        if usage is None:
+            return
+        increment("llm.prompt_tokens", _usage_value(usage, "prompt_tokens"))
+        increment("llm.completion_tokens", _usage_value(usage, "completion_tokens"))
+
+    def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+        increment("llm.errors")
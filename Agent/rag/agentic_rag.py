@@ -1,11 +1,16 @@
 import os
 from datetime import datetime
-import requests
 from dotenv import load_dotenv
 
-from Agent.search_client.opensearch_client import get_opensearch_client
-from Agent.crew_ai.patent_crew import run_patent_analysis
-from Agent.tools.search_tools import hybrid_search, iterative_search, semantic_search, keyword_search
+from Agent.metrics.server import start_metrics_server
+from Agent.search_backends.base import get_search_backend
+from Agent.tools.search_tools import (
+    diverse_search,
+    hybrid_search,
+    iterative_search,
+    keyword_search,
+    semantic_search,
+)
 
 
 def display_menu():
@@ -26,14 +31,16 @@ def run_complete_analysis():
     research_area = input("Enter research area (default: Chatbots): ") or "Chatbots"
     model_name = input("Enter Ollama model to use (default: llama3): ") or "llama3"
     try:
-        result = run_patent_analysis(research_area, model_name)
-        if not isinstance(result, str):
-            result = str(result)
+        from Agent.crew_ai.patent_crew import run_patent_analysis
+        from Agent.crew_ai.streaming import print_event
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"chatbot_analysis_{timestamp}.txt"
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(result)
+        # Tokens are printed as they are generated and the report file is
+        # written while the crew runs
+        result = run_patent_analysis(
+            research_area, model_name, on_event=print_event, report_path=filename
+        )
 
         print(f"\n✅ Analysis complete! Results saved to {filename}")
         print("\n" + "=" * 60)
@@ -51,13 +58,15 @@ def search_patents():
         print("Search query cannot be empty.")
         return
 
-    search_type = input("Choose search type (1=Keyword, 2=Semantic, 3=Hybrid) [3]: ") or "3"
+    search_type = input("Choose search type (1=Keyword, 2=Semantic, 3=Hybrid, 4=Diverse) [3]: ") or "3"
 
     try:
         if search_type == "1":
             results = keyword_search(query)
         elif search_type == "2":
             results = semantic_search(query)
+        elif search_type == "4":
+            results = diverse_search(query)
         else:
             results = hybrid_search(query)
 
@@ -100,23 +109,19 @@ def check_system_status():
     print("\n🛠 SYSTEM STATUS CHECK")
 
     try:
-        client = get_opensearch_client("localhost", 9200)
-        indices = client.cat.indices(format="json")
-        print("✅ OpenSearch OK | Indices:")
-        for idx in indices:
-            print(f"  - {idx['index']}: {idx['docs.count']} docs")
+        backend = get_search_backend()
+        print(f"✅ Search backend OK ({backend.name}) | Index:")
+        print(f"  - {backend.index_name}: {backend.count()} docs")
     except Exception as e:
-        print(f"❌ OpenSearch failed: {e}")
+        print(f"❌ Search backend failed: {e}")
 
-    try:
-        res = requests.get("http://localhost:11434/api/tags")
-        if res.status_code == 200:
-            models = res.json().get("models", [])
-            print(f"✅ Ollama OK | Models: {', '.join(m['name'] for m in models)}")
-        else:
-            print(f"❌ Ollama failed with status: {res.status_code}")
-    except Exception as e:
-        print(f"❌ Ollama check failed: {e}")
+    from Agent.crew_ai.ollama_status import list_ollama_models
+
+    models = list_ollama_models(force=True)
+    if models:
+        print(f"✅ Ollama OK | Models: {', '.join(models)}")
+    else:
+        print("❌ Ollama check failed: not running or no models found")
 
     try:
         from Agent.vectors.embedding import get_embedding
@@ -128,6 +133,7 @@ def check_system_status():
 
 def main():
     load_dotenv()
+    start_metrics_server()
     while True:
         choice = display_menu()
         if choice == "1":
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+
+from Agent.metrics.instrumentation import bind_trace
+from Agent.search_client.opensearch_client import OPENSEARCH_INDEX
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "opensearch")
+
+SOURCE_FIELDS = ["source_file", "text", "chunk_index", "locations"]
+
+
+class SearchBackend:
+    """
+    Storage and retrieval interface behind ``search_tools`` and ingestion.
+
+    Every query method returns OpenSearch-shaped hits:
+    ``{"_id", "_score", "_source": {"source_file", "chunk_index", "text"}}``,
+    plus ``locations`` for chunks that stand for duplicates elsewhere.
+    """
+
+    name = "base"
+    # Whether the index stores int8/binary vectors from EmbeddingTransform
+    # quantization, or only the (reduced) float vectors
+    quantized_vectors = False
+    # Whether ``update_locations`` re-indexes whole chunks, embedding included
+    location_updates_need_vectors = True
+
+    def __init__(self, index_name: str):
+        self.index_name = index_name
+
+    def ensure_index(self, recreate: bool = False):
+        """
+        Create the index if missing; drop and recreate it if ``recreate``.
+        """
+        raise NotImplementedError
+
+    def keyword(self, query_text: str, size: int) -> list:
+        """
+        Lexical (BM25) search.
+        """
+        raise NotImplementedError
+
+    def vector(self, vector: list, size: int) -> list:
+        """
+        Nearest-neighbour search for an embedding vector.
+        """
+        raise NotImplementedError
+
+    def multi_search(self, searches: list, chunk_size: int = 50) -> list:
+        """
+        Run several searches at once.
+
+        Args:
+            searches (list): ("keyword", query_text, size) or
+                ("vector", vector, size) tuples.
+            chunk_size (int): Maximum searches per backend request.
+
+        Returns:
+            list: One entry per search, in order: its hits, or the exception
+            it raised.
+        """
+        results = []
+        for kind, query, size in searches:
+            try:
+                if kind == "keyword":
+                    results.append(self.keyword(query, size))
+                else:
+                    results.append(self.vector(query, size))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def async_keyword(self, query_text: str, size: int) -> list:
+        """
+        Async ``keyword``; runs the sync call in a worker thread unless overridden.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, bind_trace(self.keyword), query_text, size)
+
+    async def async_vector(self, vector: list, size: int) -> list:
+        """
+        Async ``vector``; runs the sync call in a worker thread unless overridden.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, bind_trace(self.vector), vector, size)
+
+    def training_size(self) -> int:
+        """
+        Number of sample vectors the index needs to be trained on before
+        anything can be indexed; 0 if it is ready.
+        """
+        return 0
+
+    def train(self, vectors):
+        """
+        Train the index on sample vectors (see ``training_size``).
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def bulk_load(self):
+        """
+        Wrap a series of ``index_chunks`` calls, e.g. to defer refreshes.
+        """
+        yield
+
+    def index_chunks(self, chunks) -> tuple:
+        """
+        Index chunk dicts carrying an ``embedding``.
+
+        Returns:
+            tuple: (number of indexed chunks, list of per-item errors)
+        """
+        raise NotImplementedError
+
+    def update_locations(self, chunks) -> tuple:
+        """
+        Replace the ``locations`` of already indexed chunks.
+
+        By default the chunks, which then must carry their ``embedding``, are
+        indexed again in full: a partial update of a document whose
+        ``_source`` leaves out the vector would drop it from the index.
+
+        Returns:
+            tuple: (number of updated chunks, list of per-item errors)
+        """
+        return self.index_chunks(chunks)
+
+    def flush(self):
+        """
+        Make every chunk indexed so far durable. Ingestion calls this before
+        checkpointing files, so a checkpointed file survives a crash.
+        """
+
+    def delete_by_source(self, source_files: list) -> int:
+        """
+        Delete every chunk whose source_file is in ``source_files``.
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """
+        Number of indexed chunks.
+        """
+        raise NotImplementedError
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_search_backend(name: str = None, index_name: str = None) -> SearchBackend:
+    """
+    Return the process-wide backend instance.
+
+    ``name`` is "opensearch" or "local" and defaults to the SEARCH_BACKEND
+    environment variable; ``index_name`` defaults to OPENSEARCH_INDEX.
+    """
+    name = name or SEARCH_BACKEND
+    index_name = index_name or OPENSEARCH_INDEX
+    key = (name, index_name)
+
+    backend = _backends.get(key)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                if name == "opensearch":
+                    from Agent.search_backends.opensearch_backend import OpenSearchBackend
+
+                    backend = OpenSearchBackend(index_name)
+                elif name == "local":
+                    from Agent.search_backends.local_backend import LocalBackend
+
+                    backend = LocalBackend(index_name)
+                else:
+                    raise ValueError(f"Unknown search backend '{name}'. Use 'opensearch' or 'local'.")
+                _backends[key] = backend
+    return backend
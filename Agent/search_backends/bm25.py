@@ -0,0 +1,177 @@
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercase word tokenization, close to OpenSearch's standard analyzer.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Persistent BM25 inverted index stored in SQLite.
+
+    Postings, document lengths and document frequencies are kept in tables,
+    so documents can be added and deleted incrementally and nothing has to
+    be loaded into memory to serve a query.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+            CREATE TABLE IF NOT EXISTS doc_lengths (
+                doc_id TEXT PRIMARY KEY,
+                source_file TEXT,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_doc_lengths_source ON doc_lengths (source_file);
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def add(self, docs):
+        """
+        Add or replace documents.
+
+        Args:
+            docs (list): (doc_id, source_file, text) tuples.
+        """
+        with self._lock:
+            self._delete(doc_id for doc_id, _, _ in docs)
+            postings = []
+            lengths = []
+            df = Counter()
+            for doc_id, source_file, text in docs:
+                counts = Counter(tokenize(text))
+                lengths.append((doc_id, source_file, sum(counts.values())))
+                postings.extend((term, doc_id, tf) for term, tf in counts.items())
+                df.update(counts.keys())
+
+            self._conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)", postings
+            )
+            self._conn.executemany(
+                "INSERT INTO doc_lengths (doc_id, source_file, length) VALUES (?, ?, ?)", lengths
+            )
+            self._conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, ?) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                df.items(),
+            )
+            self._conn.commit()
+
+    def delete(self, doc_ids):
+        with self._lock:
+            deleted = self._delete(doc_ids)
+            self._conn.commit()
+            return deleted
+
+    def _delete(self, doc_ids):
+        doc_ids = list(doc_ids)
+        deleted = 0
+        for i in range(0, len(doc_ids), 500):
+            part = doc_ids[i:i + 500]
+            placeholders = ",".join("?" * len(part))
+            self._conn.execute(
+                f"UPDATE terms SET df = df - ("
+                f"SELECT COUNT(*) FROM postings p WHERE p.term = terms.term "
+                f"AND p.doc_id IN ({placeholders})) "
+                f"WHERE term IN (SELECT term FROM postings WHERE doc_id IN ({placeholders}))",
+                part + part,
+            )
+            self._conn.execute(f"DELETE FROM postings WHERE doc_id IN ({placeholders})", part)
+            deleted += self._conn.execute(
+                f"DELETE FROM doc_lengths WHERE doc_id IN ({placeholders})", part
+            ).rowcount
+        self._conn.execute("DELETE FROM terms WHERE df <= 0")
+        return deleted
+
+    def doc_ids_for_sources(self, source_files):
+        source_files = list(source_files)
+        if not source_files:
+            return []
+        placeholders = ",".join("?" * len(source_files))
+        with self._lock:
+            return [
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT doc_id FROM doc_lengths WHERE source_file IN ({placeholders})",
+                    source_files,
+                )
+            ]
+
+    def doc_ids(self) -> list:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT doc_id FROM doc_lengths")]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM doc_lengths").fetchone()[0]
+
+    def search(self, query_text: str, size: int = 20) -> list:
+        """
+        Score documents against the query with Okapi BM25.
+
+        Returns:
+            list: (doc_id, score) tuples, best first.
+        """
+        query_terms = list(dict.fromkeys(tokenize(query_text)))
+        if not query_terms:
+            return []
+
+        placeholders = ",".join("?" * len(query_terms))
+        with self._lock:
+            doc_count, total_length = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM doc_lengths"
+            ).fetchone()
+            if not doc_count:
+                return []
+            dfs = dict(
+                self._conn.execute(
+                    f"SELECT term, df FROM terms WHERE term IN ({placeholders})", query_terms
+                ).fetchall()
+            )
+            rows = self._conn.execute(
+                f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p "
+                f"JOIN doc_lengths d ON d.doc_id = p.doc_id WHERE p.term IN ({placeholders})",
+                query_terms,
+            ).fetchall()
+
+        avg_length = total_length / doc_count
+        idf = {
+            term: math.log(1 + (doc_count - df + 0.5) / (df + 0.5)) for term, df in dfs.items()
+        }
+
+        scores = {}
+        for term, doc_id, tf, length in rows:
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf[term] * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(size, scores.items(), key=lambda item: item[1])
+
+    def close(self):
+        self._conn.close()
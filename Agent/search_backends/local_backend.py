@@ -0,0 +1,259 @@
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+from Agent.metrics.instrumentation import increment, span
+from Agent.search_backends.base import SearchBackend
+from Agent.search_backends.bm25 import BM25Index
+from Agent.search_client.generation import bump_index_generation, get_index_generation
+from Agent.vector_db.vector_store import CONFIG_FILE, VectorStore
+
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", ".cache/local_index")
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "flat")
+# Serving-only processes: never write, and memory-map "ivfpq" indexes
+LOCAL_READ_ONLY = os.getenv("LOCAL_READ_ONLY", "0") == "1"
+# Vectors an "ivfpq" index is trained on, gathered from the start of the first ingest
+LOCAL_IVF_TRAIN_SIZE = int(os.getenv("LOCAL_IVF_TRAIN_SIZE", "10000"))
+
+
+class LocalBackend(SearchBackend):
+    """
+    Embedded backend for laptops, CI and small deployments.
+
+    Pairs a SQLite BM25 inverted index with the FAISS ``VectorStore``, both
+    persisted under ``LOCAL_INDEX_DIR/<index_name>``. A process picks up
+    changes written by another process (e.g. ingestion) when the index
+    generation changes.
+
+    A ``read_only`` backend (LOCAL_READ_ONLY=1) refuses writes and loads an
+    "ivfpq" index with its inverted lists memory-mapped instead of in RAM.
+    """
+
+    name = "local"
+    # Vectors live in FAISS, apart from the metadata update_locations rewrites
+    location_updates_need_vectors = False
+
+    def __init__(
+        self, index_name: str, base_dir: str = LOCAL_INDEX_DIR, read_only: bool = LOCAL_READ_ONLY
+    ):
+        super().__init__(index_name)
+        self.read_only = read_only
+        self.path = os.path.join(base_dir, index_name)
+        self.vectors_path = os.path.join(self.path, "vectors")
+        self._lock = threading.RLock()
+        self._bm25 = None
+        self._store = None
+        self._generation = None
+        self._bulk_depth = 0
+        self._checked = False
+
+    def _exists(self):
+        return os.path.exists(os.path.join(self.vectors_path, CONFIG_FILE))
+
+    def _close(self):
+        if self._bm25 is not None:
+            self._bm25.close()
+        self._bm25 = None
+        self._store = None
+
+    def _open(self):
+        with self._lock:
+            generation = get_index_generation(self.index_name)
+            if self._store is not None and (self._bulk_depth or generation == self._generation):
+                return self._bm25, self._store
+            if not self._exists():
+                raise FileNotFoundError(
+                    f"Local index '{self.index_name}' not found in '{self.path}'. Run ingestion first."
+                )
+            self._close()
+            self._bm25 = BM25Index(os.path.join(self.path, "bm25.sqlite"))
+            self._store = VectorStore.load(self.vectors_path, mmap=self.read_only)
+            self._generation = generation
+            self._checked = False
+            return self._bm25, self._store
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"Local index '{self.index_name}' is open read-only (LOCAL_READ_ONLY=1).")
+
+    def _open_for_write(self):
+        self._check_writable()
+        with self._lock:
+            bm25, store = self._open()
+            if not self._checked:
+                self._repair()
+                self._checked = True
+            return bm25, store
+
+    def _repair(self):
+        # SQLite rows commit per batch but FAISS is only written by _persist, so
+        # a crash mid-ingest leaves documents and postings without vectors.
+        # Only writers repair: a reader would see another process's batches in
+        # flight as inconsistent too.
+        bm25, store = self._bm25, self._store
+        if store.is_consistent() and len(bm25) == len(store):
+            return
+        orphans = store.repair()
+        live = store.ext_ids()
+        stray = [doc_id for doc_id in bm25.doc_ids() if doc_id not in live]
+        bm25.delete(set(orphans) | set(stray))
+        self._persist()
+        print(
+            f" Repaired local index '{self.index_name}': dropped {len(orphans)} chunks without "
+            f"vectors and {len(stray)} stray BM25 entries."
+        )
+
+    def _persist(self):
+        self._store.save(self.vectors_path)
+        self._generation = bump_index_generation(self.index_name)
+
+    def ensure_index(self, recreate: bool = False):
+        self._check_writable()
+        with self._lock:
+            if self._exists():
+                if not recreate:
+                    print(f" Local index '{self.index_name}' exists. Keeping it.")
+                    return
+                print(f" Local index '{self.index_name}' exists. Deleting and recreating...")
+                self._close()
+                shutil.rmtree(self.path)
+
+            from Agent.vectors.embedding import get_embedding
+            from Agent.vectors.reduction import get_embedding_transform
+
+            dim = len(get_embedding("This is a sample chunk of a PDF."))
+            print(f"Embedding dimension detected: {dim}")
+            transform = get_embedding_transform()
+            if transform is not None:
+                dim = transform.output_dim(dim)
+                print(f"Embedding transform: {transform.method} -> {dim} dims")
+
+            os.makedirs(self.path, exist_ok=True)
+            store = VectorStore(dim=dim, index_type=LOCAL_VECTOR_INDEX, path=self.vectors_path)
+            store.save(self.vectors_path)
+            self._close()
+            self._generation = bump_index_generation(self.index_name)
+            print(f" Created local index '{self.index_name}' in '{self.path}'.")
+
+    def _hits(self, ranked, docs):
+        hits = []
+        for doc_id, score in ranked:
+            doc = docs.get(doc_id)
+            if doc is None:
+                continue
+            metadata = doc["metadata"] or {}
+            source = {
+                "source_file": metadata.get("source_file"),
+                "chunk_index": metadata.get("chunk_index"),
+                "text": doc["text"],
+            }
+            if metadata.get("locations"):
+                source["locations"] = metadata["locations"]
+            hits.append({"_index": self.index_name, "_id": doc_id, "_score": score, "_source": source})
+        return hits
+
+    def keyword(self, query_text: str, size: int) -> list:
+        bm25, store = self._open()
+        with span("local.keyword"):
+            ranked = bm25.search(query_text, size)
+            return self._hits(ranked, store.get([doc_id for doc_id, _ in ranked]))
+
+    def vector(self, vector: list, size: int) -> list:
+        _, store = self._open()
+        with span("local.vector"):
+            found = store.search([vector], size)[0]
+        return self._hits(
+            [(hit["id"], hit["score"]) for hit in found], {hit["id"]: hit for hit in found}
+        )
+
+    @contextmanager
+    def bulk_load(self):
+        with self._lock:
+            self._open_for_write()
+            self._bulk_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._bulk_depth -= 1
+                if not self._bulk_depth:
+                    self._persist()
+
+    def training_size(self) -> int:
+        with self._lock:
+            _, store = self._open_for_write()
+            if store.is_trained:
+                return 0
+            return max(LOCAL_IVF_TRAIN_SIZE, store.config["nlist"])
+
+    def train(self, vectors):
+        with self._lock, span("index.local_train", vectors=len(vectors)):
+            _, store = self._open_for_write()
+            store.train(vectors)
+        print(f" Trained the vector index of '{self.index_name}' on {len(vectors)} vectors.")
+
+    def index_chunks(self, chunks) -> tuple:
+        from Agent.data_ingestion.ingestion import chunk_id
+
+        chunks = list(chunks)
+        if not chunks:
+            return 0, []
+
+        ids = [chunk_id(chunk) for chunk in chunks]
+        with self._lock, span("index.local", chunks=len(chunks)):
+            bm25, store = self._open_for_write()
+            store.add(
+                [chunk["embedding"] for chunk in chunks],
+                [chunk["text"] for chunk in chunks],
+                ids=ids,
+                metadata=[
+                    {
+                        "source_file": chunk["source_file"],
+                        "chunk_index": chunk["chunk_index"],
+                        **({"locations": chunk["locations"]} if chunk.get("locations") else {}),
+                    }
+                    for chunk in chunks
+                ],
+            )
+            bm25.add([(i, chunk["source_file"], chunk["text"]) for i, chunk in zip(ids, chunks)])
+            if not self._bulk_depth:
+                self._persist()
+        increment("index.chunks", len(chunks))
+        return len(chunks), []
+
+    def update_locations(self, chunks) -> tuple:
+        from Agent.data_ingestion.ingestion import chunk_id
+
+        chunks = list(chunks)
+        with self._lock:
+            _, store = self._open_for_write()
+            updated = store.update_metadata(
+                [chunk_id(chunk) for chunk in chunks],
+                [{"locations": chunk["locations"]} for chunk in chunks],
+            )
+            if not self._bulk_depth:
+                self._persist()
+        return updated, []
+
+    def flush(self):
+        with self._lock:
+            if self._store is not None and not self.read_only:
+                self._persist()
+
+    def delete_by_source(self, source_files: list) -> int:
+        if not source_files:
+            return 0
+        with self._lock:
+            bm25, store = self._open_for_write()
+            doc_ids = bm25.doc_ids_for_sources(source_files)
+            store.delete(doc_ids)
+            bm25.delete(doc_ids)
+            if not self._bulk_depth:
+                self._persist()
+        print(f" Deleted {len(doc_ids)} chunks from {len(source_files)} files in '{self.index_name}'.")
+        return len(doc_ids)
+
+    def count(self) -> int:
+        _, store = self._open()
+        return len(store)
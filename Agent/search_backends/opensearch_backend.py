@@ -0,0 +1,110 @@
+from Agent.metrics.instrumentation import span
+from Agent.search_backends.base import SOURCE_FIELDS, SearchBackend
+from Agent.search_client.opensearch_client import (
+    create_index_if_not_exists,
+    delete_chunks_by_source,
+    get_async_opensearch_client,
+    get_opensearch_client,
+)
+
+
+class OpenSearchBackend(SearchBackend):
+    """
+    Backend over an OpenSearch index with a knn_vector ``embedding`` field.
+    """
+
+    name = "opensearch"
+    quantized_vectors = True
+
+    @property
+    def client(self):
+        return get_opensearch_client()
+
+    def ensure_index(self, recreate: bool = False):
+        create_index_if_not_exists(self.client, self.index_name, recreate=recreate)
+
+    def search(self, body: dict) -> list:
+        client = self.client
+        with span("opensearch.search"):
+            return client.search(index=self.index_name, body=body)["hits"]["hits"]
+
+    async def async_search(self, body: dict) -> list:
+        client = get_async_opensearch_client()
+        with span("opensearch.search"):
+            response = await client.search(index=self.index_name, body=body)
+        return response["hits"]["hits"]
+
+    @staticmethod
+    def keyword_body(query_text: str, size: int) -> dict:
+        return {
+            "size": size,
+            "query": {"match": {"text": query_text}},
+            "_source": SOURCE_FIELDS,
+        }
+
+    @staticmethod
+    def vector_body(vector: list, size: int) -> dict:
+        return {
+            "size": size,
+            "query": {"knn": {"embedding": {"vector": vector, "k": size}}},
+            "_source": SOURCE_FIELDS,
+        }
+
+    def keyword(self, query_text: str, size: int) -> list:
+        return self.search(self.keyword_body(query_text, size))
+
+    def vector(self, vector: list, size: int) -> list:
+        return self.search(self.vector_body(vector, size))
+
+    def multi_search(self, searches: list, chunk_size: int = 50) -> list:
+        """
+        Send the searches as ``_msearch`` requests of at most ``chunk_size``.
+        """
+        results = []
+        for i in range(0, len(searches), chunk_size):
+            part = searches[i:i + chunk_size]
+            body = []
+            for kind, query, size in part:
+                body.append({"index": self.index_name})
+                if kind == "keyword":
+                    body.append(self.keyword_body(query, size))
+                else:
+                    body.append(self.vector_body(query, size))
+
+            try:
+                with span("opensearch.msearch", searches=len(part)):
+                    responses = self.client.msearch(body=body)["responses"]
+            except Exception as e:
+                results.extend([e] * len(part))
+                continue
+
+            for response in responses:
+                if "error" in response:
+                    error = response["error"]
+                    reason = error.get("reason", error) if isinstance(error, dict) else error
+                    results.append(Exception(f"Search failed ({response.get('status')}): {reason}"))
+                else:
+                    results.append(response["hits"]["hits"])
+        return results
+
+    async def async_keyword(self, query_text: str, size: int) -> list:
+        return await self.async_search(self.keyword_body(query_text, size))
+
+    async def async_vector(self, vector: list, size: int) -> list:
+        return await self.async_search(self.vector_body(vector, size))
+
+    def bulk_load(self):
+        from Agent.data_ingestion.ingestion import refresh_disabled
+
+        return refresh_disabled(self.client, self.index_name)
+
+    def index_chunks(self, chunks) -> tuple:
+        from Agent.data_ingestion.ingestion import bulk_index_chunks
+
+        return bulk_index_chunks(self.client, self.index_name, chunks)
+
+    def delete_by_source(self, source_files: list) -> int:
+        return delete_chunks_by_source(self.client, self.index_name, source_files)
+
+    def count(self) -> int:
+        return self.client.count(index=self.index_name)["count"]
@@ -0,0 +1,50 @@
+import json
+import os
+import threading
+
+GENERATION_PATH = os.getenv("INDEX_GENERATION_PATH", ".cache/index_generation.json")
+
+_lock = threading.Lock()
+_cached = {"mtime": None, "generations": {}}
+
+
+def _read():
+    try:
+        mtime = os.stat(GENERATION_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime != _cached["mtime"]:
+        with open(GENERATION_PATH, "r", encoding="utf-8") as f:
+            _cached["generations"] = json.load(f)
+        _cached["mtime"] = mtime
+    return _cached["generations"]
+
+
+def get_index_generation(index_name: str) -> int:
+    """
+    Return the current generation counter of an index.
+
+    The counter lives in a small JSON file shared by every process on the
+    host, and is only re-read when the file changes.
+    """
+    with _lock:
+        return _read().get(index_name, 0)
+
+
+def bump_index_generation(index_name: str) -> int:
+    """
+    Increment the generation of an index after its contents change, which
+    invalidates any cached results computed against the old contents.
+    """
+    with _lock:
+        generations = dict(_read())
+        generations[index_name] = generations.get(index_name, 0) + 1
+
+        directory = os.path.dirname(GENERATION_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{GENERATION_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(generations, f)
+        os.replace(tmp_path, GENERATION_PATH)
+        return generations[index_name]
@@ -1,76 +1,352 @@
+import os
+import threading
+import time
+import weakref
+
 from opensearchpy import OpenSearch
 
-def get_opensearch_client(host: str, port: int):
-    """
-    Connect to OpenSearch instance running at the given host and port.
-    """
-    client = OpenSearch(
+from Agent.metrics.instrumentation import span, timed
+from Agent.search_client.generation import bump_index_generation
+
+OPENSEARCH_HOST = os.getenv("OPENSEARCH_HOST", "localhost")
+OPENSEARCH_PORT = int(os.getenv("OPENSEARCH_PORT", "9200"))
+OPENSEARCH_INDEX = os.getenv("OPENSEARCH_INDEX", "patent_chunks")
+OPENSEARCH_POOL_MAXSIZE = int(os.getenv("OPENSEARCH_POOL_MAXSIZE", "10"))
+OPENSEARCH_KEEP_ALIVE = os.getenv("OPENSEARCH_KEEP_ALIVE", "1") != "0"
+HEALTH_CHECK_INTERVAL = float(os.getenv("OPENSEARCH_HEALTH_CHECK_INTERVAL", "60"))
+OPENSEARCH_INDEX_PROFILE = os.getenv("OPENSEARCH_INDEX_PROFILE", "default")
+
+# Named kNN index profiles trading recall against memory and query latency.
+# Ollama's /api/embed returns unit-length vectors, so inner product on the
+# faiss engine ranks the same as cosine similarity.
+INDEX_PROFILES = {
+    "default": {
+        "engine": "faiss",
+        "space_type": "innerproduct",
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 100,
+    },
+    "high_recall": {
+        "engine": "faiss",
+        "space_type": "innerproduct",
+        "m": 32,
+        "ef_construction": 256,
+        "ef_search": 256,
+    },
+    "low_latency": {
+        "engine": "faiss",
+        "space_type": "innerproduct",
+        "m": 8,
+        "ef_construction": 64,
+        "ef_search": 32,
+    },
+    # Half-precision vectors via the faiss scalar quantizer (OpenSearch 2.13+)
+    "faiss_fp16": {
+        "engine": "faiss",
+        "space_type": "innerproduct",
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 100,
+        "encoder": {"name": "sq", "parameters": {"type": "fp16"}},
+    },
+    "lucene": {
+        "engine": "lucene",
+        "space_type": "cosinesimil",
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 100,
+    },
+    "nmslib": {
+        "engine": "nmslib",
+        "space_type": "cosinesimil",
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 100,
+    },
+    # For int8-quantized embeddings (EmbeddingTransform quantization="int8")
+    "lucene_byte": {
+        "engine": "lucene",
+        "space_type": "cosinesimil",
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 100,
+        "data_type": "byte",
+    },
+    # For packed-bit embeddings (quantization="binary"), OpenSearch 2.16+
+    "faiss_binary": {
+        "engine": "faiss",
+        "space_type": "hamming",
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 100,
+        "data_type": "binary",
+    },
+}
+
+# knn_vector data_type each embedding quantization has to be indexed as
+QUANTIZATION_DATA_TYPES = {"none": None, "int8": "byte", "binary": "binary"}
+
+_clients = {}
+_last_health_check = {}
+_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _create_client(host: str, port: int, pool_maxsize: int, keep_alive: bool):
+    return OpenSearch(
         hosts=[{"host": host, "port": port}],
         http_compress=True,
         timeout=30,
         max_retries=3,
         retry_on_timeout=True,
+        pool_maxsize=pool_maxsize,
+        headers={"Connection": "keep-alive" if keep_alive else "close"},
     )
 
-    if client.ping():
+
+@timed("opensearch.get_client")
+def get_opensearch_client(
+    host: str = None,
+    port: int = None,
+    pool_maxsize: int = None,
+    keep_alive: bool = None,
+    check_health: bool = True,
+):
+    """
+    Return the shared OpenSearch client for the given host and port.
+
+    Clients are created once per (host, port) and reused for the life of the
+    process, so every search shares one connection pool. Health is checked
+    lazily: on first use and then at most once per HEALTH_CHECK_INTERVAL
+    seconds, rather than on every call.
+
+    Host, port, pool size and keep-alive default to the OPENSEARCH_* settings.
+    """
+    host = host or OPENSEARCH_HOST
+    port = port or OPENSEARCH_PORT
+    key = (host, port)
+
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _create_client(
+                    host,
+                    port,
+                    pool_maxsize or OPENSEARCH_POOL_MAXSIZE,
+                    OPENSEARCH_KEEP_ALIVE if keep_alive is None else keep_alive,
+                )
+                _clients[key] = client
+
+    if check_health:
+        last_check = _last_health_check.get(key)
+        if last_check is None or time.monotonic() - last_check > HEALTH_CHECK_INTERVAL:
+            _check_health(key, client, first=last_check is None)
+
+    return client
+
+
+def _check_health(key, client, first: bool):
+    with span("opensearch.health_check"):
+        healthy = client.ping()
+    if not healthy:
+        with _clients_lock:
+            _clients.pop(key, None)
+            _last_health_check.pop(key, None)
+        raise ConnectionError(" Failed to connect to OpenSearch.")
+
+    if first:
         print("Connected to OpenSearch!")
         info = client.info()
         print(f"Cluster: {info['cluster_name']} | Version: {info['version']['number']}")
-    else:
-        raise ConnectionError(" Failed to connect to OpenSearch.")
+    _last_health_check[key] = time.monotonic()
+
+
+def get_async_opensearch_client(host: str = None, port: int = None, pool_maxsize: int = None):
+    """
+    Return the shared AsyncOpenSearch client for the running event loop.
 
+    Async clients hold an aiohttp connection pool bound to the loop that
+    created them, so one client per (loop, host, port) is kept. No health
+    check is done here; the first request surfaces connection errors.
+    """
+    import asyncio
+
+    from opensearchpy import AsyncOpenSearch
+
+    host = host or OPENSEARCH_HOST
+    port = port or OPENSEARCH_PORT
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+
+    client = clients.get((host, port))
+    if client is None:
+        client = AsyncOpenSearch(
+            hosts=[{"host": host, "port": port}],
+            http_compress=True,
+            timeout=30,
+            max_retries=3,
+            retry_on_timeout=True,
+            # AIOHttpConnection names its pool size ``maxsize``, not ``pool_maxsize``
+            maxsize=pool_maxsize or OPENSEARCH_POOL_MAXSIZE,
+        )
+        clients[(host, port)] = client
     return client
 
 
-def create_index_if_not_exists(client, index_name: str):
+async def close_async_opensearch_clients():
+    """
+    Close the AsyncOpenSearch clients of the running event loop.
+    """
+    import asyncio
+
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+
+
+def close_opensearch_clients():
+    """
+    Close every pooled client, e.g. at process shutdown.
+    """
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _last_health_check.clear()
+
+
+def build_index_body(dim: int, profile: str = None) -> dict:
+    """
+    Build the settings and mappings for a chunk index from a named profile.
+
+    Only the fields ingestion actually writes are mapped, and the embedding
+    is excluded from ``_source`` so hits do not carry the vector back.
+    """
+    profile_name = profile or OPENSEARCH_INDEX_PROFILE
+    if profile_name not in INDEX_PROFILES:
+        raise ValueError(
+            f"Unknown index profile '{profile_name}'. Choose one of {sorted(INDEX_PROFILES)}."
+        )
+    config = INDEX_PROFILES[profile_name]
+
+    parameters = {"m": config["m"], "ef_construction": config["ef_construction"]}
+    if config.get("encoder"):
+        parameters["encoder"] = config["encoder"]
+
+    embedding = {
+        "type": "knn_vector",
+        "dimension": dim,
+        "method": {
+            "name": "hnsw",
+            "engine": config["engine"],
+            "space_type": config["space_type"],
+            "parameters": parameters,
+        },
+    }
+    if config.get("data_type"):
+        embedding["data_type"] = config["data_type"]
+
+    index_settings = {"knn": True}
+    if config["engine"] != "lucene":
+        # Lucene takes ef_search from the query's k instead of an index setting
+        index_settings["knn.algo_param.ef_search"] = config["ef_search"]
+
+    return {
+        "settings": {"index": index_settings},
+        "mappings": {
+            "_source": {"excludes": ["embedding"]},
+            "properties": {
+                "source_file": {"type": "keyword"},
+                "chunk_index": {"type": "integer"},
+                "text": {"type": "text"},
+                # Every (source_file, chunk_index) a deduplicated chunk stands for
+                "locations": {"type": "object", "enabled": False},
+                "embedding": embedding,
+            },
+        },
+    }
+
+
+def create_index_if_not_exists(
+    client, index_name: str, recreate: bool = False, profile: str = None
+):
     """
     Create index for PDF chunks + embeddings if it doesn't exist.
+
+    An existing index is left in place unless ``recreate`` is True.
+    ``profile`` names an entry of INDEX_PROFILES (default OPENSEARCH_INDEX_PROFILE).
     """
     if client.indices.exists(index=index_name):
+        if not recreate:
+            print(f" Index '{index_name}' exists. Keeping it.")
+            return
         print(f" Index '{index_name}' exists. Deleting and recreating for fresh start...")
         client.indices.delete(index=index_name)
 
     # Get embedding dimension dynamically from nomic-embed-text
     from Agent.vectors.embedding import get_embedding
+    from Agent.vectors.reduction import get_embedding_transform
     dummy_embedding = get_embedding("This is a sample chunk of a PDF.")
     dim = len(dummy_embedding)
     print(f"Embedding dimension detected: {dim}")
 
+    transform = get_embedding_transform()
+    quantization = "none"
+    if transform is not None:
+        dim = transform.output_dim(dim)
+        quantization = transform.quantization
+        print(f"Embedding transform: {transform.method} -> {dim} dims, quantization={quantization}")
+
     # Create OpenSearch index with knn_vector mapping
-    mapping = {
-        "mappings": {
-            "properties": {
-                "pdf_name": {"type": "keyword"},
-                "chunk": {"type": "text"},
-                "embedding": {"type": "knn_vector", "dimension": dim},
-                "source_page": {"type": "integer"},
-                "token_count": {"type": "integer"}
-            }
-        },
-        "settings": {
-            "index": {
-                "knn": True,
-                "knn.space_type": "cosinesimil"
-            }
-        }
-    }
+    body = build_index_body(dim, profile)
+    data_type = body["mappings"]["properties"]["embedding"].get("data_type")
+    if data_type != QUANTIZATION_DATA_TYPES[quantization]:
+        raise ValueError(
+            f"Index profile '{profile or OPENSEARCH_INDEX_PROFILE}' stores data_type={data_type}, "
+            f"but embeddings are quantized as '{quantization}'. Use a matching profile "
+            f"(e.g. lucene_byte for int8, faiss_binary for binary)."
+        )
 
     try:
-        client.indices.create(index=index_name, body=mapping)
-        print(f" Created index '{index_name}' with vector search mappings.")
+        client.indices.create(index=index_name, body=body)
+        bump_index_generation(index_name)
+        method = body["mappings"]["properties"]["embedding"]["method"]
+        print(
+            f" Created index '{index_name}' with vector search mappings "
+            f"(profile={profile or OPENSEARCH_INDEX_PROFILE}, engine={method['engine']})."
+        )
     except Exception as e:
         print(f" Error creating index: {e}")
         raise
 
 
-if __name__ == "__main__":
-    host = "localhost"
-    port = 9200
+def delete_chunks_by_source(client, index_name: str, source_files: list):
+    """
+    Delete every chunk whose source_file is in ``source_files``.
+    """
+    if not source_files:
+        return 0
 
-    client = get_opensearch_client(host, port)
+    response = client.delete_by_query(
+        index=index_name,
+        body={"query": {"terms": {"source_file": list(source_files)}}},
+        conflicts="proceed",
+        refresh=True,
+    )
+    deleted = response.get("deleted", 0)
+    bump_index_generation(index_name)
+    print(f" Deleted {deleted} chunks from {len(source_files)} files in '{index_name}'.")
+    return deleted
+
+
+if __name__ == "__main__":
+    client = get_opensearch_client()
 
     index_name = "pdf_chunks"
-    create_index_if_not_exists(client, index_name)
+    create_index_if_not_exists(client, index_name, recreate=True)
 
     print("\n Available Indices:")
     for idx in client.cat.indices(format="json"):
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(query_vector, candidate_vectors, top_k, lambda_mult=0.5, groups=None, max_per_group=0):
+    """
+    Pick ``top_k`` candidates by maximal marginal relevance.
+
+    Each step takes the candidate maximizing
+    ``lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, selected))``
+    with cosine similarities. Relevance is one matrix-vector product; each
+    step adds one more (candidates x dim) product for the newly selected
+    vector and updates the running max-similarity, so the cost is
+    O(top_k * n * dim) with no per-pair Python work.
+
+    Args:
+        query_vector: Query embedding.
+        candidate_vectors: (n, dim) candidate embeddings.
+        top_k (int): Number of candidates to select.
+        lambda_mult (float): 1.0 ranks by relevance only, 0.0 by diversity only.
+        groups: Optional length-n labels (e.g. source files) for ``max_per_group``.
+        max_per_group (int): Selections per group before the group is passed
+            over; 0 for no cap. Once every remaining candidate belongs to a
+            capped group, they fill the remaining slots by the same score.
+
+    Returns:
+        list: Indices of the selected candidates, in selection order.
+    """
+    vectors = _unit_rows(np.asarray(candidate_vectors, dtype="float32"))
+    n = len(vectors)
+    if not n or top_k <= 0:
+        return []
+    query = np.asarray(query_vector, dtype="float32")
+    query = query / (np.linalg.norm(query) or 1.0)
+
+    relevance = vectors @ query
+    max_sim = np.full(n, -np.inf, dtype="float32")
+    available = np.ones(n, dtype=bool)
+    capped = np.zeros(n, dtype=bool)
+
+    group_ids = None
+    if groups is not None and max_per_group > 0:
+        _, group_ids = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+        group_counts = np.zeros(group_ids.max() + 1, dtype=int)
+
+    selected = []
+    for _ in range(min(top_k, n)):
+        # Nothing selected yet: max_sim is -inf, so rank by relevance alone
+        penalty = np.where(np.isfinite(max_sim), max_sim, 0.0)
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * penalty
+        eligible = available & ~capped
+        # Backfill from capped groups rather than return fewer than top_k
+        scores[~(eligible if eligible.any() else available)] = -np.inf
+        best = int(np.argmax(scores))
+        if not available[best]:
+            break
+
+        selected.append(best)
+        available[best] = False
+        max_sim = np.maximum(max_sim, vectors @ vectors[best])
+
+        if group_ids is not None:
+            group = group_ids[best]
+            group_counts[group] += 1
+            if group_counts[group] >= max_per_group:
+                capped[group_ids == group] = True
+    return selected
+
+
+def diversify(hits, query_vector, candidate_vectors, top_k, lambda_mult=0.5, max_per_file=0):
+    """
+    Re-rank search hits by MMR, capping the hits taken from any one source file.
+
+    Args:
+        hits (list): Candidate OpenSearch hits.
+        query_vector: Query embedding.
+        candidate_vectors: Embeddings of ``hits``, in order.
+        top_k (int): Number of hits to return.
+        lambda_mult (float): Relevance/diversity trade-off (see ``mmr_select``).
+        max_per_file (int): Maximum hits per source_file; 0 for no cap.
+
+    Returns:
+        list: Selected hits in MMR order, files over the cap only once the
+        others run out; ``_score`` is kept and ``_relevance`` holds the
+        cosine similarity to the query.
+    """
+    if not hits:
+        return []
+    files = [hit.get("_source", {}).get("source_file") for hit in hits]
+    order = mmr_select(query_vector, candidate_vectors, top_k, lambda_mult, files, max_per_file)
+
+    vectors = _unit_rows(np.asarray(candidate_vectors, dtype="float32"))
+    query = np.asarray(query_vector, dtype="float32")
+    relevance = vectors[order] @ (query / (np.linalg.norm(query) or 1.0)) if order else []
+
+    results = []
+    for i, score in zip(order, relevance):
+        hit = dict(hits[i])
+        hit["_relevance"] = float(score)
+        results.append(hit)
+    return results
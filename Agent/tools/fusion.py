@@ -0,0 +1,75 @@
+def _hit_key(hit):
+    source = hit.get("_source", {})
+    return hit.get("_id") or (source.get("source_file"), source.get("chunk_index"))
+
+
+def _fuse(legs, scores_by_leg, weights, top_k):
+    fused = {}
+    hits = {}
+    ranks = {}
+
+    for name, leg_hits in legs.items():
+        weight = weights.get(name, 1.0)
+        for rank, (hit, score) in enumerate(zip(leg_hits, scores_by_leg[name]), start=1):
+            key = _hit_key(hit)
+            fused[key] = fused.get(key, 0.0) + weight * score
+            hits.setdefault(key, hit)
+            ranks.setdefault(key, {})[f"{name}_rank"] = rank
+
+    ordered = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    results = []
+    for key in ordered:
+        hit = dict(hits[key])
+        hit["_score"] = fused[key]
+        hit["_ranks"] = ranks[key]
+        results.append(hit)
+    return results
+
+
+def reciprocal_rank_fusion(legs, weights=None, rrf_k=60, top_k=20):
+    """
+    Fuse ranked hit lists with (weighted) reciprocal rank fusion.
+
+    Each hit scores ``sum(weight / (rrf_k + rank))`` over the legs it appears
+    in, so only ranks matter and BM25 and cosine scales never mix.
+
+    Args:
+        legs (dict): Leg name -> list of OpenSearch hits, best first.
+        weights (dict): Leg name -> weight (default 1.0 each).
+        rrf_k (int): Rank smoothing constant.
+        top_k (int): Number of fused hits to return.
+
+    Returns:
+        list: Fused hits; ``_score`` is the fused score and ``_ranks`` holds
+        the rank of the hit in each leg.
+    """
+    scores = {
+        name: [1.0 / (rrf_k + rank) for rank in range(1, len(leg_hits) + 1)]
+        for name, leg_hits in legs.items()
+    }
+    return _fuse(legs, scores, weights or {}, top_k)
+
+
+def weighted_score_fusion(legs, weights=None, top_k=20):
+    """
+    Fuse hit lists by min-max normalizing each leg's scores to [0, 1] and
+    summing them with per-leg weights.
+
+    Args:
+        legs (dict): Leg name -> list of OpenSearch hits, best first.
+        weights (dict): Leg name -> weight (default 1.0 each).
+        top_k (int): Number of fused hits to return.
+
+    Returns:
+        list: Fused hits, as for ``reciprocal_rank_fusion``.
+    """
+    scores = {}
+    for name, leg_hits in legs.items():
+        raw = [hit.get("_score") or 0.0 for hit in leg_hits]
+        if not raw:
+            scores[name] = []
+            continue
+        low, high = min(raw), max(raw)
+        span = high - low
+        scores[name] = [(score - low) / span if span else 1.0 for score in raw]
+    return _fuse(legs, scores, weights or {}, top_k)
@@ -0,0 +1,245 @@
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from Agent.metrics.instrumentation import bind_trace
+from Agent.search_client.generation import get_index_generation
+
+CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+CACHE_DISK_PATH = os.getenv("SEARCH_CACHE_DISK_PATH", "")
+CACHE_ENABLED = os.getenv("SEARCH_CACHE", "1") != "0"
+
+
+def normalize_query(query_text: str) -> str:
+    """
+    Case-fold and collapse whitespace so trivially different queries share a key.
+    """
+    return " ".join(query_text.casefold().split())
+
+
+class DiskResultCache:
+    """
+    Optional SQLite tier shared by every process on the host, e.g. the
+    Streamlit app and CrewAI runs.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                results TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str, generation: int, ttl: float):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generation, created_at, results FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[0] != generation or time.time() - row[1] > ttl:
+            return None
+        return json.loads(row[2])
+
+    def put(self, key: str, generation: int, results: list):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, generation, created_at, results) "
+                "VALUES (?, ?, ?, ?)",
+                (key, generation, time.time(), json.dumps(results)),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+
+class ResultCache:
+    """
+    In-process LRU + TTL cache for search results.
+
+    Keys are (search type, normalized query, top_k, index name). Every entry
+    remembers the index generation it was computed against and is treated as
+    a miss once ingestion bumps that generation.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL,
+        disk_path: str = CACHE_DISK_PATH,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = DiskResultCache(disk_path) if disk_path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, generation: int):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, results = entry
+                if entry_generation == generation and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(results)
+                del self._entries[key]
+
+        if self.disk is not None:
+            results = self.disk.get(json.dumps(key), generation, self.ttl)
+            if results is not None:
+                self._store(key, generation, results)
+                with self._lock:
+                    self.disk_hits += 1
+                return list(results)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: tuple, generation: int, results: list):
+        self._store(key, generation, results)
+        if self.disk is not None:
+            self.disk.put(json.dumps(key), generation, results)
+
+    def _store(self, key, generation, results):
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+
+result_cache = ResultCache()
+
+
+class PartialResults(list):
+    """
+    Results of a degraded search (e.g. hybrid with one leg failed).
+
+    Returned to the caller as a normal list but never cached, so the full
+    results are computed again once the failing component recovers.
+    """
+
+
+def _cache_key(search_type, index_name, query_text, top_k, options):
+    key = (search_type, normalize_query(query_text), top_k, index_name)
+    if options:
+        key += tuple(sorted(options.items()))
+    return key
+
+
+def cached_search(search_type: str, index_name: str):
+    """
+    Decorator that serves ``fn(query_text, top_k, **options)`` from the result
+    cache. Keyword options (e.g. fusion settings) become part of the key.
+
+    Empty results are not cached, since the search functions also return an
+    empty list when a request fails; neither are ``PartialResults``.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(query_text, top_k=20, use_cache=True, **options):
+            if not (CACHE_ENABLED and use_cache):
+                return fn(query_text, top_k, **options)
+
+            key = _cache_key(search_type, index_name, query_text, top_k, options)
+            generation = get_index_generation(index_name)
+            results = result_cache.get(key, generation)
+            if results is not None:
+                return results
+
+            results = fn(query_text, top_k, **options)
+            if results and not isinstance(results, PartialResults):
+                result_cache.put(key, generation, results)
+            return results
+
+        return wrapper
+
+    return decorator
+
+
+async def _off_loop(fn, *args):
+    # The disk tier is SQLite; only run lookups in a thread when it is enabled
+    if result_cache.disk is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, bind_trace(fn), *args)
+
+
+def cached_async_search(search_type: str, index_name: str):
+    """
+    ``cached_search`` for coroutine functions; shares the same cache, so sync
+    and async callers hit each other's entries. Disk-tier reads and writes
+    run in the default executor.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(query_text, top_k=20, use_cache=True, **options):
+            if not (CACHE_ENABLED and use_cache):
+                return await fn(query_text, top_k, **options)
+
+            key = _cache_key(search_type, index_name, query_text, top_k, options)
+            generation = get_index_generation(index_name)
+            results = await _off_loop(result_cache.get, key, generation)
+            if results is not None:
+                return results
+
+            results = await fn(query_text, top_k, **options)
+            if results and not isinstance(results, PartialResults):
+                await _off_loop(result_cache.put, key, generation, results)
+            return results
+
+        return wrapper
+
+    return decorator
+
+
+def get_cache_stats() -> dict:
+    """
+    Hit/miss counters of the search result cache.
+    """
+    return result_cache.stats()
@@ -1,130 +1,556 @@
-from Agent.vectors.embedding import get_embedding
-from Agent.search_client.opensearch_client import get_opensearch_client
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-INDEX_NAME = "patent_chunks"
-HOST = "localhost"
-PORT = 9200
+import numpy as np
 
+from Agent.metrics.instrumentation import bind_trace, increment, record_span, span, timed
+from Agent.vectors.embedding import (
+    async_embed_many,
+    cached_embeddings,
+    close_async_session,
+    embed_many,
+)
+from Agent.vectors.reduction import get_embedding_transform, rescore
+from Agent.search_backends.base import get_search_backend
+from Agent.search_client.opensearch_client import OPENSEARCH_INDEX, close_async_opensearch_clients
+from Agent.tools.diversify import diversify
+from Agent.tools.fusion import reciprocal_rank_fusion, weighted_score_fusion
+from Agent.tools.result_cache import (
+    PartialResults,
+    cached_async_search,
+    cached_search,
+    get_cache_stats,
+)
 
-def keyword_search(query_text, top_k=20):
+INDEX_NAME = OPENSEARCH_INDEX
+HYBRID_CANDIDATES = 50
+ITERATIVE_TIME_BUDGET = 10.0
+RESCORE_OVERSAMPLE = 4
+MSEARCH_BATCH_SIZE = int(os.getenv("MSEARCH_BATCH_SIZE", "50"))
+# Candidate pool, relevance/diversity trade-off and per-file cap of diverse_search
+MMR_CANDIDATES = int(os.getenv("MMR_CANDIDATES", "200"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))
+MAX_PER_FILE = int(os.getenv("MAX_PER_FILE", "3"))
+
+_leg_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-leg")
+
+
+class LegLatency:
+    """
+    Running latency statistics (count, mean, max, last) per hybrid search leg.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, leg, seconds):
+        record_span(f"search.hybrid.{leg}_leg", time.perf_counter() - seconds, seconds)
+        with self._lock:
+            stats = self._stats.setdefault(leg, {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["last"] = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                leg: {
+                    "count": stats["count"],
+                    "mean_ms": 1000 * stats["total"] / stats["count"],
+                    "max_ms": 1000 * stats["max"],
+                    "last_ms": 1000 * stats["last"],
+                }
+                for leg, stats in self._stats.items()
+            }
+
+
+hybrid_latency = LegLatency()
+
+
+def _rescores(transform, backend):
+    # Reduced float vectors rank well enough; only quantized codes are re-ranked
+    return backend.quantized_vectors and transform.quantization != "none"
+
+
+def _candidate_vectors(hits):
+    """
+    Full-precision vectors for the texts of ``hits``: from the embedding
+    cache, with misses embedded through ``embed_many`` (which caches them).
+
+    Returns:
+        list: One vector per hit, or None where embedding the miss failed.
+    """
+    texts = [hit["_source"].get("text", "") for hit in hits]
+    vectors = cached_embeddings(texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        increment("search.candidate_embeds", len(missing))
+        try:
+            for i, vector in zip(missing, embed_many([texts[i] for i in missing], verbose=False)):
+                vectors[i] = vector
+        except Exception as e:
+            print(f"Candidate embedding error: {e}")
+    return vectors
+
+
+def _rescore_hits(hits, query_vector, size):
     """
-    Perform keyword search using OpenSearch.
+    Re-rank ``hits`` on their full-precision vectors (``_candidate_vectors``).
+
+    If some candidates cannot be embedded they keep their backend order
+    after the re-ranked ones, and the results are ``PartialResults``.
+    """
+    vectors = _candidate_vectors(hits)
+    found = [(hit, vector) for hit, vector in zip(hits, vectors) if vector is not None]
+    missing = [hit for hit, vector in zip(hits, vectors) if vector is None]
+    rescored = rescore([hit for hit, _ in found], query_vector, [vector for _, vector in found], size)
+    if missing:
+        increment("search.rescore_misses", len(missing))
+        return PartialResults((rescored + missing)[:size])
+    return rescored
+
+
+def _vector_search(backend, query_vector, size):
     """
-    client = get_opensearch_client(HOST, PORT)
+    kNN search for a full-precision query vector.
+
+    With an EmbeddingTransform fitted, the query is reduced the same way as
+    the index. If the index also holds quantized codes,
+    ``size * RESCORE_OVERSAMPLE`` candidates are fetched and re-ranked on
+    their full-precision vectors (see ``_rescore_hits``).
+    """
+    transform = get_embedding_transform()
+    if transform is None:
+        return backend.vector(query_vector, size)
+
+    encoded = transform.encode([query_vector], quantize=backend.quantized_vectors)[0]
+    if not _rescores(transform, backend):
+        return backend.vector(encoded, size)
+    hits = backend.vector(encoded, size * RESCORE_OVERSAMPLE)
+    return _rescore_hits(hits, query_vector, size)
+
 
+@timed("search.keyword")
+@cached_search("keyword", INDEX_NAME)
+def keyword_search(query_text, top_k=20):
+    """
+    Perform keyword search using the configured search backend.
+    """
     try:
-        search_query = {
-            "size": top_k,
-            "query": {"match": {"text": query_text}},
-            "_source": ["source_file", "text", "chunk_index"],
-        }
-
-        response = client.search(index=INDEX_NAME, body=search_query)
-        return response["hits"]["hits"]
+        return get_search_backend().keyword(query_text, top_k)
     except Exception as e:
         print(f"Keyword search error: {e}")
         return []
 
 
+@timed("search.semantic")
+@cached_search("semantic", INDEX_NAME)
 def semantic_search(query_text, top_k=20):
     """
     Perform semantic (vector) search using embeddings.
     """
-    client = get_opensearch_client(HOST, PORT)
-
     try:
-        query_embedding = get_embedding(query_text)
-
-        search_query = {
-            "size": top_k,
-            "query": {
-                "knn": {
-                    "embedding": {
-                        "vector": query_embedding,
-                        "k": top_k,
-                    }
-                }
-            },
-            "_source": ["source_file", "text", "chunk_index"],
-        }
-
-        response = client.search(index=INDEX_NAME, body=search_query)
-        return response["hits"]["hits"]
+        query_embedding = embed_many([query_text], verbose=False)[0]
+        return _vector_search(get_search_backend(), query_embedding, top_k)
     except Exception as e:
         print(f"Semantic search error: {e}")
         return []
 
 
-def hybrid_search(query_text, top_k=20):
+def _keyword_leg(backend, query_text, size):
+    return backend.keyword(query_text, size)
+
+
+def _semantic_leg(backend, query_text, size):
+    query_embedding = embed_many([query_text], verbose=False)[0]
+    return _vector_search(backend, query_embedding, size)
+
+
+def _timed(leg, *args):
+    start = time.perf_counter()
+    hits = leg(*args)
+    return hits, time.perf_counter() - start
+
+
+@timed("search.hybrid")
+@cached_search("hybrid", INDEX_NAME)
+def hybrid_search(
+    query_text,
+    top_k=20,
+    fusion="rrf",
+    candidate_k=HYBRID_CANDIDATES,
+    keyword_weight=1.0,
+    semantic_weight=1.0,
+    rrf_k=60,
+):
     """
     Perform hybrid search: semantic + keyword.
+
+    The BM25 and kNN legs run concurrently, each fetching ``candidate_k``
+    candidates, and are fused either with reciprocal rank fusion ("rrf") or
+    with min-max normalized weighted scores ("weighted"). If one leg fails the
+    other leg's results are returned as ``PartialResults`` (not cached) and
+    the failure is reported. Per-leg latency is recorded in ``hybrid_latency``.
+    """
+    backend = get_search_backend()
+    size = max(candidate_k, top_k)
+
+    futures = {
+        "keyword": _leg_executor.submit(bind_trace(_timed), _keyword_leg, backend, query_text, size),
+        "semantic": _leg_executor.submit(bind_trace(_timed), _semantic_leg, backend, query_text, size),
+    }
+    legs = {}
+    for name, future in futures.items():
+        try:
+            hits, elapsed = future.result()
+            legs[name] = hits
+            hybrid_latency.record(name, elapsed)
+        except Exception as e:
+            print(f"Hybrid search {name} leg error: {e}")
+
+    partial = len(legs) < len(futures)
+    return _fuse(legs, top_k, fusion, keyword_weight, semantic_weight, rrf_k, partial)
+
+
+def _fuse(legs, top_k, fusion, keyword_weight, semantic_weight, rrf_k, partial=False):
+    if not legs:
+        return []
+
+    weights = {"keyword": keyword_weight, "semantic": semantic_weight}
+    if fusion == "weighted":
+        results = weighted_score_fusion(legs, weights, top_k=top_k)
+    else:
+        results = reciprocal_rank_fusion(legs, weights, rrf_k=rrf_k, top_k=top_k)
+    # A missing or degraded leg degrades the ranking; keep it out of the result cache
+    partial = partial or any(isinstance(hits, PartialResults) for hits in legs.values())
+    return PartialResults(results) if partial else results
+
+
+async def _async_vector_search(backend, query_vector, size):
+    """
+    Async ``_vector_search``.
     """
-    client = get_opensearch_client(HOST, PORT)
+    transform = get_embedding_transform()
+    if transform is None:
+        return await backend.async_vector(query_vector, size)
+
+    encoded = transform.encode([query_vector], quantize=backend.quantized_vectors)[0]
+    if not _rescores(transform, backend):
+        return await backend.async_vector(encoded, size)
+    hits = await backend.async_vector(encoded, size * RESCORE_OVERSAMPLE)
+    # The cache lookup is SQLite and misses go to Ollama; keep both off the event loop
+    return await asyncio.get_running_loop().run_in_executor(
+        None, bind_trace(_rescore_hits), hits, query_vector, size
+    )
+
+
+async def _async_semantic_leg(backend, query_text, size):
+    query_embedding = (await async_embed_many([query_text], verbose=False))[0]
+    return await _async_vector_search(backend, query_embedding, size)
+
+
+async def _async_timed(name, leg):
+    start = time.perf_counter()
+    hits = await leg
+    hybrid_latency.record(name, time.perf_counter() - start)
+    return hits
+
 
+@timed("search.async_keyword")
+@cached_async_search("keyword", INDEX_NAME)
+async def async_keyword_search(query_text, top_k=20):
+    """
+    Async ``keyword_search`` for callers already running an event loop.
+    """
     try:
-        query_embedding = get_embedding(query_text)
-
-        search_query = {
-            "size": top_k,
-            "query": {
-                "bool": {
-                    "should": [
-                        {
-                            "knn": {
-                                "embedding": {
-                                    "vector": query_embedding,
-                                    "k": top_k
-                                }
-                            }
-                        },
-                        {"match": {"text": query_text}},
-                    ]
-                }
-            },
-            "_source": ["source_file", "text", "chunk_index"],
-        }
+        return await get_search_backend().async_keyword(query_text, top_k)
+    except Exception as e:
+        print(f"Keyword search error: {e}")
+        return []
 
-        response = client.search(index=INDEX_NAME, body=search_query)
-        return response["hits"]["hits"]
+
+@timed("search.async_semantic")
+@cached_async_search("semantic", INDEX_NAME)
+async def async_semantic_search(query_text, top_k=20):
+    """
+    Async ``semantic_search`` for callers already running an event loop.
+    """
+    try:
+        return await _async_semantic_leg(get_search_backend(), query_text, top_k)
     except Exception as e:
-        print(f"Hybrid search error: {e}")
-        return keyword_search(query_text, top_k)
+        print(f"Semantic search error: {e}")
+        return []
 
 
-def iterative_search(query_text, refinement_steps=3, top_k=20):
+@timed("search.async_hybrid")
+@cached_async_search("hybrid", INDEX_NAME)
+async def async_hybrid_search(
+    query_text,
+    top_k=20,
+    fusion="rrf",
+    candidate_k=HYBRID_CANDIDATES,
+    keyword_weight=1.0,
+    semantic_weight=1.0,
+    rrf_k=60,
+):
     """
-    Perform iterative keyword search with query refinement.
+    Async ``hybrid_search``: both legs are awaited concurrently on the event
+    loop instead of on the leg thread pool, with the same fusion and
+    single-leg fallback.
     """
-    client = get_opensearch_client(HOST, PORT)
-    all_results = []
-    current_query = query_text
+    backend = get_search_backend()
+    size = max(candidate_k, top_k)
 
-    for step in range(refinement_steps):
+    names = ("keyword", "semantic")
+    results = await asyncio.gather(
+        _async_timed("keyword", backend.async_keyword(query_text, size)),
+        _async_timed("semantic", _async_semantic_leg(backend, query_text, size)),
+        return_exceptions=True,
+    )
+    legs = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"Hybrid search {name} leg error: {result}")
+        else:
+            legs[name] = result
+
+    partial = len(legs) < len(names)
+    return _fuse(legs, top_k, fusion, keyword_weight, semantic_weight, rrf_k, partial)
+
+
+async def aclose():
+    """
+    Close the aiohttp session and AsyncOpenSearch clients the async searches
+    opened on the running event loop. Call before the loop shuts down.
+    """
+    await close_async_session()
+    await close_async_opensearch_clients()
+
+
+@timed("search.batch")
+def batch_search(
+    queries,
+    mode="hybrid",
+    top_k=20,
+    fusion="rrf",
+    candidate_k=HYBRID_CANDIDATES,
+    keyword_weight=1.0,
+    semantic_weight=1.0,
+    rrf_k=60,
+    msearch_size=MSEARCH_BATCH_SIZE,
+):
+    """
+    Run many queries with one embedding batch and batched backend requests.
+
+    Args:
+        queries (list): Query strings.
+        mode (str): "keyword", "semantic" or "hybrid".
+        top_k (int): Results per query.
+        msearch_size (int): Maximum searches per ``_msearch`` request; a
+            hybrid query counts as two.
+
+    Returns:
+        list: One dict per query, in input order, with ``query``,
+        ``results`` and ``error`` (None on success). In hybrid mode a failed
+        leg sets ``error`` while the other leg's results are still returned.
+    """
+    if mode not in ("keyword", "semantic", "hybrid"):
+        raise ValueError(f"mode must be 'keyword', 'semantic' or 'hybrid', got '{mode}'")
+
+    queries = list(queries)
+    outcomes = [{"query": query, "results": [], "error": None} for query in queries]
+    if not queries:
+        return outcomes
+
+    backend = get_search_backend()
+    size = max(candidate_k, top_k) if mode == "hybrid" else top_k
+    transform = get_embedding_transform()
+    rescoring = transform is not None and _rescores(transform, backend)
+    searches, owners = [], []
+
+    if mode in ("keyword", "hybrid"):
+        for i, query in enumerate(queries):
+            searches.append(("keyword", query, size))
+            owners.append((i, "keyword"))
+
+    vectors = None
+    if mode in ("semantic", "hybrid"):
         try:
-            search_query = {
-                "size": top_k,
-                "query": {"match": {"text": current_query}},
-                "_source": ["source_file", "text", "chunk_index"],
-            }
+            vectors = embed_many(queries, verbose=False)
+        except Exception as e:
+            for outcome in outcomes:
+                outcome["error"] = f"semantic leg: {e}"
+        if vectors is not None:
+            encoded = vectors
+            vector_size = size
+            if transform is not None:
+                encoded = transform.encode(vectors, quantize=backend.quantized_vectors)
+            if rescoring:
+                vector_size = size * RESCORE_OVERSAMPLE
+            for i, vector in enumerate(encoded):
+                searches.append(("vector", vector, vector_size))
+                owners.append((i, "semantic"))
+
+    legs = [{} for _ in queries]
+    for (i, leg), result in zip(owners, backend.multi_search(searches, chunk_size=msearch_size)):
+        if isinstance(result, Exception):
+            outcomes[i]["error"] = f"{leg} leg: {result}"
+        else:
+            legs[i][leg] = result
+
+    if rescoring and vectors is not None:
+        for i, query_legs in enumerate(legs):
+            if "semantic" in query_legs:
+                query_legs["semantic"] = _rescore_hits(query_legs["semantic"], vectors[i], size)
 
-            response = client.search(index=INDEX_NAME, body=search_query)
-            results = response["hits"]["hits"]
+    for outcome, query_legs in zip(outcomes, legs):
+        if mode == "hybrid":
+            outcome["results"] = _fuse(
+                query_legs, top_k, fusion, keyword_weight, semantic_weight, rrf_k
+            )
+        else:
+            outcome["results"] = next(iter(query_legs.values()), [])[:top_k]
+    return outcomes
 
-            for result in results:
-                if result not in all_results:
-                    all_results.append(result)
 
-            if not results:
-                break
+@timed("search.diverse")
+@cached_search("diverse", INDEX_NAME)
+def diverse_search(
+    query_text,
+    top_k=20,
+    mode="hybrid",
+    candidate_k=MMR_CANDIDATES,
+    lambda_mult=MMR_LAMBDA,
+    max_per_file=MAX_PER_FILE,
+):
+    """
+    Search with maximal marginal relevance and a per-file cap.
+
+    ``candidate_k`` candidates are retrieved with the ``mode`` search, then
+    ``top_k`` are picked that are relevant to the query but not to each
+    other, with at most ``max_per_file`` from any source file until the
+    other files run out. Candidate vectors come from the embedding cache,
+    which ingestion fills, and misses are embedded; candidates that still
+    have none are ranked after the MMR picks. Results that needed such
+    filler, came from a degraded search, or are the plain top ``top_k``
+    returned when the query cannot be embedded, are ``PartialResults`` and
+    not cached.
+    """
+    search = {"keyword": keyword_search, "semantic": semantic_search, "hybrid": hybrid_search}.get(mode)
+    if search is None:
+        raise ValueError(f"mode must be 'keyword', 'semantic' or 'hybrid', got '{mode}'")
+
+    hits = search(query_text, max(candidate_k, top_k))
+    if not hits:
+        return []
+    try:
+        query_vector = embed_many([query_text], verbose=False)[0]
+    except Exception as e:
+        print(f"Diverse search embedding error: {e}")
+        return PartialResults(hits[:top_k])
+
+    vectors = _candidate_vectors(hits)
+    found = [i for i, vector in enumerate(vectors) if vector is not None]
+    missing = [hits[i] for i, vector in enumerate(vectors) if vector is None]
+    increment("search.mmr_uncached", len(missing))
+
+    with span("search.mmr", candidates=len(found)):
+        selected = diversify(
+            [hits[i] for i in found],
+            query_vector,
+            [vectors[i] for i in found],
+            top_k,
+            lambda_mult,
+            max_per_file,
+        )
+    results = selected + missing[:top_k - len(selected)]
+    # Undiversified filler or degraded candidates are not worth caching
+    if isinstance(hits, PartialResults) or len(results) > len(selected):
+        return PartialResults(results)
+    return results
+
+
+def _chunk_key(hit):
+    source = hit.get("_source", {})
+    return (source.get("source_file"), source.get("chunk_index"))
+
+
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@timed("search.iterative")
+def iterative_search(
+    query_text,
+    refinement_steps=3,
+    top_k=20,
+    feedback_k=5,
+    alpha=1.0,
+    beta=0.75,
+    time_budget=ITERATIVE_TIME_BUDGET,
+):
+    """
+    Perform iterative search with vector-space query refinement.
 
-            top_text = results[0]["_source"]["text"]
-            current_query += " " + top_text.split(".")[0]
+    The first step combines BM25 and kNN hits for the original query. Each
+    later step moves the query vector towards the centroid of the top
+    ``feedback_k`` new hits of the previous step (Rocchio:
+    ``alpha * original + beta * centroid``) and runs a kNN search with it.
+    Hits are deduplicated on (source_file, chunk_index). Exploration stops
+    early when a step finds nothing new, or when ``time_budget`` seconds
+    have elapsed.
+    """
+    backend = get_search_backend()
+    start = time.perf_counter()
+    all_results = {}
+
+    try:
+        original = _unit(np.asarray(embed_many([query_text], verbose=False)[0], dtype="float32"))
+    except Exception as e:
+        print(f"Iterative search embedding error: {e}")
+        return []
+    query_vector = original
 
+    for step in range(refinement_steps):
+        try:
+            results = _vector_search(backend, query_vector.tolist(), top_k)
+            if step == 0:
+                results = backend.keyword(query_text, top_k) + results
         except Exception as e:
             print(f"Iterative search error at step {step}: {e}")
             break
 
-    return all_results
+        new_hits = []
+        for result in results:
+            key = _chunk_key(result)
+            if key not in all_results:
+                all_results[key] = result
+                new_hits.append(result)
+
+        if not new_hits:
+            break
+        if time.perf_counter() - start > time_budget:
+            print(f"Iterative search stopped after step {step}: time budget {time_budget}s used.")
+            break
+        if step == refinement_steps - 1:
+            break
+
+        feedback = [hit["_source"].get("text", "") for hit in new_hits[:feedback_k]]
+        try:
+            feedback_vectors = np.asarray(embed_many(feedback, verbose=False), dtype="float32")
+        except Exception as e:
+            print(f"Iterative search embedding error at step {step}: {e}")
+            break
+        centroid = _unit(feedback_vectors.mean(axis=0))
+        query_vector = _unit(alpha * original + beta * centroid)
+
+    return list(all_results.values())
 
 
 if __name__ == "__main__":
@@ -1,14 +1,459 @@
-import faiss, numpy as np
+import json
+import os
+import sqlite3
+import uuid
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+INDEX_FILE = "index.faiss"
+DOCS_FILE = "docs.sqlite"
+CONFIG_FILE = "config.json"
+# HNSW stores are rebuilt without their tombstones once these exceed this share of the index
+HNSW_MAX_TOMBSTONE_RATIO = 0.2
+
 
 class VectorStore:
-    def __init__(self, dim=384):
-        self.index = faiss.IndexFlatL2(dim)
-        self.texts = []
+    """
+    Local FAISS vector store with stable external ids.
+
+    Vectors live in a FAISS index ("flat", "hnsw" or "ivfpq") addressed by
+    int64 ids; texts, metadata and the external-id map live in SQLite, so
+    neither has to be held in Python lists. The SQLite table is kept in
+    memory unless ``path`` is given. IVF-PQ stores must be trained on a
+    sample of the corpus before the first ``add``; saved ones can be loaded
+    with their inverted lists memory-mapped for read-only serving.
+    """
+
+    def __init__(
+        self,
+        dim=768,
+        index_type="flat",
+        metric="cosine",
+        hnsw_m=32,
+        ef_construction=200,
+        ef_search=64,
+        nlist=256,
+        pq_m=16,
+        pq_bits=8,
+        nprobe=16,
+        path=None,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {INDEX_TYPES}, got '{index_type}'")
+        if metric not in ("cosine", "l2"):
+            raise ValueError(f"metric must be 'cosine' or 'l2', got '{metric}'")
+
+        self.config = {
+            "dim": dim,
+            "index_type": index_type,
+            "metric": metric,
+            "hnsw_m": hnsw_m,
+            "ef_construction": ef_construction,
+            "ef_search": ef_search,
+            "nlist": nlist,
+            "pq_m": pq_m,
+            "pq_bits": pq_bits,
+            "nprobe": nprobe,
+        }
+        self.index = self._build_index()
+        self.read_only = False
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._conn = self._open_docs(os.path.join(path, DOCS_FILE))
+        else:
+            self._conn = self._open_docs(":memory:")
+
+    @property
+    def dim(self):
+        return self.config["dim"]
+
+    def _build_index(self):
+        config = self.config
+        dim = config["dim"]
+        faiss_metric = (
+            faiss.METRIC_INNER_PRODUCT if config["metric"] == "cosine" else faiss.METRIC_L2
+        )
+
+        if config["index_type"] == "hnsw":
+            base = faiss.IndexHNSWFlat(dim, config["hnsw_m"], faiss_metric)
+            base.hnsw.efConstruction = config["ef_construction"]
+            base.hnsw.efSearch = config["ef_search"]
+        elif config["index_type"] == "ivfpq":
+            quantizer = (
+                faiss.IndexFlatIP(dim) if config["metric"] == "cosine" else faiss.IndexFlatL2(dim)
+            )
+            base = faiss.IndexIVFPQ(
+                quantizer, dim, config["nlist"], config["pq_m"], config["pq_bits"], faiss_metric
+            )
+            base.nprobe = config["nprobe"]
+        else:
+            base = faiss.IndexFlat(dim, faiss_metric)
+
+        return faiss.IndexIDMap2(base)
+
+    @staticmethod
+    def _open_docs(path):
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                int_id INTEGER PRIMARY KEY,
+                ext_id TEXT UNIQUE NOT NULL,
+                text TEXT,
+                metadata TEXT,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.commit()
+        return conn
+
+    def _prepare(self, vectors):
+        vectors = np.ascontiguousarray(np.asarray(vectors, dtype="float32"))
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dim {self.dim}, got {vectors.shape[1]}")
+        if self.config["metric"] == "cosine":
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    @property
+    def is_trained(self):
+        return self.index.is_trained
+
+    @property
+    def _supports_remove(self):
+        # HNSW graphs cannot drop nodes; deleted ids are filtered at query time
+        return self.config["index_type"] != "hnsw"
+
+    def train(self, embeddings):
+        """
+        Train the IVF-PQ coarse quantizer and codebooks on sample vectors.
+
+        The sample should be drawn from across the corpus (FAISS suggests
+        around 39 vectors per list): centroids fitted to one file cluster
+        everything else into a few lists.
+        """
+        vectors = self._prepare(embeddings)
+        if vectors.shape[0] < self.config["nlist"]:
+            raise ValueError(
+                f"IVF-PQ training needs at least nlist={self.config['nlist']} vectors, "
+                f"got {vectors.shape[0]}."
+            )
+        self.index.train(vectors)
+
+    def add(self, embeddings, texts, ids=None, metadata=None):
+        """
+        Add (or replace) vectors under external ids.
+
+        Args:
+            embeddings: Array-like of shape (n, dim).
+            texts (list): Text for each vector.
+            ids (list): External string ids; generated ("auto:<uuid>") if None.
+            metadata (list): Optional JSON-serializable dict per vector.
+
+        Returns:
+            list: The external ids of the added vectors.
+        """
+        if self.read_only:
+            raise RuntimeError("VectorStore was loaded memory-mapped and is read-only.")
+
+        vectors = self._prepare(embeddings)
+        if len(texts) != vectors.shape[0]:
+            raise ValueError("embeddings and texts must have the same length")
+        if not self.index.is_trained:
+            raise RuntimeError("The IVF-PQ index is not trained; call train() on a sample of the corpus first.")
+
+        if ids is None:
+            # A separate namespace, so generated ids never collide with caller ids like "5"
+            ids = [f"auto:{uuid.uuid4().hex}" for _ in range(len(texts))]
+        else:
+            ids = [str(i) for i in ids]
+            self.delete(ids)
+        metadata = metadata or [None] * len(texts)
+
+        self._conn.executemany(
+            "INSERT INTO docs (ext_id, text, metadata) VALUES (?, ?, ?)",
+            [
+                (ext_id, text, json.dumps(meta) if meta is not None else None)
+                for ext_id, text, meta in zip(ids, texts, metadata)
+            ],
+        )
+        placeholders = ",".join("?" * len(ids))
+        int_ids = np.array(
+            [
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT int_id FROM docs WHERE ext_id IN ({placeholders}) ORDER BY int_id",
+                    ids,
+                )
+            ],
+            dtype="int64",
+        )
+        self._conn.commit()
+
+        self.index.add_with_ids(vectors, int_ids)
+        return ids
+
+    def delete(self, ids):
+        """
+        Delete vectors by external id. Unknown ids are ignored.
+
+        Returns:
+            int: Number of deleted vectors.
+        """
+        if self.read_only:
+            raise RuntimeError("VectorStore was loaded memory-mapped and is read-only.")
+        ids = [str(i) for i in ids]
+        if not ids:
+            return 0
+
+        placeholders = ",".join("?" * len(ids))
+        int_ids = [
+            row[0]
+            for row in self._conn.execute(
+                f"SELECT int_id FROM docs WHERE deleted = 0 AND ext_id IN ({placeholders})", ids
+            )
+        ]
+        if not int_ids:
+            return 0
+
+        if self._supports_remove:
+            self.index.remove_ids(np.array(int_ids, dtype="int64"))
+            self._conn.execute(f"DELETE FROM docs WHERE ext_id IN ({placeholders})", ids)
+        else:
+            # Keep the row as a tombstone, but free the external id for reuse
+            self._conn.executemany(
+                "UPDATE docs SET deleted = 1, ext_id = '__deleted__:' || int_id WHERE int_id = ?",
+                [(int_id,) for int_id in int_ids],
+            )
+        self._conn.commit()
+        if not self._supports_remove and self._tombstones() > HNSW_MAX_TOMBSTONE_RATIO * self.index.ntotal:
+            self.compact()
+        return len(int_ids)
+
+    def _tombstones(self):
+        return self._conn.execute("SELECT COUNT(*) FROM docs WHERE deleted = 1").fetchone()[0]
 
-    def add(self, embeddings, texts):
-        self.index.add(np.array(embeddings))
-        self.texts.extend(texts)
+    def compact(self):
+        """
+        Rebuild an HNSW index from its live vectors, dropping tombstones.
+        Other index types remove vectors on delete and have none.
+        """
+        if self._supports_remove:
+            return
+        if self.read_only:
+            raise RuntimeError("VectorStore was loaded memory-mapped and is read-only.")
+        id_map = faiss.vector_to_array(self.index.id_map)
+        storage = faiss.downcast_index(faiss.downcast_index(self.index.index).storage)
+        vectors = faiss.vector_to_array(storage.codes).view("float32").reshape(-1, self.dim)
+        live_ids = [row[0] for row in self._conn.execute("SELECT int_id FROM docs WHERE deleted = 0")]
+        live = np.isin(id_map, live_ids)
+
+        index = self._build_index()
+        # Stored vectors are already normalized for cosine
+        index.add_with_ids(np.ascontiguousarray(vectors[live]), id_map[live])
+        self.index = index
+        self._conn.execute("DELETE FROM docs WHERE deleted = 1")
+        self._conn.commit()
+
+    def search(self, query_embeddings, k=10):
+        """
+        Search many queries at once.
+
+        Args:
+            query_embeddings: Array-like of shape (n_queries, dim) or (dim,).
+            k (int): Results per query.
+
+        Returns:
+            list: Per query, a list of dicts with id, score, text and metadata,
+            best first. Scores are cosine similarity or L2 distance.
+        """
+        queries = self._prepare(query_embeddings)
+        if self.index.ntotal == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        # HNSW results may include tombstones: over-fetch a little, and only
+        # widen (up to k + tombstones) for queries that came up short
+        limit = min(k + self._tombstones(), self.index.ntotal)
+        fetch_k = min(2 * k if limit > k else k, limit)
+        while True:
+            scores, int_ids = self.index.search(queries, fetch_k)
+            results = self._resolve(scores, int_ids, k)
+            if fetch_k >= limit or all(len(hits) == k for hits in results):
+                return results
+            fetch_k = min(4 * fetch_k, limit)
+
+    def _resolve(self, scores, int_ids, k):
+        wanted = {int(i) for i in int_ids.ravel() if i >= 0}
+        docs = {}
+        if wanted:
+            placeholders = ",".join("?" * len(wanted))
+            for int_id, ext_id, text, meta in self._conn.execute(
+                f"SELECT int_id, ext_id, text, metadata FROM docs "
+                f"WHERE deleted = 0 AND int_id IN ({placeholders})",
+                list(wanted),
+            ):
+                docs[int_id] = {
+                    "id": ext_id,
+                    "text": text,
+                    "metadata": json.loads(meta) if meta else None,
+                }
+
+        results = []
+        for row_scores, row_ids in zip(scores, int_ids):
+            hits = []
+            for score, int_id in zip(row_scores, row_ids):
+                doc = docs.get(int(int_id))
+                if doc is None:
+                    continue
+                hits.append({**doc, "score": float(score)})
+                if len(hits) == k:
+                    break
+            results.append(hits)
+        return results
+
+    def get(self, ids):
+        """
+        Fetch stored documents by external id.
+
+        Returns:
+            dict: External id -> dict with id, text and metadata.
+        """
+        ids = [str(i) for i in ids]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        return {
+            ext_id: {"id": ext_id, "text": text, "metadata": json.loads(meta) if meta else None}
+            for ext_id, text, meta in self._conn.execute(
+                f"SELECT ext_id, text, metadata FROM docs WHERE deleted = 0 AND ext_id IN ({placeholders})",
+                ids,
+            )
+        }
+
+    def update_metadata(self, ids, updates):
+        """
+        Merge ``updates`` (one dict per id) into the stored metadata of
+        existing documents; vectors and text are untouched. Unknown ids are
+        ignored.
+
+        Returns:
+            int: Number of updated documents.
+        """
+        if self.read_only:
+            raise RuntimeError("VectorStore was loaded memory-mapped and is read-only.")
+        current = self.get(ids)
+        rows = []
+        for ext_id, update in zip((str(i) for i in ids), updates):
+            doc = current.get(ext_id)
+            if doc is not None:
+                rows.append((json.dumps({**(doc["metadata"] or {}), **update}), ext_id))
+        self._conn.executemany("UPDATE docs SET metadata = ? WHERE deleted = 0 AND ext_id = ?", rows)
+        self._conn.commit()
+        return len(rows)
 
     def query(self, q_emb, k=3):
-        D, I = self.index.search(np.array([q_emb]), k)
-        return [self.texts[i] for i in I[0]]
+        """
+        Return the texts of the ``k`` nearest neighbours of a single query.
+        """
+        return [hit["text"] for hit in self.search([q_emb], k)[0]]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM docs WHERE deleted = 0").fetchone()[0]
+
+    def ext_ids(self) -> set:
+        """
+        External ids of all live documents.
+        """
+        return {row[0] for row in self._conn.execute("SELECT ext_id FROM docs WHERE deleted = 0")}
+
+    def is_consistent(self) -> bool:
+        # Every docs row (tombstones included) has exactly one vector in the index
+        (rows,) = self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()
+        return rows == self.index.ntotal
+
+    def repair(self) -> list:
+        """
+        Reconcile the document table with the FAISS index after a crash
+        between a SQLite commit and the next ``save``.
+
+        Documents without a vector are deleted; vectors without a document
+        are removed (or, for HNSW, recorded as tombstones).
+
+        Returns:
+            list: External ids of the deleted documents.
+        """
+        indexed = set(faiss.vector_to_array(self.index.id_map).tolist())
+        rows = self._conn.execute("SELECT int_id, ext_id, deleted FROM docs").fetchall()
+        orphans = [(int_id, ext_id, deleted) for int_id, ext_id, deleted in rows if int_id not in indexed]
+        stray = sorted(indexed - {int_id for int_id, _, _ in rows})
+
+        self._conn.executemany("DELETE FROM docs WHERE int_id = ?", [(int_id,) for int_id, _, _ in orphans])
+        if stray and self._supports_remove:
+            self.index.remove_ids(np.array(stray, dtype="int64"))
+        elif stray:
+            self._conn.executemany(
+                "INSERT INTO docs (int_id, ext_id, deleted) VALUES (?, '__deleted__:' || ?, 1)",
+                [(int_id, int_id) for int_id in stray],
+            )
+        self._conn.commit()
+        return [ext_id for _, ext_id, deleted in orphans if not deleted]
+
+    def save(self, path):
+        """
+        Write the index, document table and config to directory ``path``.
+        """
+        os.makedirs(path, exist_ok=True)
+        # Write then rename, so a crash mid-write leaves the previous index intact
+        index_path = os.path.join(path, INDEX_FILE)
+        faiss.write_index(self.index, f"{index_path}.tmp")
+        os.replace(f"{index_path}.tmp", index_path)
+
+        docs_path = os.path.join(path, DOCS_FILE)
+        if os.path.abspath(docs_path) != os.path.abspath(self._docs_path()):
+            target = sqlite3.connect(docs_path)
+            self._conn.backup(target)
+            target.close()
+
+        with open(os.path.join(path, CONFIG_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.config, f, indent=2)
+
+    def _docs_path(self):
+        return self._conn.execute("PRAGMA database_list").fetchone()[2] or ":memory:"
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a store saved with ``save``.
+
+        With ``mmap=True`` the store is read-only and documents are read from
+        SQLite on demand. FAISS can only memory-map the inverted lists of IVF
+        indexes, so only the "ivfpq" profile avoids reading its vectors into
+        RAM; "flat" and "hnsw" indexes are loaded fully either way. Use
+        ``mmap=False`` to load a store that will be modified.
+        """
+        with open(os.path.join(path, CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        store = cls.__new__(cls)
+        store.config = config
+
+        index_path = os.path.join(path, INDEX_FILE)
+        if mmap and config["index_type"] == "ivfpq":
+            flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+            store.index = faiss.read_index(index_path, flags)
+        else:
+            store.index = faiss.read_index(index_path)
+        store.read_only = mmap
+
+        if config["index_type"] == "hnsw":
+            faiss.downcast_index(store.index.index).hnsw.efSearch = config["ef_search"]
+        elif config["index_type"] == "ivfpq":
+            faiss.extract_index_ivf(store.index).nprobe = config["nprobe"]
+
+        store._conn = cls._open_docs(os.path.join(path, DOCS_FILE))
+        return store
@@ -1,9 +1,174 @@
+import asyncio
 import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from requests.adapters import HTTPAdapter
+
+from Agent.metrics.instrumentation import bind_trace, increment, span, timed
+from Agent.vectors.embedding_cache import get_embedding_cache
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+DEFAULT_MODEL = "nomic-embed-text"
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_CONCURRENCY = 4
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = 120
+ASYNC_POOL_SIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def get_session(pool_size: int = 16) -> requests.Session:
+    """
+    Return the process-wide HTTP session used for Ollama requests.
+
+    The session keeps connections alive between calls, so consecutive
+    batches reuse the same sockets instead of reconnecting each time.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections to Ollama.
+
+    Returns:
+        requests.Session: Shared session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _embed_batch(texts: list, model: str, max_retries: int) -> list:
+    """
+    Embed one batch of texts with Ollama's multi-input /api/embed endpoint,
+    retrying the whole batch with exponential backoff on failure.
+    """
+    url = f"{OLLAMA_URL}/api/embed"
+    payload = {"model": model, "input": texts}
+
+    for attempt in range(max_retries + 1):
+        try:
+            with span("ollama.embed", texts=len(texts), attempt=attempt):
+                response = get_session().post(url, json=payload, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                embeddings = response.json()["embeddings"]
+                if len(embeddings) != len(texts):
+                    raise Exception(
+                        f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                    )
+                return embeddings
+            error = Exception(
+                f"Failed to get embedding: {response.status_code}, {response.text}"
+            )
+        except requests.RequestException as e:
+            error = e
+
+        increment("ollama.embed.failures")
+        if attempt < max_retries:
+            time.sleep(0.5 * (2 ** attempt))
+
+    raise error
+
+
+def embed_many(
+    texts: list,
+    model: str = DEFAULT_MODEL,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_retries: int = MAX_RETRIES,
+    verbose: bool = True,
+    use_cache: bool = True,
+) -> list:
+    """
+    Generate embeddings for many texts in batches using a local Ollama model.
+
+    Args:
+        texts (list): The text inputs to be embedded.
+        model (str): The name of the Ollama model to use (default: nomic-embed-text).
+        batch_size (int): Number of texts sent per request.
+        concurrency (int): Maximum number of batches in flight at once.
+        max_retries (int): Retries per batch before giving up.
+        verbose (bool): Print throughput (chunks/sec) when done.
+        use_cache (bool): Consult the persistent embedding cache first and
+            only send cache misses to Ollama.
+
+    Returns:
+        list: Embedding vectors in the same order as ``texts``.
+    """
+    if not texts:
+        return []
+
+    start = time.perf_counter()
+    cache, embeddings, missing = _lookup_cached(texts, model, use_cache)
+    pending = list(missing)
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    if len(batches) <= 1 or concurrency <= 1:
+        results = [_embed_batch(batch, model, max_retries) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as executor:
+            results = list(
+                executor.map(bind_trace(lambda batch: _embed_batch(batch, model, max_retries)), batches)
+            )
+
+    _store_fresh(cache, model, embeddings, missing, results)
+
+    if verbose:
+        _report(start, len(texts), len(pending), batch_size, concurrency)
+
+    return embeddings
+
+
+def _lookup_cached(texts, model, use_cache):
+    cache = get_embedding_cache() if use_cache else None
+    # Not ``if cache``: EmbeddingCache defines __len__, so an empty cache is falsy
+    embeddings = cache.get_many(model, texts) if cache is not None else [None] * len(texts)
+
+    # Embed each distinct missing text once, even if it repeats in the input
+    missing = {}
+    for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+        if embedding is None:
+            missing.setdefault(text, []).append(i)
+    increment("embedding.texts", len(texts))
+    increment("embedding.cache_hits", len(texts) - sum(len(idx) for idx in missing.values()))
+    return cache, embeddings, missing
+
+
+def _store_fresh(cache, model, embeddings, missing, batch_results):
+    pending = list(missing)
+    fresh = [vector for batch in batch_results for vector in batch]
+    for text, vector in zip(pending, fresh):
+        for i in missing[text]:
+            embeddings[i] = vector
 
-def get_embedding(text: str, model: str = "nomic-embed-text") -> list:
+    if cache is not None and pending:
+        cache.put_many(model, pending, fresh)
+
+
+def _report(start, total, embedded, batch_size, concurrency):
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(
+        f" Embedded {total} chunks in {elapsed:.2f}s "
+        f"({rate:.1f} chunks/sec, {total - embedded} from cache, "
+        f"batch_size={batch_size}, concurrency={concurrency})"
+    )
+
+
+@timed("embedding.get_embedding")
+def get_embedding(text: str, model: str = DEFAULT_MODEL) -> list:
     """
     Generate embeddings for input text using a local Ollama model.
 
@@ -14,18 +179,129 @@ def get_embedding(text: str, model: str = "nomic-embed-text") -> list:
     Returns:
         list: Embedding vector (list of floats).
     """
-    url = "http://localhost:11434/api/embeddings"
-    payload = {
-        "model": model,
-        "prompt": text
-    }
+    return embed_many([text], model=model, verbose=False)[0]
 
-    response = requests.post(url, json=payload)
 
-    if response.status_code == 200:
-        return response.json()["embedding"]
-    else:
-        raise Exception(f"Failed to get embedding: {response.status_code}, {response.text}")
+def cached_embeddings(texts: list, model: str = DEFAULT_MODEL) -> list:
+    """
+    Look up embeddings in the persistent cache without calling Ollama.
+
+    Returns:
+        list: One entry per text, either the cached vector or None (also
+        None for every text when the cache is disabled).
+    """
+    cache = get_embedding_cache()
+    if cache is None:
+        return [None] * len(texts)
+    embeddings = cache.get_many(model, texts)
+    increment("embedding.cache_only_hits", sum(1 for vector in embeddings if vector is not None))
+    return embeddings
+
+
+def _get_async_session():
+    """
+    Return the aiohttp session for the running event loop.
+
+    aiohttp sessions are bound to the loop that created them, so one pooled
+    session is kept per loop.
+    """
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=ASYNC_POOL_SIZE, keepalive_timeout=30)
+        session = aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    """
+    Close the aiohttp session of the running event loop, if any.
+    """
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def _async_embed_batch(texts: list, model: str, max_retries: int) -> list:
+    import aiohttp
+
+    url = f"{OLLAMA_URL}/api/embed"
+    payload = {"model": model, "input": texts}
+
+    for attempt in range(max_retries + 1):
+        try:
+            with span("ollama.embed", texts=len(texts), attempt=attempt):
+                async with _get_async_session().post(url, json=payload) as response:
+                    status = response.status
+                    body = await (response.json() if status == 200 else response.text())
+            if status == 200:
+                embeddings = body["embeddings"]
+                if len(embeddings) != len(texts):
+                    raise Exception(
+                        f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                    )
+                return embeddings
+            error = Exception(f"Failed to get embedding: {status}, {body}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = e
+
+        increment("ollama.embed.failures")
+        if attempt < max_retries:
+            await asyncio.sleep(0.5 * (2 ** attempt))
+
+    raise error
+
+
+async def async_embed_many(
+    texts: list,
+    model: str = DEFAULT_MODEL,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_retries: int = MAX_RETRIES,
+    verbose: bool = False,
+    use_cache: bool = True,
+) -> list:
+    """
+    Async counterpart of ``embed_many`` on a shared aiohttp connection pool.
+
+    At most ``concurrency`` batches are in flight at once; the embedding
+    cache is consulted the same way.
+    """
+    if not texts:
+        return []
+
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    # The embedding cache is SQLite; keep its reads and writes off the event loop
+    cache, embeddings, missing = await loop.run_in_executor(None, bind_trace(_lookup_cached), texts, model, use_cache)
+    pending = list(missing)
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(batch):
+        async with semaphore:
+            return await _async_embed_batch(batch, model, max_retries)
+
+    results = await asyncio.gather(*(run(batch) for batch in batches))
+    await loop.run_in_executor(None, bind_trace(_store_fresh), cache, model, embeddings, missing, results)
+
+    if verbose:
+        _report(start, len(texts), len(pending), batch_size, concurrency)
+
+    return embeddings
+
+
+async def async_get_embedding(text: str, model: str = DEFAULT_MODEL) -> list:
+    """
+    Async counterpart of ``get_embedding``.
+    """
+    return (await async_embed_many([text], model=model))[0]
 
 
 if __name__ == "__main__":
@@ -35,5 +311,7 @@ if __name__ == "__main__":
         embedding = get_embedding(sample_text)
         print(" Embedding dimension:", len(embedding))
         print(" First 5 values:", embedding[:5])
+
+        embed_many([sample_text] * 256)
     except Exception as e:
         print(" Error:", e)
@@ -0,0 +1,272 @@
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+TRANSFORM_PATH = os.getenv("EMBEDDING_TRANSFORM_PATH", ".cache/embedding_transform.npz")
+TRANSFORM_ENABLED = os.getenv("EMBEDDING_TRANSFORM", "1") != "0"
+
+METHODS = ("none", "pca", "truncate")
+QUANTIZATIONS = ("none", "int8", "binary")
+
+
+def _unit_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class EmbeddingTransform:
+    """
+    Post-embedding transform applied identically at ingestion and query time.
+
+    Reduction is either PCA fitted on corpus vectors or Matryoshka-style
+    truncation to the leading ``dim`` components; outputs are re-normalized
+    to unit length. Quantization optionally maps the result to int8 (for
+    ``data_type: byte`` indexes) or packed sign bits (for binary indexes).
+    Quantized search should be followed by ``rescore`` on full vectors.
+    """
+
+    def __init__(self, method="none", dim=None, quantization="none"):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got '{method}'")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {QUANTIZATIONS}, got '{quantization}'")
+        if method != "none" and not dim:
+            raise ValueError(f"method '{method}' needs a target dim")
+        if quantization == "binary" and dim and dim % 8:
+            raise ValueError("binary quantization needs a dim that is a multiple of 8")
+        self.method = method
+        self.dim = dim
+        self.quantization = quantization
+        self.mean = None
+        self.components = None
+        self.int8_scale = None
+
+    def fit(self, vectors):
+        """
+        Fit PCA components and the int8 scale on a sample of corpus vectors.
+        """
+        vectors = np.asarray(vectors, dtype="float32")
+        if self.method == "pca":
+            if vectors.shape[0] < self.dim:
+                raise ValueError(f"PCA to {self.dim} dims needs at least {self.dim} vectors.")
+            self.mean = vectors.mean(axis=0)
+            _, _, vt = np.linalg.svd(vectors - self.mean, full_matrices=False)
+            self.components = vt[: self.dim].astype("float32")
+        if self.quantization == "int8":
+            reduced = self.reduce(vectors)
+            # A high percentile rather than the max keeps outliers from
+            # wasting most of the int8 range
+            self.int8_scale = float(np.percentile(np.abs(reduced), 99.9)) or 1.0
+        return self
+
+    def output_dim(self, input_dim):
+        """
+        Dimension of the indexed vector; bits for binary quantization.
+        """
+        return self.dim if self.method != "none" else input_dim
+
+    def reduce(self, vectors):
+        vectors = np.asarray(vectors, dtype="float32")
+        if self.method == "pca":
+            vectors = (vectors - self.mean) @ self.components.T
+        elif self.method == "truncate":
+            vectors = vectors[:, : self.dim]
+        return _unit_rows(vectors)
+
+    def quantize(self, vectors):
+        if self.quantization == "int8":
+            return np.clip(np.rint(vectors / self.int8_scale * 127), -128, 127).astype("int8")
+        if self.quantization == "binary":
+            # OpenSearch binary vectors are packed bits sent as signed bytes
+            return np.packbits(vectors > 0, axis=1).view("int8")
+        return vectors
+
+    def encode(self, vectors, quantize=True):
+        """
+        Reduce (and optionally quantize) embeddings for indexing or querying.
+
+        Returns:
+            list: One list of numbers per input vector.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype="float32"))
+        encoded = self.reduce(vectors)
+        if quantize:
+            encoded = self.quantize(encoded)
+        return encoded.tolist()
+
+    def save(self, path=TRANSFORM_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        arrays = {
+            "config": np.array(
+                json.dumps(
+                    {
+                        "method": self.method,
+                        "dim": self.dim,
+                        "quantization": self.quantization,
+                        "int8_scale": self.int8_scale,
+                    }
+                )
+            )
+        }
+        if self.method == "pca":
+            arrays["mean"] = self.mean
+            arrays["components"] = self.components
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path=TRANSFORM_PATH):
+        with np.load(path) as data:
+            config = json.loads(str(data["config"]))
+            transform = cls(config["method"], config["dim"], config["quantization"])
+            transform.int8_scale = config["int8_scale"]
+            if transform.method == "pca":
+                transform.mean = data["mean"]
+                transform.components = data["components"]
+        return transform
+
+
+def rescore(hits, query_vector, candidate_vectors, top_k):
+    """
+    Re-rank candidate hits by cosine similarity of full-precision vectors.
+
+    Args:
+        hits (list): Candidate hits from a reduced/quantized search.
+        query_vector: Full-precision query embedding.
+        candidate_vectors: Full-precision embeddings of ``hits``, in order.
+        top_k (int): Number of hits to keep.
+
+    Returns:
+        list: The best ``top_k`` hits with ``_score`` set to the cosine score.
+    """
+    if not hits:
+        return []
+    query = _unit_rows(np.atleast_2d(np.asarray(query_vector, dtype="float32")))[0]
+    scores = _unit_rows(np.asarray(candidate_vectors, dtype="float32")) @ query
+    order = np.argsort(-scores)[:top_k]
+    results = []
+    for i in order:
+        hit = dict(hits[i])
+        hit["_score"] = float(scores[i])
+        results.append(hit)
+    return results
+
+
+_transform = None
+_transform_lock = threading.Lock()
+
+
+def get_embedding_transform():
+    """
+    Return the fitted transform at EMBEDDING_TRANSFORM_PATH, or None if there
+    is none or it is disabled with ``EMBEDDING_TRANSFORM=0``.
+    """
+    global _transform
+    if not TRANSFORM_ENABLED or not os.path.exists(TRANSFORM_PATH):
+        return None
+    if _transform is None:
+        with _transform_lock:
+            if _transform is None:
+                _transform = EmbeddingTransform.load(TRANSFORM_PATH)
+    return _transform
+
+
+def _top_k(scores, k):
+    idx = np.argpartition(-scores, min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, idx, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def _recall(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def recall_report(corpus, queries, k=10, dims=(768, 512, 256, 128), oversample=4):
+    """
+    Measure recall@k and bytes per vector for reduction/quantization settings.
+
+    Ground truth is exact cosine top-k on the full vectors. Quantized
+    settings are measured both raw and with a full-precision rescoring pass
+    over the top ``k * oversample`` candidates.
+
+    Returns:
+        list: One dict per setting.
+    """
+    corpus = _unit_rows(np.asarray(corpus, dtype="float32"))
+    queries = _unit_rows(np.asarray(queries, dtype="float32"))
+    full_dim = corpus.shape[1]
+    truth = _top_k(queries @ corpus.T, k)
+    exact = queries @ corpus.T
+
+    rows = []
+    for method in ("truncate", "pca"):
+        for dim in dims:
+            if dim > full_dim or (method == "pca" and dim > corpus.shape[0]):
+                continue
+            for quantization in QUANTIZATIONS:
+                transform = EmbeddingTransform(method, dim, quantization).fit(corpus)
+                c = np.asarray(transform.encode(corpus), dtype="float32")
+                q = np.asarray(transform.encode(queries), dtype="float32")
+                if quantization == "binary":
+                    # Matching bits, as +1/-1 dot products
+                    c = np.unpackbits(c.astype("int8").view("uint8"), axis=1) * 2.0 - 1
+                    q = np.unpackbits(q.astype("int8").view("uint8"), axis=1) * 2.0 - 1
+                scores = q @ c.T
+
+                bytes_per_vector = {"none": dim * 4, "int8": dim, "binary": dim // 8}[quantization]
+                row = {
+                    "method": method,
+                    "dim": dim,
+                    "quantization": quantization,
+                    "bytes_per_vector": bytes_per_vector,
+                    "compression": full_dim * 4 / bytes_per_vector,
+                    f"recall@{k}": _recall(_top_k(scores, k), truth),
+                }
+                if quantization != "none":
+                    candidates = _top_k(scores, k * oversample)
+                    rescored = np.take_along_axis(exact, candidates, axis=1)
+                    order = rescored.argsort(axis=1)[:, ::-1][:, :k]
+                    row[f"recall@{k}_rescored"] = _recall(
+                        np.take_along_axis(candidates, order, axis=1), truth
+                    )
+                rows.append(row)
+    return rows
+
+
+def _cached_vectors(limit):
+    from Agent.vectors.embedding import DEFAULT_MODEL
+    from Agent.vectors.embedding_cache import get_embedding_cache
+
+    cache = get_embedding_cache()
+    if cache is None:
+        raise RuntimeError("The embedding cache is disabled; ingest with EMBEDDING_CACHE=1 first.")
+    vectors = cache.sample(DEFAULT_MODEL, limit)
+    if not vectors:
+        raise RuntimeError("The embedding cache is empty; run ingestion first.")
+    return np.asarray(vectors, dtype="float32")
+
+
+if __name__ == "__main__":
+    # python -m Agent.vectors.reduction report [k]
+    # python -m Agent.vectors.reduction fit <pca|truncate|none> <dim> <none|int8|binary>
+    command = sys.argv[1] if len(sys.argv) > 1 else "report"
+
+    if command == "fit":
+        method, dim, quantization = sys.argv[2], int(sys.argv[3]), sys.argv[4]
+        vectors = _cached_vectors(20000)
+        transform = EmbeddingTransform(method, dim, quantization).fit(vectors)
+        transform.save()
+        print(f" Fitted {method}/{dim}/{quantization} on {len(vectors)} vectors -> {TRANSFORM_PATH}")
+        print(" Re-ingest with --full so the index matches the new transform.")
+    else:
+        k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        vectors = _cached_vectors(5200)
+        queries, corpus = vectors[:200], vectors[200:]
+        print(f" Recall report on {len(corpus)} corpus vectors, {len(queries)} queries")
+        for row in recall_report(corpus, queries, k=k, dims=(vectors.shape[1], 512, 256, 128, 64)):
+            print(json.dumps(row))
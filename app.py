@@ -1,9 +1,17 @@
+import os
+import sys
+
 import streamlit as st
 from datetime import datetime
-from Agent.crew_ai.patent_crew import run_patent_analysis
-from Agent.tools.search_tools import hybrid_search, iterative_search, semantic_search, keyword_search
+
+from Agent.metrics.instrumentation import last_trace_path, reset, snapshot
+from Agent.metrics.server import start_metrics_server
+
+# crewai/langchain and the search stack are imported inside the mode that
+# needs them, so the page renders without paying for both
 
 st.set_page_config(page_title="Patent Innovation Explorer", layout="centered")
+start_metrics_server()
 st.title("🧠 Patent Innovation Explorer")
 
 st.sidebar.title("🔍 Search Settings")
@@ -13,30 +21,65 @@ if mode == "Run Analysis":
     st.subheader("📊 Run Full Analysis")
     research_area = st.text_input("Research Area", "Chatbots")
     model_name = st.text_input("Ollama Model", "llama3")
+    retrieval_mode = st.selectbox("Agent Retrieval", ["keyword", "hybrid", "semantic", "diverse"])
+    use_llm_cache = st.checkbox("Reuse cached LLM responses", value=True)
 
     if st.button("Run Analysis"):
-        with st.spinner("Running CrewAI analysis..."):
-            result = run_patent_analysis(research_area, model_name)
-            st.success("Analysis Complete!")
+        from Agent.crew_ai.patent_crew import stream_patent_analysis
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"analysis_{timestamp}.txt"
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"analysis_{timestamp}.txt"
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(result)
+        status = st.empty()
+        live = st.empty()
+        tokens = ""
+        result = ""
+        for event in stream_patent_analysis(
+            research_area,
+            model_name,
+            retrieval_mode=retrieval_mode,
+            use_llm_cache=use_llm_cache,
+            report_path=filename,
+        ):
+            if event["type"] == "status":
+                status.info(event["text"])
+            elif event["type"] == "token":
+                tokens += event["text"]
+                # Only the tail is re-rendered, so long runs stay responsive
+                live.code(tokens[-3000:], language=None)
+            elif event["type"] == "task":
+                agent = event.get("agent") or "Agent"
+                status.info(f"{agent} finished a task")
+                with st.expander(f"✅ {agent}", expanded=False):
+                    st.markdown(event["text"])
+                tokens = ""
+                live.empty()
+            elif event["type"] == "result":
+                result = event["text"]
+                status.success("Analysis Complete!")
+            elif event["type"] == "error":
+                result = event["text"]
+                status.error(result)
 
-            st.download_button("📥 Download Report", result, file_name=filename)
-            st.text_area("🧾 Analysis Preview", result[:1000] + "...", height=300)
+        live.empty()
+        st.markdown(result)
+        with open(filename, "r", encoding="utf-8") as f:
+            st.download_button("📥 Download Report", f.read(), file_name=filename)
 
 elif mode == "Search Patents":
     st.subheader("🔎 Search Patent Chunks")
     query = st.text_input("Enter Search Query")
-    search_type = st.selectbox("Search Type", ["Hybrid", "Keyword", "Semantic"])
+    search_type = st.selectbox("Search Type", ["Hybrid", "Keyword", "Semantic", "Diverse (MMR)"])
 
     if st.button("Search") and query:
+        from Agent.tools.search_tools import diverse_search, hybrid_search, keyword_search, semantic_search
+
         if search_type == "Keyword":
             results = keyword_search(query)
         elif search_type == "Semantic":
             results = semantic_search(query)
+        elif search_type == "Diverse (MMR)":
+            results = diverse_search(query)
         else:
             results = hybrid_search(query)
 
@@ -53,6 +96,8 @@ elif mode == "Iterative Exploration":
     steps = st.slider("Refinement Steps", 1, 10, 3)
 
     if st.button("Explore") and query:
+        from Agent.tools.search_tools import iterative_search
+
         results = iterative_search(query, refinement_steps=steps)
         st.markdown(f"**Total Chunks Found:** {len(results)}")
         for i, hit in enumerate(results):
@@ -60,3 +105,46 @@ elif mode == "Iterative Exploration":
             st.write(f"{i+1}. File: {source.get('source_file')} | Chunk: {source.get('chunk_index')}")
             st.text(source.get("text", "")[:300] + "...")
             st.markdown("---")
+
+
+def performance_panel():
+    with st.sidebar.expander("⚡ Performance"):
+        metrics = snapshot()
+        if not metrics["enabled"]:
+            st.caption("Metrics are disabled (METRICS=0).")
+            return
+
+        spans = sorted(metrics["spans"].items(), key=lambda item: -item[1]["total_ms"])
+        if spans:
+            st.dataframe(
+                [
+                    {
+                        "span": name,
+                        "count": stats["count"],
+                        "total s": round(stats["total_ms"] / 1000, 2),
+                        "mean ms": round(stats["mean_ms"], 1),
+                        "max ms": round(stats["max_ms"], 1),
+                    }
+                    for name, stats in spans
+                ],
+                hide_index=True,
+            )
+        else:
+            st.caption("No timings recorded yet.")
+        if metrics["counters"]:
+            st.json(metrics["counters"], expanded=False)
+
+        # Only report the search cache if the search stack is already loaded
+        search_tools = sys.modules.get("Agent.tools.search_tools")
+        if search_tools is not None:
+            st.write("Search cache", search_tools.get_cache_stats())
+
+        trace_path = last_trace_path()
+        if trace_path:
+            with open(trace_path, "r", encoding="utf-8") as f:
+                st.download_button("📥 Last run trace", f.read(), file_name=os.path.basename(trace_path))
+        if st.button("Reset metrics"):
+            reset()
+
+
+performance_panel()
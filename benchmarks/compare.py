@@ -0,0 +1,41 @@
+import json
+import sys
+
+
+def flatten(results, prefix=""):
+    """
+    Flatten nested result dicts to {"search.hybrid.p95_ms": value} for numeric leaves.
+    """
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """
+    Rows of (metric, baseline, current, change in percent) for metrics in both runs.
+    """
+    before, after = flatten(baseline["results"]), flatten(current["results"])
+    rows = []
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        change = 100.0 * (new - old) / old if old else None
+        rows.append((name, old, new, change))
+    return rows
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.compare baseline.json current.json
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(sys.argv[2], "r", encoding="utf-8") as f:
+        current = json.load(f)
+
+    for name, old, new, change in compare(baseline, current):
+        delta = f"{change:+.1f}%" if change is not None else "n/a"
+        print(f"{name:60s} {old:14.3f} {new:14.3f} {delta:>9s}")
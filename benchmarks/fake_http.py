@@ -0,0 +1,102 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with an optional fixed delay per request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, handler_class, port=0, latency_ms=0.0):
+        super().__init__(("127.0.0.1", port), handler_class)
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """
+    Request handler base: decodes (optionally gzipped) bodies and dispatches
+    to ``route(method, path, query, body)``, which returns (status, payload).
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _dispatch(self, method):
+        with self.server._lock:
+            self.server.requests += 1
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            status, payload = self.route(method, url.path, query, self._body())
+        except Exception as e:
+            status, payload = 500, {"error": {"type": type(e).__name__, "reason": str(e)}}
+
+        data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if method != "HEAD":
+            self.wfile.write(data)
+
+    def route(self, method, path, query, body):
+        raise NotImplementedError
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+
+def read_json(body):
+    return json.loads(body) if body else {}
+
+
+def read_ndjson(body):
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
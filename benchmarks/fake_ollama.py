@@ -0,0 +1,79 @@
+import hashlib
+import re
+import time
+
+import numpy as np
+
+from benchmarks.fake_http import JSONHandler, StubServer, read_json
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def hashed_embedding(text: str, dim: int) -> list:
+    """
+    Deterministic unit vector for ``text`` via signed feature hashing of its
+    tokens, so texts sharing words are close and kNN results are meaningful.
+    """
+    vector = np.zeros(dim, dtype="float32")
+    for token in _TOKEN_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if not norm:
+        vector[0] = norm = 1.0
+    return (vector / norm).tolist()
+
+
+class FakeOllamaHandler(JSONHandler):
+    def route(self, method, path, query, body):
+        server = self.server
+        request = read_json(body) if method == "POST" else {}
+
+        if path == "/api/embed":
+            texts = request.get("input", [])
+            if isinstance(texts, str):
+                texts = [texts]
+            if server.per_item_ms:
+                time.sleep(server.per_item_ms * len(texts) / 1000)
+            return 200, {
+                "model": request.get("model"),
+                "embeddings": [hashed_embedding(text, server.dim) for text in texts],
+            }
+
+        if path == "/api/embeddings":
+            return 200, {"embedding": hashed_embedding(request.get("prompt", ""), server.dim)}
+
+        if path == "/api/tags":
+            return 200, {"models": [{"name": name} for name in server.models]}
+
+        if path == "/api/show":
+            model = request.get("model") or request.get("name", "")
+            if model.split(":")[0] not in {name.split(":")[0] for name in server.models}:
+                return 404, {"error": f"model '{model}' not found"}
+            return 200, {"details": {"family": "fake"}, "model_info": {}}
+
+        if path == "/api/generate":
+            if not request.get("prompt"):
+                # An empty prompt only loads the model
+                return 200, {"model": request.get("model"), "response": "", "done": True}
+            return 200, {"model": request.get("model"), "response": "Hello!", "done": True}
+
+        return 404, {"error": f"unknown path {path}"}
+
+
+class FakeOllama(StubServer):
+    """
+    Stand-in for Ollama's HTTP API: embeddings are deterministic hashed
+    bag-of-words vectors, generation returns a canned answer.
+
+    Args:
+        dim (int): Embedding dimension.
+        latency_ms (float): Delay added to every request.
+        per_item_ms (float): Extra delay per embedded text.
+    """
+
+    def __init__(self, port=0, dim=768, latency_ms=0.0, per_item_ms=0.0, models=None):
+        super().__init__(FakeOllamaHandler, port=port, latency_ms=latency_ms)
+        self.dim = dim
+        self.per_item_ms = per_item_ms
+        self.models = models or ["nomic-embed-text:latest", "llama3:latest"]
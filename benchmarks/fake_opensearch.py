@@ -0,0 +1,275 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from benchmarks.fake_http import JSONHandler, StubServer, read_json, read_ndjson
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class FakeIndex:
+    """
+    In-memory index: an inverted index for ``match`` queries (BM25) and a
+    brute-force cosine scan for ``knn`` queries on the ``embedding`` field.
+    """
+
+    def __init__(self, body=None):
+        body = body or {}
+        self.settings = {"index": dict(body.get("settings", {}).get("index", {}))}
+        self.mappings = body.get("mappings", {})
+        self.docs = {}
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self._matrix = None
+        self._lock = threading.RLock()
+
+    def put(self, doc_id, source):
+        with self._lock:
+            self.delete(doc_id)
+            self.docs[doc_id] = source
+            tokens = _TOKEN_RE.findall(str(source.get("text", "")).lower())
+            for token, tf in Counter(tokens).items():
+                self.postings[token][doc_id] = tf
+            self.lengths[doc_id] = len(tokens)
+            self._matrix = None
+
+    def delete(self, doc_id):
+        with self._lock:
+            source = self.docs.pop(doc_id, None)
+            if source is None:
+                return False
+            for token in set(_TOKEN_RE.findall(str(source.get("text", "")).lower())):
+                self.postings[token].pop(doc_id, None)
+            self.lengths.pop(doc_id, None)
+            self._matrix = None
+            return True
+
+    def stored_source(self, doc_id):
+        """
+        The document as OpenSearch keeps it in ``_source``: without the
+        fields the mapping excludes, such as the vector.
+        """
+        source = self.docs.get(doc_id)
+        if source is None:
+            return None
+        return self._filter_source(source, self.mappings.get("_source", True))
+
+    def _bm25(self, text, k1=1.2, b=0.75):
+        n = len(self.docs)
+        avg_len = sum(self.lengths.values()) / n if n else 0.0
+        scores = defaultdict(float)
+        for token in set(_TOKEN_RE.findall(text.lower())):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = tf + k1 * (1 - b + b * self.lengths[doc_id] / (avg_len or 1.0))
+                scores[doc_id] += idf * tf * (k1 + 1) / norm
+        return scores
+
+    def _knn(self, vector, k):
+        if self._matrix is None:
+            ids = [doc_id for doc_id, source in self.docs.items() if source.get("embedding")]
+            matrix = np.asarray([self.docs[doc_id]["embedding"] for doc_id in ids], dtype="float32")
+            if len(ids):
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                matrix = matrix / norms
+            self._matrix = (ids, matrix)
+        ids, matrix = self._matrix
+        if not ids:
+            return {}
+        query = np.asarray(vector, dtype="float32")
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        top = np.argsort(-scores)[:k]
+        # OpenSearch's cosinesimil space reports (1 + cosine) / 2
+        return {ids[i]: float((1 + scores[i]) / 2) for i in top}
+
+    def _matching(self, query):
+        if not query or "match_all" in query:
+            return {doc_id: 1.0 for doc_id in self.docs}
+        if "match" in query:
+            field, value = next(iter(query["match"].items()))
+            text = value.get("query", "") if isinstance(value, dict) else value
+            return self._bm25(str(text))
+        if "knn" in query:
+            field, params = next(iter(query["knn"].items()))
+            return self._knn(params["vector"], params.get("k", 10))
+        if "terms" in query:
+            field, values = next(iter(query["terms"].items()))
+            values = set(values)
+            return {doc_id: 1.0 for doc_id, source in self.docs.items() if source.get(field) in values}
+        if "term" in query:
+            field, value = next(iter(query["term"].items()))
+            value = value.get("value") if isinstance(value, dict) else value
+            return {doc_id: 1.0 for doc_id, source in self.docs.items() if source.get(field) == value}
+        raise ValueError(f"unsupported query {list(query)}")
+
+    @staticmethod
+    def _filter_source(source, spec):
+        if spec is False:
+            return None
+        if isinstance(spec, list):
+            return {field: source[field] for field in spec if field in source}
+        if isinstance(spec, dict) and spec.get("excludes"):
+            return {key: value for key, value in source.items() if key not in spec["excludes"]}
+        return source
+
+    def search(self, body, index_name):
+        start = time.perf_counter()
+        with self._lock:
+            scores = self._matching(body.get("query"))
+            ranked = sorted(scores.items(), key=lambda item: -item[1])
+            size = body.get("size", 10)
+            hits = []
+            for doc_id, score in ranked[:size]:
+                hit = {"_index": index_name, "_id": doc_id, "_score": score}
+                source = self._filter_source(self.stored_source(doc_id), body.get("_source", True))
+                if source is not None:
+                    hit["_source"] = source
+                hits.append(hit)
+        return {
+            "took": int(1000 * (time.perf_counter() - start)),
+            "timed_out": False,
+            "hits": {
+                "total": {"value": len(scores), "relation": "eq"},
+                "max_score": hits[0]["_score"] if hits else None,
+                "hits": hits,
+            },
+        }
+
+    def count(self, body):
+        with self._lock:
+            return len(self._matching((body or {}).get("query")))
+
+    def delete_by_query(self, body):
+        with self._lock:
+            doc_ids = list(self._matching(body.get("query")))
+            for doc_id in doc_ids:
+                self.delete(doc_id)
+        return len(doc_ids)
+
+
+class FakeOpenSearchHandler(JSONHandler):
+    def route(self, method, path, query, body):
+        server = self.server
+        parts = [part for part in path.split("/") if part]
+
+        if not parts:
+            return 200, {
+                "name": "fake-node",
+                "cluster_name": "fake",
+                "version": {"distribution": "opensearch", "number": "2.11.0"},
+            }
+        if parts[0] == "_bulk" or parts[-1] == "_bulk":
+            return 200, server.bulk(read_ndjson(body), parts[0] if len(parts) > 1 else None)
+        if parts[0] == "_msearch" or parts[-1] == "_msearch":
+            return 200, server.msearch(read_ndjson(body), parts[0] if len(parts) > 1 else None)
+        if parts[:2] == ["_cat", "indices"]:
+            return 200, [
+                {"index": name, "docs.count": str(len(index.docs)), "health": "green"}
+                for name, index in server.indices.items()
+            ]
+
+        name = parts[0]
+        index = server.indices.get(name)
+        action = parts[1] if len(parts) > 1 else None
+
+        if action is None:
+            if method == "HEAD" or method == "GET":
+                return (200, {name: {"mappings": index.mappings}}) if index else (404, None)
+            if method == "PUT":
+                if index:
+                    return 400, {"error": {"type": "resource_already_exists_exception"}}
+                server.indices[name] = FakeIndex(read_json(body))
+                return 200, {"acknowledged": True, "index": name}
+            if method == "DELETE":
+                if server.indices.pop(name, None) is None:
+                    return 404, {"error": {"type": "index_not_found_exception"}}
+                return 200, {"acknowledged": True}
+
+        if index is None:
+            error = {"type": "index_not_found_exception", "reason": f"no such index [{name}]"}
+            return 404, {"error": error}
+
+        if action == "_settings":
+            if method == "PUT":
+                for key, value in read_json(body).get("index", {}).items():
+                    if value is None:
+                        index.settings["index"].pop(key, None)
+                    else:
+                        index.settings["index"][key] = value
+                return 200, {"acknowledged": True}
+            return 200, {name: {"settings": index.settings}}
+        if action == "_refresh":
+            return 200, {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+        if action == "_search":
+            return 200, index.search(read_json(body), name)
+        if action == "_count":
+            return 200, {"count": index.count(read_json(body))}
+        if action == "_delete_by_query":
+            return 200, {"deleted": index.delete_by_query(read_json(body)), "failures": []}
+        return 404, {"error": {"type": "unsupported", "reason": f"{method} {path}"}}
+
+
+class FakeOpenSearch(StubServer):
+    """
+    Stand-in for the OpenSearch REST endpoints this project uses: index
+    admin, settings, refresh, ``_bulk``, ``_search``, ``_msearch``,
+    ``_count``, ``_delete_by_query`` and ``_cat/indices``.
+    """
+
+    def __init__(self, port=0, latency_ms=0.0):
+        super().__init__(FakeOpenSearchHandler, port=port, latency_ms=latency_ms)
+        self.indices = {}
+
+    def _index(self, name):
+        index = self.indices.get(name)
+        if index is None:
+            index = self.indices[name] = FakeIndex()
+        return index
+
+    def bulk(self, lines, default_index):
+        start = time.perf_counter()
+        items = []
+        i = 0
+        while i < len(lines):
+            (action, meta), = lines[i].items()
+            index_name = meta.get("_index", default_index)
+            index = self._index(index_name)
+            doc_id = meta.get("_id") or str(len(index.docs))
+            if action == "delete":
+                found = index.delete(doc_id)
+                items.append({action: {"_id": doc_id, "status": 200 if found else 404}})
+                i += 1
+                continue
+            source = lines[i + 1]
+            if action == "update":
+                # Like OpenSearch, rebuilt from the stored _source: excluded fields are lost
+                source = {**(index.stored_source(doc_id) or {}), **source.get("doc", {})}
+            index.put(doc_id, source)
+            items.append(
+                {action: {"_index": index_name, "_id": doc_id, "status": 201, "result": "created"}}
+            )
+            i += 2
+        return {"took": int(1000 * (time.perf_counter() - start)), "errors": False, "items": items}
+
+    def msearch(self, lines, default_index):
+        responses = []
+        for header, body in zip(lines[::2], lines[1::2]):
+            name = header.get("index", default_index)
+            index = self.indices.get(name)
+            if index is None:
+                error = {"type": "index_not_found_exception", "reason": f"no such index [{name}]"}
+                responses.append({"status": 404, "error": error})
+                continue
+            try:
+                responses.append({**index.search(body, name), "status": 200})
+            except Exception as e:
+                responses.append({"status": 400, "error": {"type": type(e).__name__, "reason": str(e)}})
+        return {"took": 0, "responses": responses}
@@ -0,0 +1,89 @@
+import hashlib
+
+from benchmarks.fake_http import JSONHandler, StubServer
+
+
+def _patent_id(seed: str) -> str:
+    number = int(hashlib.blake2b(seed.encode("utf-8"), digest_size=4).hexdigest(), 16) % 10**7
+    return f"US{number:07d}B2"
+
+
+class FakeSerpAPIHandler(JSONHandler):
+    def route(self, method, path, query, body):
+        server = self.server
+        if query.get("api_key") != server.api_key:
+            return 401, {"error": "Invalid API key."}
+
+        key = (path, tuple(sorted(query.items())))
+        with server._lock:
+            server.hits[key] = server.hits.get(key, 0) + 1
+            # The first ``flaky`` requests for each URL get a 429
+            if server.hits[key] <= server.flaky:
+                return 429, {"error": "Your account has run out of searches."}
+
+        if path in ("/search", "/search.json") and query.get("engine") == "google_patents":
+            ids = [_patent_id(f"{query.get('q', '')}:{i}") for i in range(server.results)]
+            return 200, {
+                "search_parameters": {"q": query.get("q")},
+                "organic_results": [
+                    {
+                        "patent_id": f"patent/{pid}/en",
+                        "title": f"Patent {pid}",
+                        "serpapi_link": server.link(pid),
+                    }
+                    for pid in ids
+                ],
+            }
+
+        if path in ("/search", "/search.json") and query.get("engine") == "google_patents_details":
+            parts = query.get("patent_id", "").split("/")
+            if len(parts) < 2:
+                return 400, {"error": "Missing patent_id."}
+            pid = parts[1]
+            if server.citation_pool:
+                start = int(pid[2:9])
+                seeds = [f"pool:{(start + i) % server.citation_pool}" for i in range(server.citations)]
+            else:
+                seeds = [f"{pid}:cites:{i}" for i in range(server.citations)]
+            citations = [_patent_id(seed) for seed in seeds]
+            return 200, {
+                "title": f"Patent {pid}",
+                "abstract": f"Synthetic abstract for {pid}.",
+                "claims": [f"{n}. A method according to {pid}, claim {n}." for n in range(1, 4)],
+                "description": f"Detailed description of {pid}.",
+                "patent_citations": {
+                    "original": [
+                        {"publication_number": cid, "serpapi_link": server.link(cid)} for cid in citations
+                    ]
+                },
+            }
+
+        return 404, {"error": f"no route for {path}"}
+
+
+class FakeSerpAPI(StubServer):
+    """
+    Local stand-in for SerpAPI's google_patents search and details engines.
+
+    Responses are deterministic; every patent cites ``citations`` others
+    whose ``serpapi_link`` points back at this server, so crawls of any
+    depth work. ``flaky`` makes the first N requests per URL fail with 429
+    to exercise retries, and ``hits`` counts requests per URL. With
+    ``citation_pool`` every citation is one of that many patents, so
+    citations are shared and cite each other in cycles.
+    """
+
+    def __init__(
+        self, port=0, latency_ms=0.0, results=10, citations=5, flaky=0, api_key="test", citation_pool=0
+    ):
+        super().__init__(FakeSerpAPIHandler, port=port, latency_ms=latency_ms)
+        self.results = results
+        self.citations = citations
+        self.flaky = flaky
+        self.api_key = api_key
+        self.citation_pool = citation_pool
+        self.hits = {}
+
+    def link(self, patent_id: str) -> str:
+        # Like the real API, links carry no api_key
+        return f"{self.url}/search.json?engine=google_patents_details&patent_id=patent/{patent_id}/en"
@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.fake_opensearch import FakeOpenSearch
+from benchmarks.synthetic_pdfs import generate_corpus, generate_queries
+
+INDEX_NAME = "bench_chunks"
+SEARCH_MODES = ("keyword", "semantic", "hybrid", "iterative", "diverse")
+
+
+def latency_stats(seconds) -> dict:
+    """
+    Summary of a list of latencies in seconds, reported in milliseconds.
+    """
+    ms = np.asarray(seconds, dtype="float64") * 1000
+    if not len(ms):
+        return {"count": 0}
+    return {
+        "count": int(len(ms)),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _configure_environment(args, workdir, ollama, opensearch):
+    # Module-level settings are read from the environment at import time, so
+    # this must run before anything under Agent is imported
+    os.environ.update(
+        {
+            "OLLAMA_URL": ollama.url,
+            "OPENSEARCH_HOST": "127.0.0.1",
+            "OPENSEARCH_PORT": str(opensearch.port),
+            "OPENSEARCH_INDEX": INDEX_NAME,
+            "SEARCH_BACKEND": args.backend,
+            "LOCAL_INDEX_DIR": os.path.join(workdir, "local_index"),
+            "INDEX_GENERATION_PATH": os.path.join(workdir, "index_generation.json"),
+            "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite"),
+            "EMBEDDING_TRANSFORM_PATH": os.path.join(workdir, "embedding_transform.npz"),
+            "LLM_CACHE_PATH": os.path.join(workdir, "llm_responses.sqlite"),
+            # Measure the uncached request path unless asked otherwise
+            "EMBEDDING_CACHE": "1" if args.with_caches else "0",
+            "SEARCH_CACHE": "1" if args.with_caches else "0",
+        }
+    )
+
+
+def bench_parse(pdf_paths, chunk_size=500, chunk_overlap=50):
+    from langchain.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks, pages, parse_time, split_time = [], 0, 0.0, 0.0
+    size = sum(os.path.getsize(path) for path in pdf_paths)
+
+    for path in pdf_paths:
+        docs, elapsed = _timed(PyPDFLoader(path).load)
+        parse_time += elapsed
+        pages += len(docs)
+        split_docs, elapsed = _timed(splitter.split_documents, docs)
+        split_time += elapsed
+        source_file = os.path.basename(path)
+        for idx, chunk in enumerate(split_docs):
+            text = chunk.page_content.strip()
+            if text:
+                chunks.append({"source_file": source_file, "chunk_index": idx, "text": text})
+
+    total = parse_time + split_time
+    return chunks, {
+        "files": len(pdf_paths),
+        "pages": pages,
+        "chunks": len(chunks),
+        "megabytes": size / 1e6,
+        "parse_seconds": parse_time,
+        "split_seconds": split_time,
+        "pages_per_sec": pages / parse_time if parse_time else None,
+        "chunks_per_sec": len(chunks) / total if total else None,
+        "mb_per_sec": size / 1e6 / total if total else None,
+    }
+
+
+def bench_embedding(texts, single_count):
+    from Agent.vectors.embedding import embed_many, get_embedding
+
+    single = [_timed(get_embedding, text)[1] for text in texts[:single_count]]
+    embeddings, elapsed = _timed(embed_many, texts, verbose=False)
+    return embeddings, {
+        "get_embedding": {
+            **latency_stats(single),
+            "texts_per_sec": len(single) / sum(single) if single else None,
+        },
+        "embed_many": {
+            "texts": len(texts),
+            "seconds": elapsed,
+            "texts_per_sec": len(texts) / elapsed if elapsed else None,
+        },
+    }
+
+
+def bench_indexing(chunks, batch_size):
+    from Agent.search_backends.base import get_search_backend
+
+    backend = get_search_backend()
+    backend.ensure_index(recreate=True)
+
+    batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+    latencies, indexed, errors = [], 0, 0
+    start = time.perf_counter()
+    with backend.bulk_load():
+        for batch in batches:
+            (count, batch_errors), elapsed = _timed(backend.index_chunks, batch)
+            latencies.append(elapsed)
+            indexed += count
+            errors += len(batch_errors)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend.name,
+        "chunks": indexed,
+        "errors": errors,
+        "seconds": elapsed,
+        "chunks_per_sec": indexed / elapsed if elapsed else None,
+        "batch": {"size": batch_size, **latency_stats(latencies)},
+    }
+
+
+def bench_pipeline(pdf_dir):
+    from Agent.data_ingestion.pipeline import run_pipeline
+    from Agent.search_backends.base import get_search_backend
+
+    (indexed, errors), elapsed = _timed(run_pipeline, get_search_backend(), pdf_dir)
+    return {
+        "chunks": indexed,
+        "errors": len(errors),
+        "seconds": elapsed,
+        "chunks_per_sec": indexed / elapsed if elapsed else None,
+    }
+
+
+def bench_search(queries, top_k, warmup, batch_size):
+    from Agent.tools import search_tools
+
+    functions = {
+        "keyword": lambda q: search_tools.keyword_search(q, top_k, use_cache=False),
+        "semantic": lambda q: search_tools.semantic_search(q, top_k, use_cache=False),
+        "hybrid": lambda q: search_tools.hybrid_search(q, top_k, use_cache=False),
+        "iterative": lambda q: search_tools.iterative_search(q, refinement_steps=3, top_k=top_k),
+        "diverse": lambda q: search_tools.diverse_search(q, top_k, use_cache=False),
+    }
+
+    results = {}
+    for mode in SEARCH_MODES:
+        for query in queries[:warmup]:
+            functions[mode](query)
+        latencies, empty = [], 0
+        for query in queries:
+            hits, elapsed = _timed(functions[mode], query)
+            latencies.append(elapsed)
+            empty += not hits
+        results[mode] = {**latency_stats(latencies), "empty_results": empty}
+
+    for mode in ("keyword", "semantic", "hybrid"):
+        batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+        latencies, errors = [], 0
+        for batch in batches:
+            outcomes, elapsed = _timed(search_tools.batch_search, batch, mode=mode, top_k=top_k)
+            latencies.append(elapsed)
+            errors += sum(1 for outcome in outcomes if outcome["error"])
+        total = sum(latencies)
+        results[f"batch_{mode}"] = {
+            "batch_size": batch_size,
+            **latency_stats(latencies),
+            "queries_per_sec": len(queries) / total if total else None,
+            "errors": errors,
+        }
+    return results
+
+
+def bench_crew_tool(queries, top_k):
+    """
+    Overhead of the crew's retrieval tool path (RetrievalSession) over a raw
+    keyword search, for first-time and repeated queries.
+    """
+    from Agent.crew_ai.retrieval import RetrievalSession
+    from Agent.tools.search_tools import keyword_search
+
+    raw = [_timed(keyword_search, q, top_k, use_cache=False)[1] for q in queries]
+    session = RetrievalSession("keyword")
+    first = [_timed(session.search, q, top_k)[1] for q in queries]
+    repeated = [_timed(session.search, q.upper(), top_k)[1] for q in queries]
+
+    return {
+        "raw_keyword": latency_stats(raw),
+        "tool_first_call": latency_stats(first),
+        "tool_repeated_call": latency_stats(repeated),
+        "overhead_mean_ms": 1000 * (np.mean(first) - np.mean(raw)) if queries else None,
+        "session": session.stats(),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args) -> dict:
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_")
+    ollama = FakeOllama(dim=args.dim, latency_ms=args.ollama_latency_ms, per_item_ms=args.embed_item_ms)
+    opensearch = FakeOpenSearch(latency_ms=args.opensearch_latency_ms)
+    ollama.start()
+    opensearch.start()
+    _configure_environment(args, workdir, ollama, opensearch)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "workdir": workdir,
+            "config": vars(args),
+        },
+        "results": {},
+    }
+    results = report["results"]
+
+    try:
+        pdf_dir = os.path.join(workdir, "pdfs")
+        print(f" Generating {args.documents} synthetic PDFs in {pdf_dir}")
+        pdf_paths = generate_corpus(pdf_dir, args.documents, args.pages, seed=args.seed)
+        queries = generate_queries(args.queries, seed=args.seed + 1)
+
+        print(" Benchmarking PDF parse/split")
+        chunks, results["parse_split"] = bench_parse(pdf_paths)
+
+        print(f" Benchmarking embeddings on {len(chunks)} chunks")
+        embeddings, results["embedding"] = bench_embedding(
+            [chunk["text"] for chunk in chunks], args.single_embeddings
+        )
+        for chunk, embedding in zip(chunks, embeddings):
+            chunk["embedding"] = embedding
+
+        print(f" Benchmarking indexing ({args.backend})")
+        results["indexing"] = bench_indexing(chunks, args.batch_size)
+
+        if args.pipeline:
+            print(" Benchmarking the ingestion pipeline")
+            results["pipeline"] = bench_pipeline(pdf_dir)
+
+        print(f" Benchmarking search with {len(queries)} queries")
+        results["search"] = bench_search(queries, args.top_k, args.warmup, args.msearch_batch)
+
+        print(" Benchmarking crew tool overhead")
+        results["crew_tool"] = bench_crew_tool(queries, args.top_k)
+    finally:
+        report["meta"]["fake_requests"] = {"ollama": ollama.requests, "opensearch": opensearch.requests}
+        ollama.stop()
+        opensearch.stop()
+
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion and search benchmarks against local fakes.")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--workdir", help="Scratch directory (default: a new temp dir)")
+    parser.add_argument("--backend", choices=["opensearch", "local"], default="opensearch")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per index_chunks call")
+    parser.add_argument("--msearch-batch", type=int, default=10, help="Queries per batch_search call")
+    parser.add_argument("--single-embeddings", type=int, default=100, help="Texts for get_embedding latency")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--ollama-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embed-item-ms", type=float, default=0.0)
+    parser.add_argument("--opensearch-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pipeline", action="store_true", help="Also time the end-to-end ingestion pipeline")
+    parser.add_argument("--with-caches", action="store_true", help="Keep embedding/search caches enabled")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.run [--backend local] [--output results.json]
+    args = parse_args()
+    report = run(args)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f" Results written to {output}")
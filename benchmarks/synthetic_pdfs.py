@@ -0,0 +1,134 @@
+import os
+import random
+import sys
+
+SUBJECTS = [
+    "conversational agent", "virtual assistant", "dialogue manager", "intent classifier",
+    "symptom checker", "patient intake module", "triage engine", "knowledge graph",
+    "speech recognizer", "response generator", "context tracker", "recommendation engine",
+]
+VERBS = [
+    "receives", "classifies", "generates", "routes", "stores", "ranks", "validates",
+    "transmits", "summarizes", "personalizes", "escalates", "annotates",
+]
+OBJECTS = [
+    "a user utterance", "a medical history record", "a follow-up question", "an appointment request",
+    "a care plan", "a confidence score", "a clinician alert", "a session transcript",
+    "a dosage reminder", "an insurance claim", "a feedback signal", "a language model prompt",
+]
+CLAUSES = [
+    "based on a trained neural network", "in response to a detected intent",
+    "using a rule-based fallback", "according to a privacy policy",
+    "over a secure network connection", "when a threshold is exceeded",
+    "for each turn of the conversation", "with reference to prior sessions",
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINES_PER_PAGE = 60
+CHARS_PER_LINE = 95
+
+
+def sentence(rng):
+    return (
+        f"The {rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} "
+        f"{rng.choice(CLAUSES)}."
+    )
+
+
+def page_lines(rng):
+    lines, current = [], ""
+    while len(lines) < LINES_PER_PAGE:
+        words = sentence(rng).split()
+        for word in words:
+            if len(current) + len(word) + 1 > CHARS_PER_LINE:
+                lines.append(current)
+                current = ""
+            current = f"{current} {word}".strip()
+    return lines[:LINES_PER_PAGE]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages):
+    """
+    Write a minimal text-only PDF (Helvetica, one content stream per page).
+
+    Args:
+        path (str): Output file.
+        pages (list): One list of text lines per page.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for lines in pages:
+        text = "\n".join(f"({_escape(line)}) Tj T*" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 {PAGE_HEIGHT - 50} Td\n{text}\nET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>"
+            ).encode("latin-1")
+        )
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_refs)} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(out_dir, documents=20, pages=5, seed=0):
+    """
+    Generate a deterministic corpus of patent-like PDFs.
+
+    Returns:
+        list: Paths of the generated files.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(documents):
+        title = f"US{10_000_000 + i} - {rng.choice(SUBJECTS).title()} System and Method"
+        doc_pages = [[title, ""] + page_lines(rng)[:-2]] + [page_lines(rng) for _ in range(pages - 1)]
+        path = os.path.join(out_dir, f"synthetic_patent_{i:04d}.pdf")
+        write_pdf(path, doc_pages)
+        paths.append(path)
+    return paths
+
+
+def generate_queries(count=50, seed=1):
+    """
+    Deterministic query strings drawn from the corpus vocabulary.
+    """
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS).split(' ', 1)[1]}"
+        for _ in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.synthetic_pdfs <out_dir> [documents] [pages]
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "data/synthetic_pdfs"
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    pages = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    paths = generate_corpus(out_dir, documents, pages)
+    print(f" Wrote {len(paths)} PDFs with {pages} pages each to {out_dir}")
@@ -0,0 +1,53 @@
+import pytest
+
+from Agent.search_backends.bm25 import BM25Index
+from benchmarks.fake_opensearch import FakeIndex
+
+DOCS = [
+    ("a::0", "a", "A rotor blade mounted on a hub."),
+    ("a::1", "a", "The hub drives a generator through a gearbox."),
+    ("b::0", "b", "Blade pitch control for a wind turbine rotor rotor."),
+    ("c::0", "c", "A battery cell with a solid electrolyte."),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite"))
+    index.add(DOCS)
+    yield index
+    index.close()
+
+
+def test_scores_match_okapi_bm25(index):
+    reference = FakeIndex()
+    for doc_id, _, text in DOCS:
+        reference.put(doc_id, {"text": text})
+    expected = reference._bm25("rotor blade hub")
+
+    found = index.search("Rotor blade, hub", size=10)
+    assert [doc_id for doc_id, _ in found] == sorted(expected, key=lambda doc_id: -expected[doc_id])
+    for doc_id, score in found:
+        assert score == pytest.approx(expected[doc_id])
+
+
+def test_replace_and_delete_keep_statistics_consistent(index, tmp_path):
+    index.add([("c::0", "c", "A rotor for a battery pump.")])
+    assert len(index) == 4
+    assert "c::0" in dict(index.search("rotor", size=10))
+    assert index.search("electrolyte") == []
+
+    assert index.delete(["a::0", "a::1", "missing"]) == 2
+    assert sorted(index.doc_ids()) == ["b::0", "c::0"]
+    assert index.doc_ids_for_sources(["a"]) == []
+
+    # Statistics after deletes equal those of an index built from the survivors
+    rebuilt = BM25Index(str(tmp_path / "rebuilt.sqlite"))
+    rebuilt.add([DOCS[2], ("c::0", "c", "A rotor for a battery pump.")])
+    assert index.search("rotor hub pump") == pytest.approx(rebuilt.search("rotor hub pump"))
+    rebuilt.close()
+
+
+def test_doc_ids_for_sources(index):
+    assert sorted(index.doc_ids_for_sources(["a", "c"])) == ["a::0", "a::1", "c::0"]
+    assert index.search("") == []
@@ -0,0 +1,49 @@
+import pytest
+
+crewai = pytest.importorskip("crewai")
+
+from Agent.crew_ai import crew_llm  # noqa: E402
+from Agent.crew_ai.crew_llm import CrewLLM  # noqa: E402
+from Agent.crew_ai.llm_cache import LLMResponseCache  # noqa: E402
+
+
+def test_second_identical_call_is_served_from_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        calls.append(messages)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(crew_llm.LLM, "call", fake_call)
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    llm = CrewLLM(model="ollama/llama3", temperature=0.2, response_cache=cache)
+    messages = [{"role": "user", "content": "Summarize the chunks."}]
+
+    assert llm.call(messages) == "answer 1"
+    assert llm.call(messages) == "answer 1"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_calls_with_tools_bypass_the_cache(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(crew_llm.LLM, "call", lambda self, messages, **kwargs: calls.append(messages) or "ok")
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    llm = CrewLLM(model="ollama/llama3", response_cache=cache)
+
+    llm.call("hi", tools=[{"name": "search"}])
+    llm.call("hi", tools=[{"name": "search"}])
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_stream_chunks_go_to_the_emitting_llm():
+    tokens = []
+    streaming = CrewLLM(model="ollama/llama3", on_token=tokens.append)
+    other = CrewLLM(model="ollama/llama3")
+    assert streaming.stream
+
+    chunk = type("Chunk", (), {"chunk": "Hel"})()
+    crew_llm._on_stream_chunk(streaming, chunk)
+    crew_llm._on_stream_chunk(other, chunk)
+    assert tokens == ["Hel"]
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from Agent.data_ingestion.dedup import ChunkDeduplicator, MinHasher, lsh_params, shingle_hashes
+
+WORDS = (
+    "rotor blade hub shaft generator gearbox bearing tower nacelle pitch yaw brake sensor "
+    "controller inverter cable foundation flange bolt seal"
+).split()
+
+
+def _chunk(source_file, chunk_index, text):
+    return {"source_file": source_file, "chunk_index": chunk_index, "text": text}
+
+
+def _text(seed, length=80):
+    rng = np.random.default_rng(seed)
+    return " ".join(rng.choice(WORDS, size=length))
+
+
+def test_lsh_midpoint_is_near_the_threshold():
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = lsh_params(threshold, 128)
+        assert bands * rows <= 128
+        assert abs((1 / bands) ** (1 / rows) - threshold) < 0.05
+
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher(num_perm=256)
+    first = _text(0).split()
+    second = first[:60] + _text(1, 20).split()
+    a, b = set(shingle_hashes(" ".join(first)).tolist()), set(shingle_hashes(" ".join(second)).tolist())
+    jaccard = len(a & b) / len(a | b)
+
+    estimate = np.mean(
+        hasher.signature(shingle_hashes(" ".join(first))) == hasher.signature(shingle_hashes(" ".join(second)))
+    )
+    assert estimate == pytest.approx(jaccard, abs=0.1)
+
+
+def test_exact_and_near_duplicates_are_dropped():
+    dedup = ChunkDeduplicator(threshold=0.8, scope="corpus")
+    text = _text(2)
+    words = text.split()
+    near = " ".join(words[:-1] + ["tower" if words[-1] != "tower" else "yaw"])
+
+    assert not dedup.check(_chunk("a.pdf", 0, text))
+    assert dedup.check(_chunk("a.pdf", 1, text.upper() + "!"))
+    assert dedup.check(_chunk("b.pdf", 0, near))
+    assert not dedup.check(_chunk("b.pdf", 1, _text(3)))
+    assert dedup.stats["exact"] == 1
+    assert dedup.stats["near"] == 1
+    assert dedup.duplicates == 2
+
+
+def test_file_scope_forgets_chunks_between_files():
+    dedup = ChunkDeduplicator(scope="file")
+    text = _text(4)
+    assert not dedup.check(_chunk("a.pdf", 0, text))
+    assert dedup.check(_chunk("a.pdf", 1, text))
+    dedup.end_file()
+    assert not dedup.check(_chunk("b.pdf", 0, text))
+
+
+def test_only_indexed_chunks_are_pending():
+    dedup = ChunkDeduplicator(scope="corpus")
+    canonical = _chunk("a.pdf", 0, "claims of the patent about a rotor blade")
+    assert not dedup.check(canonical)
+    assert dedup.check(_chunk("b.pdf", 3, "Claims of the patent about a rotor blade."))
+    # Not indexed yet: it goes out with both locations anyway
+    assert dedup.pending_updates() == []
+
+    dedup.mark_indexed([dict(canonical)])
+    assert dedup.pending_updates() == []
+
+    assert dedup.check(_chunk("c.pdf", 7, "claims of the patent about a rotor blade"))
+    assert dedup.pending_updates() == [canonical]
+    assert [location["source_file"] for location in canonical["locations"]] == ["a.pdf", "b.pdf", "c.pdf"]
+
+    dedup.forget("a.pdf")
+    assert dedup.pending_updates() == []
+
+
+def test_location_update_keeps_the_vector(tmp_path, monkeypatch):
+    opensearchpy = pytest.importorskip("opensearchpy")
+    from Agent.search_backends import opensearch_backend
+    from Agent.search_client import generation
+    from Agent.search_client.opensearch_client import build_index_body
+    from benchmarks.fake_opensearch import FakeOpenSearch
+
+    server = FakeOpenSearch().start()
+    try:
+        client = opensearchpy.OpenSearch(hosts=[{"host": "127.0.0.1", "port": server.port}])
+        monkeypatch.setattr(opensearch_backend, "get_opensearch_client", lambda: client)
+        monkeypatch.setattr(generation, "GENERATION_PATH", str(tmp_path / "generation.json"))
+        client.indices.create(index="chunks", body=build_index_body(4))
+
+        backend = opensearch_backend.OpenSearchBackend("chunks")
+        chunk = _chunk("a.pdf", 0, "rotor blade")
+        chunk["embedding"] = [1.0, 0.0, 0.0, 0.0]
+        backend.index_chunks([chunk])
+
+        chunk["locations"] = [
+            {"source_file": "a.pdf", "chunk_index": 0},
+            {"source_file": "b.pdf", "chunk_index": 3},
+        ]
+        updated, errors = backend.update_locations([chunk])
+        assert (updated, errors) == (1, [])
+
+        hits = backend.vector([1.0, 0.0, 0.0, 0.0], 1)
+        assert [hit["_id"] for hit in hits] == ["a.pdf::0"]
+        assert hits[0]["_source"]["locations"] == chunk["locations"]
+        assert "embedding" not in hits[0]["_source"]
+    finally:
+        server.stop()
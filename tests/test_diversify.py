@@ -0,0 +1,38 @@
+import numpy as np
+
+from Agent.tools.diversify import diversify, mmr_select
+
+
+def _hits(files):
+    return [{"_source": {"source_file": name, "chunk_index": i}} for i, name in enumerate(files)]
+
+
+def test_cap_spreads_hits_across_files_first():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(12, 8))
+    hits = _hits(["a"] * 8 + ["b"] * 4)
+
+    selected = diversify(hits, vectors[0], vectors, top_k=4, max_per_file=2)
+    files = [hit["_source"]["source_file"] for hit in selected]
+    assert sorted(files) == ["a", "a", "b", "b"]
+
+
+def test_capped_files_backfill_once_the_others_run_out():
+    # Two files with a cap of 3 used to stop at 6 hits
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(20, 8))
+    hits = _hits(["a", "b"] * 10)
+
+    selected = diversify(hits, vectors[0], vectors, top_k=10, max_per_file=3)
+    assert len(selected) == 10
+    assert len({hit["_source"]["chunk_index"] for hit in selected}) == 10
+
+
+def test_relevance_only_matches_cosine_ranking():
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(15, 6))
+    query = rng.normal(size=6)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = list(np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5])
+
+    assert mmr_select(query, vectors, 5, lambda_mult=1.0) == expected
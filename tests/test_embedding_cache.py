@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from Agent.vectors import embedding, embedding_cache  # noqa: E402
+from Agent.vectors.embedding_cache import EmbeddingCache  # noqa: E402
+from benchmarks.fake_ollama import FakeOllama  # noqa: E402
+
+
+@pytest.fixture
+def ollama(tmp_path, monkeypatch):
+    server = FakeOllama(dim=8).start()
+    monkeypatch.setattr(embedding, "OLLAMA_URL", server.url)
+    monkeypatch.setattr(embedding_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(embedding_cache, "_cache", EmbeddingCache(str(tmp_path / "embeddings.sqlite")))
+    yield server
+    server.stop()
+
+
+def test_empty_cache_is_still_used(ollama):
+    # An empty cache is falsy (it defines __len__) but must still be written to
+    assert not embedding_cache.get_embedding_cache()
+
+    texts = ["first chunk", "second chunk", "first chunk"]
+    first = embedding.embed_many(texts, verbose=False)
+    requests_after_first = ollama.requests
+    assert requests_after_first == 1
+
+    second = embedding.embed_many(texts, verbose=False)
+    assert ollama.requests == requests_after_first
+    for cached, fresh in zip(second, first):
+        assert cached == pytest.approx(fresh)
+    assert len(embedding_cache.get_embedding_cache()) == 2
+
+
+def test_keyed_by_model_and_normalized_text(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+    cache.put_many("nomic", ["Rotor  blade"], [[1.0, 2.0]])
+    # Whitespace is normalized; case is not, since it changes the embedding
+    assert cache.get_many("nomic", [" Rotor blade", "rotor blade"]) == [[1.0, 2.0], None]
+    assert cache.get_many("other-model", ["Rotor blade"]) == [None]
+
+    reopened = EmbeddingCache(cache.path)
+    assert reopened.get_many("nomic", ["Rotor blade"]) == [[1.0, 2.0]]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: next(clock))
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=2)
+    cache.put_many("nomic", ["a"], [[1.0]])
+    cache.put_many("nomic", ["b"], [[2.0]])
+    cache.get_many("nomic", ["a"])
+    cache.put_many("nomic", ["c"], [[3.0]])
+
+    assert len(cache) == 2
+    assert cache.get_many("nomic", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+
+
+def test_cached_embeddings_never_calls_ollama(ollama):
+    embedding.embed_many(["known chunk"], verbose=False)
+    requests_before = ollama.requests
+
+    found = embedding.cached_embeddings(["known chunk", "unknown chunk"])
+    assert found[0] is not None
+    assert found[1] is None
+    assert ollama.requests == requests_before
@@ -0,0 +1,45 @@
+import pytest
+
+from Agent.tools.fusion import reciprocal_rank_fusion, weighted_score_fusion
+
+
+def _hits(*pairs):
+    return [{"_id": doc_id, "_score": score, "_source": {"text": doc_id}} for doc_id, score in pairs]
+
+
+LEGS = {
+    "keyword": _hits(("a", 12.0), ("b", 8.0), ("c", 2.0)),
+    "semantic": _hits(("c", 0.91), ("a", 0.90), ("d", 0.50)),
+}
+
+
+def test_rrf_sums_reciprocal_ranks():
+    fused = reciprocal_rank_fusion(LEGS, rrf_k=60, top_k=10)
+    scores = {hit["_id"]: hit["_score"] for hit in fused}
+    assert scores["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert scores["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert scores["d"] == pytest.approx(1 / 63)
+    assert [hit["_id"] for hit in fused] == ["a", "c", "b", "d"]
+    assert fused[0]["_ranks"] == {"keyword_rank": 1, "semantic_rank": 2}
+
+
+def test_rrf_weights_and_top_k():
+    fused = reciprocal_rank_fusion(LEGS, weights={"keyword": 0.0}, top_k=2)
+    assert [hit["_id"] for hit in fused] == ["c", "a"]
+
+
+def test_min_max_normalizes_each_leg():
+    fused = weighted_score_fusion(LEGS, top_k=10)
+    scores = {hit["_id"]: hit["_score"] for hit in fused}
+    assert scores["a"] == pytest.approx(1.0 + 0.40 / 0.41)
+    assert scores["b"] == pytest.approx(0.6)
+    assert scores["c"] == pytest.approx(0.0 + 1.0)
+    assert scores["d"] == pytest.approx(0.0)
+    # Inputs are not modified
+    assert LEGS["keyword"][0]["_score"] == 12.0
+
+
+def test_min_max_with_equal_scores_and_empty_legs():
+    fused = weighted_score_fusion({"keyword": _hits(("a", 3.0), ("b", 3.0)), "semantic": []}, top_k=10)
+    assert [hit["_score"] for hit in fused] == [1.0, 1.0]
+    assert reciprocal_rank_fusion({"keyword": [], "semantic": []}) == []
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("dotenv")
+
+from Agent.collector.http_cache import HTTPCache  # noqa: E402
+from Agent.collector.information_collector import PatentCrawler  # noqa: E402
+from Agent.collector.patent_store import PatentStore, iter_records  # noqa: E402
+from benchmarks.fake_serpapi import FakeSerpAPI  # noqa: E402
+
+
+@pytest.fixture
+def serpapi():
+    server = FakeSerpAPI(results=3, citations=3, citation_pool=4).start()
+    yield server
+    server.stop()
+
+
+def _crawler(serpapi, tmp_path, **kwargs):
+    return PatentCrawler(
+        "test",
+        str(tmp_path / "out"),
+        rate=1000,
+        burst=100,
+        cache=HTTPCache(str(tmp_path / "http.sqlite")),
+        base_url=serpapi.url,
+        **kwargs,
+    )
+
+
+def test_shared_and_cyclic_citations_are_fetched_once(serpapi, tmp_path):
+    path = str(tmp_path / "patents.jsonl.gz")
+    with PatentStore(path) as store:
+        stats = asyncio.run(_crawler(serpapi, tmp_path, depth=4, store=store).crawl("rotor"))
+
+    assert max(serpapi.hits.values()) == 1
+    # The search plus 3 results plus a pool of 4 cited patents
+    assert stats["requests"] == len(serpapi.hits) <= 8
+    ids = [record["patent_id"] for record in iter_records(path)]
+    assert len(ids) == len(set(ids)) == stats["saved"]
+
+
+def test_second_crawl_is_served_from_the_cache(serpapi, tmp_path):
+    first = asyncio.run(_crawler(serpapi, tmp_path, depth=1).crawl("rotor"))
+    second = asyncio.run(_crawler(serpapi, tmp_path, depth=1).crawl("rotor"))
+    assert first["requests"] > 0
+    assert second["requests"] == 0
+    assert second["cache_hits"] == first["requests"]
+
+
+def test_rate_limited_requests_are_retried(tmp_path):
+    server = FakeSerpAPI(results=2, citations=0, flaky=1).start()
+    try:
+        stats = asyncio.run(_crawler(server, tmp_path, depth=0).crawl("rotor"))
+    finally:
+        server.stop()
+    assert stats["failures"] == 0
+    assert stats["retries"] == stats["requests"] - 3
+    assert stats["saved"] == 2
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from Agent.metrics import instrumentation
+from Agent.metrics.instrumentation import bind_trace, span, trace_run
+
+pytestmark = pytest.mark.skipif(not instrumentation.METRICS_ENABLED, reason="METRICS=0")
+
+
+def test_concurrent_runs_keep_separate_traces(tmp_path):
+    traces = {}
+    both_started = threading.Barrier(2)
+
+    def run(name):
+        with trace_run(name, str(tmp_path / f"{name}.json")) as trace:
+            both_started.wait()
+            with span(f"{name}.step"):
+                pass
+            both_started.wait()
+        traces[name] = trace
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [event["name"] for event in traces["first"].events] == ["first.step"]
+    assert [event["name"] for event in traces["second"].events] == ["second.step"]
+
+
+def test_bind_trace_carries_the_trace_to_worker_threads(tmp_path):
+    def work():
+        with span("worker.step"):
+            pass
+
+    with trace_run("run", str(tmp_path / "run.json")) as trace:
+        unbound = threading.Thread(target=work)
+        bound = threading.Thread(target=bind_trace(work))
+        for thread in (unbound, bound):
+            thread.start()
+            thread.join()
+
+    assert [event["name"] for event in trace.events] == ["worker.step"]
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.outputs import Generation  # noqa: E402
+
+from Agent.crew_ai.llm_cache import LLMResponseCache  # noqa: E402
+from Agent.search_client import generation  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_generation(tmp_path, monkeypatch):
+    monkeypatch.setattr(generation, "GENERATION_PATH", str(tmp_path / "generation.json"))
+    monkeypatch.setattr(generation, "_cached", {"mtime": None, "generations": {}})
+
+
+def _cache(tmp_path, **kwargs):
+    return LLMResponseCache(str(tmp_path / "llm.sqlite"), index_name="patents", **kwargs)
+
+
+def test_exact_prompt_and_model_hit(tmp_path):
+    cache = _cache(tmp_path)
+    cache.update("prompt", "llama3:0.2", [Generation(text="answer")])
+
+    assert [g.text for g in cache.lookup("prompt", "llama3:0.2")] == ["answer"]
+    assert cache.lookup("prompt", "llama3:0.7") is None
+    assert cache.lookup("other prompt", "llama3:0.2") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "similar_hits": 0, "misses": 2}
+
+
+def test_entries_are_dropped_when_the_index_generation_changes(tmp_path):
+    cache = _cache(tmp_path)
+    cache.update("prompt", "llama3", [Generation(text="answer")])
+
+    generation.bump_index_generation("other_index")
+    assert cache.lookup("prompt", "llama3") is not None
+
+    generation.bump_index_generation("patents")
+    assert cache.lookup("prompt", "llama3") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.update("a", "llama3", [Generation(text="A")])
+    cache.update("b", "llama3", [Generation(text="B")])
+    assert cache.lookup("a", "llama3") is not None
+
+    cache.update("c", "llama3", [Generation(text="C")])
+
+    assert cache.lookup("b", "llama3") is None
+    assert cache.lookup("a", "llama3") is not None
+    assert cache.lookup("c", "llama3") is not None
+
+
+def test_similar_prompt_reuses_the_closest_answer(tmp_path, monkeypatch):
+    vectors = {"capital of France?": [1.0, 0.0], "France's capital?": [0.99, 0.1], "weather": [0.0, 1.0]}
+    cache = _cache(tmp_path, similarity=0.95)
+    monkeypatch.setattr(cache, "_embed", lambda prompt: vectors[prompt])
+    cache.update("capital of France?", "llama3", [Generation(text="Paris")])
+
+    assert [g.text for g in cache.lookup("France's capital?", "llama3")] == ["Paris"]
+    assert cache.lookup("weather", "llama3") is None
+    assert cache.stats()["similar_hits"] == 1
@@ -0,0 +1,60 @@
+import os
+
+from Agent.data_ingestion.manifest import Manifest
+
+
+def _write(path, content, mtime=None):
+    with open(path, "wb") as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_diff_tells_new_changed_removed_and_touched_apart(tmp_path):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    for name in ("keep.pdf", "edit.pdf", "touch.pdf", "gone.pdf"):
+        _write(pdf_dir / name, name.encode(), mtime=1_000_000)
+    _write(pdf_dir / "notes.txt", b"not a pdf")
+
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    for name in ("keep.pdf", "edit.pdf", "touch.pdf", "gone.pdf"):
+        manifest.record(str(pdf_dir), name)
+
+    _write(pdf_dir / "edit.pdf", b"edited contents", mtime=2_000_000)
+    _write(pdf_dir / "touch.pdf", b"touch.pdf", mtime=2_000_000)
+    os.remove(pdf_dir / "gone.pdf")
+    _write(pdf_dir / "new.pdf", b"new")
+
+    new, changed, removed, touched = Manifest(manifest.path).diff(str(pdf_dir))
+    assert new == ["new.pdf"]
+    assert changed == ["edit.pdf"]
+    assert removed == ["gone.pdf"]
+    assert list(touched) == ["touch.pdf"]
+    assert touched["touch.pdf"]["mtime"] == 2_000_000
+
+
+def test_unchanged_files_are_not_hashed_again(tmp_path, monkeypatch):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    _write(pdf_dir / "a.pdf", b"a")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    manifest.record(str(pdf_dir), "a.pdf")
+
+    from Agent.data_ingestion import manifest as manifest_module
+
+    def fail(path):
+        raise AssertionError(f"{path} was hashed")
+
+    monkeypatch.setattr(manifest_module, "file_sha256", fail)
+    assert manifest.diff(str(pdf_dir)) == ([], [], [], {})
+
+
+def test_remove_and_reload(tmp_path):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    _write(pdf_dir / "a.pdf", b"a")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    manifest.record(str(pdf_dir), "a.pdf")
+    manifest.remove(["a.pdf", "unknown.pdf"])
+    assert Manifest(manifest.path).files == {}
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("langchain")
+
+from langchain.schema import Document  # noqa: E402
+
+from Agent.data_ingestion.dedup import ChunkDeduplicator  # noqa: E402
+from Agent.data_ingestion.pipeline import Checkpoint, run_documents, run_pipeline  # noqa: E402
+from Agent.search_backends.base import SearchBackend  # noqa: E402
+from Agent.vectors import embedding, embedding_cache  # noqa: E402
+from benchmarks.fake_ollama import FakeOllama  # noqa: E402
+from benchmarks.synthetic_pdfs import generate_corpus  # noqa: E402
+
+
+class MemoryBackend(SearchBackend):
+    name = "memory"
+
+    def __init__(self, index_name="test", reject=()):
+        super().__init__(index_name)
+        self.reject = set(reject)
+        self.docs = {}
+        self.batches = []
+
+    def index_chunks(self, chunks):
+        self.batches.append([dict(chunk) for chunk in chunks])
+        errors = []
+        for chunk in chunks:
+            doc_id = f"{chunk['source_file']}::{chunk['chunk_index']}"
+            if chunk["source_file"] in self.reject:
+                errors.append({"index": {"_id": doc_id, "status": 400, "error": "rejected"}})
+            else:
+                self.docs[doc_id] = dict(chunk)
+        return len(chunks) - len(errors), errors
+
+
+@pytest.fixture(autouse=True)
+def ollama(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = FakeOllama(dim=8).start()
+    monkeypatch.setattr(embedding, "OLLAMA_URL", server.url)
+    monkeypatch.setattr(embedding_cache, "CACHE_ENABLED", False)
+    yield server
+    server.stop()
+
+
+def test_checkpoint_is_kept_per_backend_and_index():
+    paths = {
+        Checkpoint.for_backend(MemoryBackend("a")).path,
+        Checkpoint.for_backend(MemoryBackend("b")).path,
+        Checkpoint.for_backend(MemoryBackend("a"), source="patents.jsonl.gz").path,
+    }
+    assert len(paths) == 3
+
+
+def test_resume_retries_only_unfinished_files(tmp_path):
+    pytest.importorskip("pypdf")
+    pdf_dir = str(tmp_path / "pdfs")
+    names = [os.path.basename(path) for path in generate_corpus(pdf_dir, documents=3, pages=1)]
+
+    first = MemoryBackend(reject={names[1]})
+    run_pipeline(first, pdf_dir, checkpoint=Checkpoint.for_backend(first), dedup=False)
+    checkpoint = Checkpoint.for_backend(first)
+    assert sorted(checkpoint.completed) == [names[0], names[2]]
+
+    second = MemoryBackend()
+    run_pipeline(second, pdf_dir, checkpoint=checkpoint, dedup=False)
+    assert {doc["source_file"] for doc in second.docs.values()} == {names[1]}
+    assert sorted(Checkpoint.for_backend(first).completed) == sorted(names)
+
+
+def test_grown_chunks_are_reindexed_with_their_vectors():
+    repeated = ("The rotor blade is mounted on a hub that turns a generator shaft. " * 3).strip()
+    pages = [Document(page_content=f"{repeated}\n\nfiller paragraph number {i} about gears") for i in range(3)]
+    backend = MemoryBackend()
+
+    run_documents(
+        backend, [("a.pdf", pages)], batch_size=1, chunk_size=200, chunk_overlap=0,
+        dedup=ChunkDeduplicator(scope="file"),
+    )
+    canonical = backend.docs["a.pdf::0"]
+    assert len(canonical["locations"]) == 3
+    assert len(canonical["embedding"]) == 8
+    # Whether or not it was sent before its duplicates arrived, it never went out without its vector
+    assert all("embedding" in chunk for batch in backend.batches for chunk in batch)
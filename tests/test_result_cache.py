@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from Agent.search_client import generation
+from Agent.tools import result_cache
+from Agent.tools.result_cache import PartialResults, ResultCache, cached_async_search, cached_search
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(generation, "GENERATION_PATH", str(tmp_path / "generation.json"))
+    monkeypatch.setattr(generation, "_cached", {"mtime": None, "generations": {}})
+    monkeypatch.setattr(result_cache, "result_cache", ResultCache(disk_path=""))
+    monkeypatch.setattr(result_cache, "CACHE_ENABLED", True)
+
+
+def _counting(results):
+    calls = []
+
+    @cached_search("keyword", "patents")
+    def search(query_text, top_k=20, **options):
+        calls.append((query_text, top_k, options))
+        return results() if callable(results) else results
+
+    return search, calls
+
+
+def test_hits_until_the_index_generation_changes():
+    search, calls = _counting([{"_id": "a::0"}])
+    assert search("Rotor  Blade", 5) == [{"_id": "a::0"}]
+    assert search("rotor blade", 5) == [{"_id": "a::0"}]
+    assert len(calls) == 1
+
+    generation.bump_index_generation("other_index")
+    search("rotor blade", 5)
+    assert len(calls) == 1
+
+    generation.bump_index_generation("patents")
+    search("rotor blade", 5)
+    assert len(calls) == 2
+
+
+def test_top_k_and_options_are_part_of_the_key():
+    search, calls = _counting([{"_id": "a::0"}])
+    search("rotor", 5)
+    search("rotor", 10)
+    search("rotor", 5, fusion="weighted")
+    search("rotor", 5, use_cache=False)
+    assert len(calls) == 4
+
+
+@pytest.mark.parametrize("results", [[], PartialResults([{"_id": "a::0"}])])
+def test_empty_and_partial_results_are_not_cached(results):
+    search, calls = _counting(results)
+    search("rotor", 5)
+    search("rotor", 5)
+    assert len(calls) == 2
+
+
+def test_disk_tier_is_shared_and_checks_the_generation(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    first = ResultCache(disk_path=path)
+    first.put(("keyword", "rotor", 5, "patents"), 0, [{"_id": "a::0"}])
+
+    second = ResultCache(disk_path=path)
+    assert second.get(("keyword", "rotor", 5, "patents"), 0) == [{"_id": "a::0"}]
+    assert second.get(("keyword", "rotor", 5, "patents"), 1) is None
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_lru_and_ttl_limits():
+    cache = ResultCache(max_entries=2, ttl=60, disk_path="")
+    for i in range(3):
+        cache.put(("keyword", str(i), 5, "patents"), 0, [i])
+    assert cache.get(("keyword", "0", 5, "patents"), 0) is None
+    assert cache.get(("keyword", "2", 5, "patents"), 0) == [2]
+
+    expired = ResultCache(ttl=0, disk_path="")
+    expired.put(("keyword", "rotor", 5, "patents"), 0, [1])
+    assert expired.get(("keyword", "rotor", 5, "patents"), 0) is None
+
+
+def test_async_searches_share_the_cache():
+    sync_search, calls = _counting([{"_id": "a::0"}])
+
+    @cached_async_search("keyword", "patents")
+    async def async_search(query_text, top_k=20):
+        calls.append(query_text)
+        return [{"_id": "b::0"}]
+
+    sync_search("rotor", 5)
+    assert asyncio.run(async_search("rotor", 5)) == [{"_id": "a::0"}]
+    assert len(calls) == 1
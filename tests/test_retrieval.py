@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("opensearchpy")
+
+from Agent.crew_ai import retrieval  # noqa: E402
+from Agent.crew_ai.retrieval import RetrievalSession  # noqa: E402
+from Agent.tools.result_cache import PartialResults  # noqa: E402
+
+HITS = [{"_id": "a.pdf::0", "_source": {"source_file": "a.pdf", "chunk_index": 0, "text": "rotor blade"}}]
+
+
+def _session(monkeypatch, responses):
+    calls = []
+
+    def search(query, top_k):
+        calls.append(query)
+        return responses[len(calls) - 1]
+
+    monkeypatch.setitem(retrieval.SEARCH_FUNCTIONS, "keyword", search)
+    return RetrievalSession("keyword"), calls
+
+
+@pytest.mark.parametrize("failed", [[], PartialResults(HITS)])
+def test_failed_or_partial_searches_are_retried(monkeypatch, failed):
+    session, calls = _session(monkeypatch, [failed, HITS])
+    session.search("rotor blades", scope="analyst")
+    assert "rotor blade" in session.search("Rotor blade", scope="analyst")
+    assert len(calls) == 2
+
+
+def test_repeats_are_referenced_per_scope(monkeypatch):
+    session, calls = _session(monkeypatch, [HITS])
+    assert "rotor blade" in session.search("rotor blades", scope="analyst")
+    assert "see chunks a.pdf::0 above" in session.search("the rotor blade", scope="analyst")
+    # Another agent has not seen the text yet
+    assert "rotor blade" in session.search("rotor blade", scope="writer")
+    assert len(calls) == 1
+    assert session.stats()["cache_hits"] == 2
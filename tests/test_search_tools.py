@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("opensearchpy")
+
+from Agent.search_backends.base import SearchBackend  # noqa: E402
+from Agent.search_client import generation  # noqa: E402
+from Agent.tools import result_cache, search_tools  # noqa: E402
+from Agent.tools.result_cache import PartialResults, ResultCache  # noqa: E402
+
+
+def _vector(text):
+    return np.random.default_rng(sum(text.encode())).normal(size=8).tolist()
+
+
+def _hits(n):
+    return [
+        {"_id": f"f{i % 3}::{i}", "_score": 1.0 / (i + 1),
+         "_source": {"source_file": f"f{i % 3}", "chunk_index": i, "text": f"chunk {i}"}}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(generation, "GENERATION_PATH", str(tmp_path / "generation.json"))
+    monkeypatch.setattr(result_cache, "result_cache", ResultCache(disk_path=""))
+    monkeypatch.setattr(result_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(search_tools, "embed_many", lambda texts, verbose=False: [_vector(t) for t in texts])
+
+
+def test_diverse_search_embeds_candidates_missing_from_the_cache(monkeypatch):
+    monkeypatch.setattr(search_tools, "hybrid_search", lambda query, size: _hits(12))
+    monkeypatch.setattr(search_tools, "cached_embeddings", lambda texts: [None] * len(texts))
+
+    results = search_tools.diverse_search("rotor", top_k=6, max_per_file=2)
+    assert len(results) == 6
+    assert not isinstance(results, PartialResults)
+    assert sorted(hit["_source"]["source_file"] for hit in results) == ["f0", "f0", "f1", "f1", "f2", "f2"]
+    assert result_cache.result_cache.stats()["entries"] == 1
+
+
+def test_diverse_search_passes_on_degraded_candidates(monkeypatch):
+    monkeypatch.setattr(search_tools, "hybrid_search", lambda query, size: PartialResults(_hits(12)))
+    monkeypatch.setattr(search_tools, "cached_embeddings", lambda texts: [_vector(t) for t in texts])
+
+    results = search_tools.diverse_search("rotor", top_k=4)
+    assert isinstance(results, PartialResults)
+    assert result_cache.result_cache.stats()["entries"] == 0
+
+
+def test_rescore_keeps_unembeddable_candidates_as_partial(monkeypatch):
+    def embed_many(texts, verbose=False):
+        raise ConnectionError("ollama down")
+
+    monkeypatch.setattr(search_tools, "embed_many", embed_many)
+    monkeypatch.setattr(
+        search_tools, "cached_embeddings", lambda texts: [_vector(t) if t.endswith("1") else None for t in texts]
+    )
+    hits = _hits(4)
+    results = search_tools._rescore_hits(hits, _vector("query"), 3)
+    assert isinstance(results, PartialResults)
+    assert [hit["_id"] for hit in results] == ["f1::1", "f0::0", "f2::2"]
+
+
+class StubBackend(SearchBackend):
+    name = "stub"
+
+    def __init__(self, failing=()):
+        super().__init__("test")
+        self.failing = set(failing)
+
+    def keyword(self, query_text, size):
+        if query_text in self.failing:
+            raise TimeoutError(f"keyword search for '{query_text}' timed out")
+        return _hits(size)
+
+    def vector(self, vector, size):
+        return list(reversed(_hits(size)))
+
+
+def test_batch_search_reports_a_failed_leg_per_query(monkeypatch):
+    monkeypatch.setattr(search_tools, "get_search_backend", lambda: StubBackend(failing={"bad"}))
+    monkeypatch.setattr(search_tools, "get_embedding_transform", lambda: None)
+
+    good, bad = search_tools.batch_search(["good", "bad"], mode="hybrid", top_k=3, candidate_k=4)
+    assert good["error"] is None
+    assert len(good["results"]) == 3
+    assert bad["error"].startswith("keyword leg:")
+    # The semantic leg still answers
+    assert [hit["_id"] for hit in bad["results"]] == [hit["_id"] for hit in reversed(_hits(4))][:3]
+
+
+def test_batch_search_without_embeddings_keeps_keyword_results(monkeypatch):
+    def embed_many(texts, verbose=False):
+        raise ConnectionError("ollama down")
+
+    monkeypatch.setattr(search_tools, "get_search_backend", lambda: StubBackend())
+    monkeypatch.setattr(search_tools, "get_embedding_transform", lambda: None)
+    monkeypatch.setattr(search_tools, "embed_many", embed_many)
+
+    outcomes = search_tools.batch_search(["a", "b"], mode="hybrid", top_k=2)
+    assert all(outcome["error"] == "semantic leg: ollama down" for outcome in outcomes)
+    assert all(len(outcome["results"]) == 2 for outcome in outcomes)
+
+    semantic = search_tools.batch_search(["a"], mode="semantic", top_k=2)
+    assert semantic[0]["results"] == []
+    assert semantic[0]["error"].startswith("semantic leg:")
+
+
+def test_batch_search_validates_input():
+    assert search_tools.batch_search([]) == []
+    with pytest.raises(ValueError):
+        search_tools.batch_search(["a"], mode="fuzzy")
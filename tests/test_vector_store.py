@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from Agent.vector_db.vector_store import VectorStore  # noqa: E402
+
+
+def _vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype("float32")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_add_search_delete(index_type):
+    store = VectorStore(dim=16, index_type=index_type)
+    vectors = _vectors(20)
+    store.add(vectors, [f"text {i}" for i in range(20)], ids=[f"doc{i}" for i in range(20)])
+    assert len(store) == 20
+
+    assert store.search(vectors[3], k=1)[0][0]["id"] == "doc3"
+
+    assert store.delete(["doc3", "missing"]) == 1
+    assert len(store) == 19
+    hits = store.search(vectors[3], k=5)[0]
+    assert len(hits) == 5
+    assert "doc3" not in {hit["id"] for hit in hits}
+
+    # A deleted id can be reused
+    store.add(vectors[3:4], ["again"], ids=["doc3"])
+    assert store.get(["doc3"])["doc3"]["text"] == "again"
+
+
+def test_add_replaces_existing_ids():
+    store = VectorStore(dim=16)
+    vectors = _vectors(2)
+    store.add(vectors[:1], ["old"], ids=["a"], metadata=[{"v": 1}])
+    store.add(vectors[1:], ["new"], ids=["a"], metadata=[{"v": 2}])
+    assert len(store) == 1
+    assert store.get(["a"])["a"]["metadata"] == {"v": 2}
+    assert store.search(vectors[1], k=1)[0][0]["id"] == "a"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "store")
+    store = VectorStore(dim=16, index_type="hnsw", path=path)
+    vectors = _vectors(10)
+    store.add(vectors, [str(i) for i in range(10)], ids=[str(i) for i in range(10)])
+    store.delete(["4"])
+    store.save(path)
+
+    loaded = VectorStore.load(path, mmap=False)
+    assert len(loaded) == 9
+    assert loaded.is_consistent()
+    assert loaded.search(vectors[7], k=1)[0][0]["id"] == "7"
+    assert "4" not in loaded.ext_ids()
+
+
+def test_ivfpq_needs_explicit_training(tmp_path):
+    store = VectorStore(dim=16, index_type="ivfpq", nlist=8, pq_m=4, pq_bits=4)
+    vectors = _vectors(300)
+    with pytest.raises(RuntimeError):
+        store.add(vectors[:10], ["x"] * 10)
+    with pytest.raises(ValueError):
+        store.train(vectors[:4])
+
+    store.train(vectors)
+    ids = store.add(vectors, [str(i) for i in range(300)])
+    assert len(store) == 300
+    assert len(set(ids)) == 300
+
+    path = str(tmp_path / "ivf")
+    store.save(path)
+    served = VectorStore.load(path, mmap=True)
+    assert served.read_only
+    assert len(served.search(vectors[0], k=5)[0]) == 5
+    with pytest.raises(RuntimeError):
+        served.delete([ids[0]])
+
+
+def test_hnsw_compacts_tombstones():
+    store = VectorStore(dim=16, index_type="hnsw")
+    vectors = _vectors(50)
+    store.add(vectors, [str(i) for i in range(50)], ids=[str(i) for i in range(50)])
+
+    store.delete([str(i) for i in range(20)])
+    # Past the tombstone ratio the graph is rebuilt from the live vectors
+    assert store.index.ntotal == 30
+    assert store.is_consistent()
+    assert store.search(vectors[25], k=1)[0][0]["id"] == "25"
+    assert len(store.search(vectors[0], k=10)[0]) == 10